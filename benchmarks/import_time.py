@@ -0,0 +1,64 @@
+""" Benchmark the import time of the prediction path and check that it stays within a budget """
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# modules only needed for training and plotting
+TRAINING_MODULES = ['core.Trainer', 'matplotlib', 'sklearn', 'tqdm']
+# modules on the prediction path
+TASKS = ['EntityClassification', 'RelationExtraction', 'AspectOpinionExtraction', 'AspectBasedSentimentAnalysis']
+PREDICTION_MODULES = ['core.Model', 'core.Predictor'] + [
+    "tasks.%s.%s" % (task, module) for task in TASKS for module in ('models', 'Predictor')
+]
+
+# measures the import of the module given as argument in a fresh interpreter
+# resolving the predictor and models of the task registry must not import the trainer either
+MEASURE = """
+import sys, json, time, importlib
+module = sys.argv[1]
+start = time.perf_counter()
+importlib.import_module(module)
+if module.startswith('tasks.'):
+    task = importlib.import_module('.'.join(module.split('.')[:2])).task
+    types = [task.predictor_type] + [task.model_type(name) for name in task.model_registry]
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules.keys())}))
+"""
+
+
+def measure(module:str, repeat:int) -> tuple:
+    """ Import a module in fresh interpreters. Returns the best import time and all loaded modules. """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', MEASURE, module], cwd=root, check=True, capture_output=True, text=True)
+        results.append(json.loads(out.stdout.strip().split('\n')[-1]))
+    return min(r['elapsed'] for r in results), results[0]['modules']
+
+
+if __name__ == '__main__':
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the prediction path.")
+    parser.add_argument("--budget", type=float, default=3.0, help="Maximum import time of each module in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of fresh interpreters per module")
+    args = parser.parse_args()
+
+    failed = False
+    for module in PREDICTION_MODULES:
+        elapsed, modules = measure(module, args.repeat)
+        # check for training dependencies
+        leaked = [name for name in TRAINING_MODULES if name in modules]
+        over_budget = elapsed > args.budget
+        failed = failed or over_budget or (len(leaked) > 0)
+        # print results
+        print("%-50s %7.3fs %s%s" % (
+            module, elapsed,
+            "OVER BUDGET " if over_budget else "",
+            ("imports %s" % ', '.join(leaked)) if len(leaked) > 0 else ""
+        ))
+
+    # fail if the budget is exceeded or training dependencies are imported
+    sys.exit(1 if failed else 0)
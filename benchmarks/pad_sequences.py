@@ -0,0 +1,31 @@
+""" Microbenchmark comparing pad_sequences against align_shape """
+import os
+import sys
+import timeit
+import random
+# import torch
+import torch
+# make core importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.utils import align_shape, pad_sequences
+
+
+def benchmark(n_sequences:int, seq_length:int, repeat:int) -> None:
+    # create random ragged sequences
+    sequences = [[random.randint(1, 30000) for _ in range(random.randint(1, seq_length + 16))] for _ in range(n_sequences)]
+    # make sure both produce the same tensors
+    expected = torch.LongTensor(align_shape(sequences, (n_sequences, seq_length), 0))
+    assert torch.equal(expected, pad_sequences(sequences, seq_length, 0))
+    # time both implementations
+    t_align = min(timeit.repeat(lambda: torch.LongTensor(align_shape(sequences, (n_sequences, seq_length), 0)), number=repeat, repeat=3)) / repeat
+    t_pad = min(timeit.repeat(lambda: pad_sequences(sequences, seq_length, 0), number=repeat, repeat=3)) / repeat
+    # print results
+    print("n=%5i, seq_length=%4i: align_shape %8.1fus, pad_sequences %8.1fus, speedup %5.1fx" % (n_sequences, seq_length, t_align * 1e6, t_pad * 1e6, t_align / t_pad))
+
+
+if __name__ == '__main__':
+
+    random.seed(1337)
+    # single items as in build_feature_tensors and batches as in prediction
+    for n_sequences, seq_length, repeat in [(1, 64, 2000), (1, 128, 2000), (8, 128, 500), (32, 128, 200), (256, 128, 20)]:
+        benchmark(n_sequences, seq_length, repeat)
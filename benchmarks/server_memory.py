@@ -0,0 +1,96 @@
+""" Measure the memory of the inference server for different numbers of worker processes """
+import os
+import re
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+import urllib.request
+
+# serves the predictors of the given tasks, or a linear layer of the given size as
+# stand-in model, on an unused port with the given number of workers
+SERVE = """
+import sys, json, torch, server
+num_workers, size, tasks = int(sys.argv[1]), int(sys.argv[2]), json.loads(sys.argv[3])
+class LinearPredictor(object):
+    def __init__(self, size):
+        self.model = torch.nn.Linear(size, size)
+    def predict_batch(self, inputs):
+        # read all weights
+        with torch.no_grad():
+            return [self.model(torch.ones(self.model.in_features)).sum().item() for _ in inputs]
+if len(tasks) > 0:
+    from predict import PREDICTORS
+    predictors = {task: PREDICTORS[task]() for task in tasks}
+else:
+    predictors = {'Linear': LinearPredictor(size)}
+server.serve(predictors, port=0, num_workers=num_workers, num_threads=1)
+"""
+
+
+def memory(pid:int) -> tuple:
+    """ Get the resident and proportional set size of a process in MB. The proportional set
+        size divides pages shared between processes by the number of processes sharing them.
+    """
+    with open("/proc/%i/status" % pid, 'r') as f:
+        rss = int(re.search(r"VmRSS:\s+(\d+)", f.read()).group(1))
+    with open("/proc/%i/smaps_rollup" % pid, 'r') as f:
+        pss = int(re.search(r"Pss:\s+(\d+)", f.read()).group(1))
+    return rss / 1024, pss / 1024
+
+def children(pid:int) -> list:
+    with open("/proc/%i/task/%i/children" % (pid, pid), 'r') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def measure(num_workers:int, size:int, tasks:list, inputs:list, num_requests:int) -> tuple:
+    """ Start the server and send requests to warm up the workers. Returns the memory 
+        of the parent and all workers as (rss, pss) pairs.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen([sys.executable, '-c', SERVE, str(num_workers), str(size), json.dumps(tasks)], cwd=root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        # wait for the server to listen
+        line = proc.stdout.readline()
+        port = int(re.search(r"http://[^:]+:(\d+)", line).group(1))
+        # send requests to all routes
+        for _ in range(num_requests):
+            for route, inp in inputs:
+                data = json.dumps(inp).encode('utf-8')
+                urllib.request.urlopen("http://127.0.0.1:%i/%s" % (port, route), data=data, timeout=60).read()
+        time.sleep(0.5)
+        return memory(proc.pid), [memory(pid) for pid in children(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait()
+        proc.stdout.close()
+
+
+if __name__ == '__main__':
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="Measure the memory of the inference server for different numbers of workers.")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 2, 4], help="Numbers of worker processes")
+    parser.add_argument("--tasks", type=str, nargs='*', default=[], help="Tasks of predict.py to serve, defaults to a stand-in model")
+    parser.add_argument("--size", type=int, default=4096, help="Size of the linear layer of the stand-in model")
+    parser.add_argument("--requests", type=int, default=16, help="Number of requests per route")
+    args = parser.parse_args()
+
+    # inputs of the predictors
+    if len(args.tasks) > 0:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from core.Task import get_task
+        inputs = [(task, get_task(task).predictor_type.EXAMPLE_INPUTS[0]) for task in args.tasks]
+    else:
+        inputs = [('Linear', {'text': "Hello World"})]
+
+    print("%8s %12s %16s %16s %12s" % ("workers", "parent RSS", "worker RSS (avg)", "total RSS", "total PSS"))
+    for num_workers in args.workers:
+        parent, workers = measure(num_workers, args.size, args.tasks, inputs, args.requests)
+        total_rss = parent[0] + sum(rss for rss, _ in workers)
+        total_pss = parent[1] + sum(pss for _, pss in workers)
+        print("%8i %10.1fMB %14.1fMB %14.1fMB %10.1fMB" % (
+            num_workers, parent[0], sum(rss for rss, _ in workers) / max(len(workers), 1), total_rss, total_pss
+        ))
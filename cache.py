@@ -0,0 +1,58 @@
+""" Pre-warm the feature caches of all datasets of a task """
+import argparse
+# import task registry
+from core.Task import get_task
+
+
+def registered_datasets(task:str) -> dict:
+    """ Get all datasets registered to the given task """
+    task = get_task(task)
+    return {name: task.dataset_type(name) for name in task.dataset_registry}
+
+def warm_cache(task:str, model_name:str, dataset_names:list, pretrained_name:str, seq_length:int, data_base_dir:str, cache_dir:str) -> None:
+    """ Build and cache the train and test features of the given datasets """
+    # import model type
+    model_type = get_task(task).model_type(model_name)
+    # features are built by a weightless model in training mode as during training,
+    # so only the configuration and tokenizer of the pretrained model are loaded
+    tokenizer = model_type.TOKENIZER_TYPE.from_pretrained(pretrained_name)
+    builder = model_type.weightless(model_type.config_class.from_pretrained(pretrained_name))
+    builder.train()
+    # get dataset types
+    datasets = registered_datasets(task)
+    dataset_names = dataset_names or sorted(datasets.keys())
+
+    for name in dataset_names:
+        print("Warming cache for %s" % name)
+        try:
+            # build and cache both the train and test dataset
+            for train in (True, False):
+                datasets[name](train, builder, tokenizer, seq_length, data_base_dir, cache_dir=cache_dir)
+        except FileNotFoundError as e:
+            # dataset files not available
+            print("Skipping %s: %s" % (name, e))
+
+
+if __name__ == '__main__':
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="Pre-warm the feature caches of all datasets of a task.")
+    parser.add_argument("--task", type=str, required=True, help="Name of the task, e.g. EntityClassification")
+    parser.add_argument("--model", type=str, required=True, help="Name of the model, e.g. BertForEntityClassification")
+    parser.add_argument("--pretrained-name", type=str, required=True, help="Name of the pretrained model, e.g. bert-base-uncased")
+    parser.add_argument("--seq-length", type=int, required=True, help="Sequence length")
+    parser.add_argument("--datasets", type=str, nargs='*', default=None, help="Datasets to cache, defaults to all datasets of the task")
+    parser.add_argument("--data-base-dir", type=str, default="./data", help="Base directory of the datasets")
+    parser.add_argument("--cache-dir", type=str, default="./cache", help="Directory of the feature cache")
+    args = parser.parse_args()
+
+    # warm caches
+    warm_cache(
+        task=args.task,
+        model_name=args.model,
+        dataset_names=args.datasets,
+        pretrained_name=args.pretrained_name,
+        seq_length=args.seq_length,
+        data_base_dir=args.data_base_dir,
+        cache_dir=args.cache_dir
+    )
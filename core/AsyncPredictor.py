@@ -0,0 +1,140 @@
+from __future__ import annotations
+import time
+import queue
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+# the predictor type is only used in annotations
+if TYPE_CHECKING:
+    from .Predictor import BasePredictor
+
+
+class AsyncPredictor(object):
+    """ Asyncio front-end for predictors. Concurrent requests are gathered into micro-batches
+        that are predicted on a dedicated inference thread, so the event loop is never blocked
+        by a forward pass. A batch is started as soon as it holds max_batch_size requests or
+        the oldest request waited for max_wait seconds.
+    """
+
+    def __init__(self, predictor:BasePredictor, max_batch_size:int =32, max_wait:float =0.005):
+        # save values
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # queue of pending requests
+        self.queue = queue.Queue()
+        # metrics
+        self.lock = threading.Lock()
+        self.n_requests, self.n_batches = 0, 0
+        self.total_wait, self.max_observed_wait = 0.0, 0.0
+        self.last_batch_size, self.max_observed_batch_size = 0, 0
+        # start inference thread
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    async def predict_async(self, text, *args, **kwargs):
+        """ Predict on a single input. Takes the same arguments as the predict function of the predictor. """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # enqueue request
+        inp = self.predictor.build_input(text, *args, **kwargs)
+        self.queue.put((inp, future, loop, time.monotonic()))
+        # wait for result
+        return await future
+
+    def collect_batch(self) -> list:
+        """ Collect the next batch of requests. Returns None once the predictor is closed. """
+        # wait for first request
+        request = self.queue.get()
+        if request is None:
+            return None
+        batch = [request]
+        # gather more requests until the batch is full or the first request waited too long
+        deadline = request[3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                # take requests that are already waiting without blocking
+                timeout = deadline - time.monotonic()
+                request = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # stop after this batch
+                self.queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def run(self) -> None:
+        """ Inference loop run by the inference thread """
+        while True:
+            batch = self.collect_batch()
+            if batch is None:
+                return
+            # ignore requests that were cancelled while waiting
+            batch = [request for request in batch if not request[1].cancelled()]
+            if len(batch) == 0:
+                continue
+            # update metrics
+            start_time = time.monotonic()
+            self.update_metrics([start_time - request[3] for request in batch])
+            # predict and resolve futures
+            try:
+                results = self.predictor.predict_batch([request[0] for request in batch], batch_size=self.max_batch_size)
+                outcomes = [(result, None) for result in results]
+            except Exception as e:
+                # an invalid input fails the whole batch, so predict the inputs one at 
+                # a time to resolve each future with its own result or exception
+                outcomes = [(None, e)] if len(batch) == 1 else [self.predict_single(request[0]) for request in batch]
+            for (_, future, loop, _), (result, exception) in zip(batch, outcomes):
+                try:
+                    loop.call_soon_threadsafe(AsyncPredictor._resolve, future, result, exception)
+                except RuntimeError:
+                    # event loop of the caller is already closed
+                    pass
+
+    def predict_single(self, inp) -> tuple:
+        """ Predict on a single input. Returns the result and the exception raised, if any. """
+        try:
+            return self.predictor.predict_batch([inp], batch_size=1)[0], None
+        except Exception as e:
+            return None, e
+
+    @staticmethod
+    def _resolve(future:asyncio.Future, result, exception:Exception) -> None:
+        # caller might have given up on the request
+        if future.cancelled():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def update_metrics(self, waits:list) -> None:
+        with self.lock:
+            self.n_requests += len(waits)
+            self.n_batches += 1
+            self.total_wait += sum(waits)
+            self.max_observed_wait = max(self.max_observed_wait, max(waits))
+            self.last_batch_size = len(waits)
+            self.max_observed_batch_size = max(self.max_observed_batch_size, len(waits))
+
+    @property
+    def metrics(self) -> dict:
+        """ Queue depth, batch sizes and wait times of the requests in seconds """
+        with self.lock:
+            return {
+                'queue-depth': self.queue.qsize(),
+                'requests': self.n_requests,
+                'batches': self.n_batches,
+                'mean-batch-size': self.n_requests / max(self.n_batches, 1),
+                'last-batch-size': self.last_batch_size,
+                'max-batch-size': self.max_observed_batch_size,
+                'mean-wait': self.total_wait / max(self.n_requests, 1),
+                'max-wait': self.max_observed_wait
+            }
+
+    def close(self) -> None:
+        """ Stop the inference thread after all pending requests are processed """
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,142 @@
+import random
+# import torch
+import torch
+
+
+""" Sequence Length Helpers """
+
+def sequence_lengths(input_ids:torch.Tensor, pad_token_id:int) -> torch.LongTensor:
+    """ Get the unpadded lengths of a batch of padded sequences. """
+    # mask of non-padding tokens
+    mask = (input_ids != pad_token_id)
+    # position of last non-padding token
+    lengths = mask.size(1) - mask.flip(1).long().argmax(dim=1)
+    return torch.where(mask.any(dim=1), lengths, torch.zeros_like(lengths))
+
+def dataset_sequence_lengths(dataset:torch.utils.data.TensorDataset, feature_idx:int, pad_token_id:int) -> list:
+    """ Get the unpadded lengths of all sequences of a dataset feature. """
+    tensor = dataset.tensors[feature_idx]
+    # memory-mapped tensors are split into shards
+    shards = getattr(tensor, 'shards', [tensor])
+    return torch.cat([sequence_lengths(shard, pad_token_id) for shard in shards], dim=0).tolist()
+
+def padding_waste(lengths:list, batches:list, seq_length:int) -> tuple:
+    """ Compute the ratio of padding tokens when padding all sequences to the
+        global sequence length and when padding to the maximum length of each batch.
+    """
+    n_tokens = sum(lengths)
+    # padding to the global sequence length
+    n_global = len(lengths) * seq_length
+    # padding to the maximum length in each batch
+    n_dynamic = sum(len(batch) * max((lengths[i] for i in batch), default=0) for batch in batches)
+    # compute ratios
+    return 1 - n_tokens / max(n_global, 1), 1 - n_tokens / max(n_dynamic, 1)
+
+
+""" Batch Sampler """
+
+class BucketBatchSampler(torch.utils.data.Sampler):
+    """ Batch Sampler that groups examples of similar lengths into batches.
+        Batches either hold a fixed number of examples or as many examples as fit
+        into a token budget, i.e. the padded batch holds at most max_tokens tokens.
+        When shuffling, examples are sorted within randomly drawn pools and the order
+        of the batches is shuffled. Otherwise all examples are sorted by their length.
+    """
+
+    def __init__(self, lengths:list, batch_size:int =None, max_tokens:int =None, shuffle:bool =True, pool_size:int =100):
+        # check arguments
+        if (batch_size is None) and (max_tokens is None):
+            raise ValueError("Either batch_size or max_tokens must be set!")
+        # save values
+        self.lengths = lengths
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.pool_size = pool_size
+        # build batches for first epoch
+        self.batches = self.build_batches()
+
+    def _split(self, indices:list) -> list:
+        # split sorted indices into batches
+        batches, batch, batch_max_len = [], [], 0
+        for i in indices:
+            max_len = max(batch_max_len, self.lengths[i])
+            # check if example fits into current batch
+            full = (self.batch_size is not None) and (len(batch) >= self.batch_size)
+            full = full or ((self.max_tokens is not None) and (len(batch) > 0) and ((len(batch) + 1) * max_len > self.max_tokens))
+            if full:
+                batches.append(batch)
+                batch, max_len = [], self.lengths[i]
+            batch.append(i)
+            batch_max_len = max_len
+        # add last batch
+        if len(batch) > 0:
+            batches.append(batch)
+        return batches
+
+    def build_batches(self) -> list:
+        """ Build the batches of an epoch """
+        indices = list(range(len(self.lengths)))
+        # evaluation - sort all examples by their length
+        if not self.shuffle:
+            return self._split(sorted(indices, key=self.lengths.__getitem__))
+        # create random generator seeded from torch to follow torch.manual_seed
+        rng = random.Random(int(torch.empty((), dtype=torch.int64).random_().item()))
+        rng.shuffle(indices)
+        # size of pools in which examples are sorted
+        pool_size = self.pool_size * (self.batch_size or max(self.max_tokens // max(max(self.lengths, default=1), 1), 1))
+        # sort examples within pools and build batches
+        batches = []
+        for begin in range(0, len(indices), pool_size):
+            pool = sorted(indices[begin:begin + pool_size], key=self.lengths.__getitem__)
+            batches.extend(self._split(pool))
+        # shuffle order of batches
+        rng.shuffle(batches)
+        return batches
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def __iter__(self) -> iter:
+        # yield batches of current epoch and build batches for next epoch
+        batches = self.batches
+        if self.shuffle:
+            self.batches = self.build_batches()
+        yield from batches
+
+
+""" Collate Function """
+
+class DynamicPaddingCollator(object):
+    """ Collate function that removes the padding exceeding the longest sequence
+        of the batch from all sequence features.
+    """
+
+    def __init__(self, sequence_features:tuple, pad_token_id:int):
+        # save values
+        # the first sequence feature holds the token ids
+        self.sequence_features = sequence_features
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, examples:list) -> list:
+        # stack examples
+        batch = torch.utils.data.dataloader.default_collate(examples)
+        # get length of longest sequence in batch
+        max_len = int(sequence_lengths(batch[self.sequence_features[0]], self.pad_token_id).max().item()) if len(examples) > 0 else 0
+        # cut all sequence features
+        return [t[:, :max_len] if i in self.sequence_features else t for i, t in enumerate(batch)]
+
+
+""" Worker Init """
+
+class PinWorkerThreads(object):
+    """ Worker init function that pins the number of threads torch uses in each
+        dataloader worker, so the workers do not compete with the training loop
+        for the cores.
+    """
+
+    def __init__(self, num_threads:int =1):
+        self.num_threads = num_threads
+
+    def __call__(self, worker_id:int) -> None:
+        torch.set_num_threads(self.num_threads)
@@ -1,26 +1,203 @@
-# import torch and transformers
+from __future__ import annotations
+import os
+import time
+import multiprocessing as mp
+from typing import TYPE_CHECKING
+# import torch
 import torch
-import transformers
-# import base model
-from .Model import BaseModel
+# model and tokenizer types are only used in annotations
+if TYPE_CHECKING:
+    import transformers
+    from .Model import BaseModel
+# import feature cache
+from .FeatureCache import FeatureCache
+# import tokenization helpers
+from .utils import batch_encode_with_spans
+
+
+""" Feature Building Helpers """
+
+def build_feature_chunk(dataset_type:type, model:BaseModel, tokenizer:transformers.BertTokenizer, seq_length:int, kwargs:dict, items:list) -> tuple:
+    """ Build the concatenated feature tensors of a chunk of item features.
+        Returns the number of processed items and the feature tensors (None if no item is valid).
+    """
+    # build dataset items and feature tensors
+    data_items = dataset_type.build_dataset_items(items, tokenizer)
+    sentence_ids = dataset_type.sentence_ids(items)
+    valid = [i for i, item in enumerate(data_items) if item is not None]
+    data_items = model.group_dataset_items([data_items[i] for i in valid], [sentence_ids[i] for i in valid])
+    data_items = [model.build_feature_tensors(*item, seq_length=seq_length, **kwargs, tokenizer=tokenizer) for item in data_items]
+    data_items = [item for item in data_items if item is not None]
+    # concatenate features
+    tensors = tuple(torch.cat(feat, dim=0) for feat in zip(*data_items)) if len(data_items) > 0 else None
+    return len(items), tensors
+
+# arguments shared by all chunks of a worker process
+_worker_args = None
+
+def _init_feature_worker(*args) -> None:
+    global _worker_args
+    # feature building only runs small tensor operations
+    torch.set_num_threads(1)
+    # save arguments once per worker instead of once per chunk
+    _worker_args = args
+
+def _build_feature_chunk_in_worker(items:list) -> tuple:
+    return build_feature_chunk(*_worker_args, items)
+
+def _concat_chunks(results:iter, n_items:int =None) -> tuple:
+    """ Concatenate the feature tensors of chunks as they are built. The tensors of each chunk
+        are copied into preallocated buffers and freed right away instead of keeping all chunks
+        until the end. The buffers are sized by the number of rows per item of the first chunk
+        and grow if needed. Returns the number of processed items and the feature tensors.
+    """
+    buffers, n_rows, n_processed = None, 0, 0
+    for n, tensors in results:
+        n_processed += n
+        if tensors is None:
+            continue
+        k = tensors[0].size(0)
+        if buffers is None:
+            # estimate the total number of rows from the first chunk
+            capacity = max(k * n_items // max(n, 1), k) if n_items is not None else 4 * k
+            buffers = [t.new_empty((capacity,) + tuple(t.shape[1:])) for t in tensors]
+        elif n_rows + k > buffers[0].size(0):
+            # grow buffers
+            capacity = max(buffers[0].size(0) * 3 // 2, n_rows + k)
+            buffers = [torch.cat((b[:n_rows], b.new_empty((capacity - n_rows,) + tuple(b.shape[1:]))), dim=0) for b in buffers]
+        # copy chunk into buffers
+        for b, t in zip(buffers, tensors):
+            b[n_rows:n_rows + k] = t
+        n_rows += k
+    if buffers is None:
+        return n_processed, ()
+    # cut off unused rows one feature at a time
+    for i, b in enumerate(buffers):
+        buffers[i] = b if b.size(0) == n_rows else b[:n_rows].clone()
+        del b
+    return n_processed, tuple(buffers)
+
+def _yield_chunks(items:iter, chunk_size:int, key=None) -> iter:
+    # split iterable into lists of fixed size
+    # chunks are extended until the key of the items changes, e.g. the sentence
+    chunk = []
+    for item in items:
+        if (len(chunk) >= chunk_size) and ((key is None) or (key(item) is None) or (key(item) != key(chunk[-1]))):
+            yield chunk
+            chunk = []
+        chunk.append(item)
+    if len(chunk) > 0:
+        yield chunk
+
 
 class BaseDataset(torch.utils.data.TensorDataset):
-    """ Base Class for Datasets """
-
-    def __init__(self, train:bool, model:BaseModel, tokenizer:transformers.BertTokenizer, seq_length:int, data_base_dir:str, **kwargs):
-        
-        # list of all dataset items
-        data_items = [self.__class__.build_dataset_item(*feats, tokenizer) for feats in self.yield_item_features(train, data_base_dir)]
-        data_items = [model.build_feature_tensors(*item, seq_length=seq_length, **kwargs, tokenizer=tokenizer) for item in data_items if item is not None]
-        data_items = [item for item in data_items if item is not None]
-        # separate into item features
-        features = zip(*data_items)
+    """ Base Class for Datasets. Datasets whose features were built instead of loaded from 
+        the cache hold the number of items and seconds it took in build_stats.
+    """
+
+    # number of items and seconds it took to build the features
+    build_stats:tuple = None
+    # whether the first item feature is the text and build_dataset_item 
+    # accepts its token ids and spans as encoding argument
+    ENCODES_TEXT:bool = False
+
+    def __init__(self, train:bool, model:BaseModel, tokenizer:transformers.BertTokenizer, seq_length:int, data_base_dir:str, cache_dir:str =None, cache_items:bool =True, memory_map:bool =False, num_build_workers:int =0, **kwargs):
+
+        # memory-mapped features are served from the cache
+        if memory_map and (cache_dir is None):
+            raise ValueError("Memory-mapped features require a cache directory!")
+
+        # no caching
+        if cache_dir is None:
+            items = self.yield_item_features(train, data_base_dir)
+            tensors = self.build_features(items, model, tokenizer, seq_length, num_workers=num_build_workers, **kwargs)
+            torch.utils.data.TensorDataset.__init__(self, *tensors)
+            return
+
+        # build cache keys
+        cache = FeatureCache(cache_dir, cache_items=cache_items, memory_map=memory_map)
+        items_key = cache.items_key(self.__class__, train, data_base_dir)
+        features_key = cache.features_key(items_key, model, tokenizer, seq_length, kwargs)
+        # try to load feature tensors from cache
+        tensors = cache.load_features(self.__class__, train, items_key, features_key)
+        if tensors is None:
+            # try to load item features from cache
+            items = cache.load_items(self.__class__, train, items_key)
+            if items is None:
+                items = list(self.yield_item_features(train, data_base_dir))
+                cache.save_items(self.__class__, train, items_key, items)
+            # build and cache feature tensors
+            tensors = self.build_features(items, model, tokenizer, seq_length, num_workers=num_build_workers, **kwargs)
+            tensors = cache.save_features(self.__class__, train, items_key, features_key, tensors)
         # initialize dataset
-        torch.utils.data.TensorDataset.__init__(self, *(torch.cat(feat, dim=0) for feat in features))
+        torch.utils.data.TensorDataset.__init__(self, *tensors)
+
+    def build_features(self, items:iter, model:BaseModel, tokenizer:transformers.BertTokenizer, seq_length:int, num_workers:int =0, chunk_size:int =256, **kwargs) -> tuple:
+        """ Build the feature tensors of the dataset from the given item features.
+            With num_workers > 0 chunks of items are processed by a pool of worker processes.
+            Each worker receives the tokenizer and a weightless feature builder of the model once.
+        """
+        start_time = time.time()
+        n_items = len(items) if hasattr(items, '__len__') else None
+        # split items into chunks - items of the same sentence stay in the same chunk
+        chunks = _yield_chunks(items, chunk_size, key=self.__class__.sentence_key)
+
+        if num_workers > 0:
+            # process chunks in worker processes - imap keeps the order of the items
+            initargs = (self.__class__, model.feature_builder(), tokenizer, seq_length, kwargs)
+            with mp.Pool(num_workers, initializer=_init_feature_worker, initargs=initargs) as pool:
+                n_items, tensors = _concat_chunks(pool.imap(_build_feature_chunk_in_worker, chunks), n_items)
+        else:
+            # process chunks sequentially
+            n_items, tensors = _concat_chunks((build_feature_chunk(self.__class__, model, tokenizer, seq_length, kwargs, chunk) for chunk in chunks), n_items)
+
+        # save throughput
+        self.build_stats = (n_items, time.time() - start_time)
+        return tensors
+
+    @classmethod
+    def source_files(cls, data_base_dir:str) -> list:
+        """ List all source files the dataset reads from. Defaults to all
+            class attributes ending with _FILE. Used to invalidate cached features.
+        """
+        fnames = set()
+        for klass in cls.__mro__:
+            fnames.update(val for name, val in vars(klass).items() if name.endswith('_FILE') and isinstance(val, str))
+        return [os.path.join(data_base_dir, fname) for fname in sorted(fnames)]
+
+    @classmethod
+    def sentence_key(cls, feats:tuple):
+        """ Get the key of the sentence of item features. Consecutive items with equal keys
+            belong to the same sentence, are kept in the same chunk while building features and 
+            can be merged by the model (see BaseModel.group_dataset_items). Defaults to None, 
+            i.e. each item is a sentence of its own.
+        """
+        return None
+
+    @classmethod
+    def sentence_ids(cls, items:list) -> list:
+        """ Get the index of the sentence of each item in a list of item features """
+        ids, prev = [], None
+        for feats in items:
+            key = cls.sentence_key(feats)
+            ids.append(0 if len(ids) == 0 else ids[-1] + int((key is None) or (key != prev)))
+            prev = key
+        return ids
 
     @classmethod
     def build_dataset_item(cls, *feats, seq_length, tokenizer) -> tuple:
         raise NotImplementedError
 
+    @classmethod
+    def build_dataset_items(cls, items:list, tokenizer) -> list:
+        """ Build the dataset items of a list of item features. The texts of datasets that
+            encode their text (see ENCODES_TEXT) are tokenized in a single batch.
+        """
+        if not cls.ENCODES_TEXT:
+            return [cls.build_dataset_item(*feats, tokenizer) for feats in items]
+        # tokenize all texts at once
+        encodings = batch_encode_with_spans([feats[0] for feats in items], tokenizer)
+        return [cls.build_dataset_item(*feats, tokenizer, encoding=encoding) for feats, encoding in zip(items, encodings)]
+
     def yield_item_features(self, train:bool, data_base_dir:str):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
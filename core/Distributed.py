@@ -0,0 +1,107 @@
+import os
+import socket
+# import torch
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+
+""" Process Group Helpers """
+
+def is_distributed() -> bool:
+    """ Check if the current process is part of an initialized process group """
+    return dist.is_available() and dist.is_initialized()
+
+def get_rank() -> int:
+    return dist.get_rank() if is_distributed() else 0
+
+def get_world_size() -> int:
+    return dist.get_world_size() if is_distributed() else 1
+
+def all_reduce_sum(*values:float) -> tuple:
+    """ Sum the given values over all processes """
+    if not is_distributed():
+        return values
+    values = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(values, op=dist.ReduceOp.SUM)
+    return tuple(values.tolist())
+
+def gather(obj) -> list:
+    """ Gather a picklable object of each process on the main process.
+        Returns the objects of all processes on the main process and None on all others.
+    """
+    if not is_distributed():
+        return [obj]
+    objs = [None] * get_world_size() if get_rank() == 0 else None
+    dist.gather_object(obj, objs, dst=0)
+    return objs
+
+def broadcast(obj):
+    """ Send a picklable object from the main process to all other processes """
+    if not is_distributed():
+        return obj
+    objs = [obj]
+    dist.broadcast_object_list(objs, src=0)
+    return objs[0]
+
+
+""" Data Parallel Model """
+
+class PreprocessAndPredict(torch.nn.Module):
+    """ Exposes the preprocessing and forward pass of a model as forward function.
+        Wrapped in a DistributedDataParallel module, the whole forward pass runs through
+        the wrapper which synchronizes the gradients of all processes during backward.
+    """
+
+    def __init__(self, model:torch.nn.Module):
+        torch.nn.Module.__init__(self)
+        self.model = model
+
+    def forward(self, *batch, tokenizer, device) -> tuple:
+        return self.model.preprocess_and_predict(*batch, tokenizer=tokenizer, device=device)
+
+
+""" Launcher """
+
+def _free_port() -> int:
+    # let the os pick an unused port
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _run_process(rank:int, world_size:int, port:int, threads:int, fn, args:tuple) -> None:
+    # share the cores between all processes
+    torch.set_num_threads(threads)
+    # join process group
+    os.environ['MASTER_ADDR'], os.environ['MASTER_PORT'] = '127.0.0.1', str(port)
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    try:
+        fn(*args)
+    finally:
+        dist.destroy_process_group()
+
+def launch(fn, nprocs:int, *args, threads:int =None) -> None:
+    """ Run fn(*args) in nprocs processes on the local host which form a gloo process group.
+        Each process uses an equal share of the cores for intra-op parallelism unless the
+        number of threads per process is given. Processes started by torchrun already
+        hold the process group setup in their environment and only run fn themselves.
+    """
+    # started by torchrun
+    if ('RANK' in os.environ) and ('WORLD_SIZE' in os.environ):
+        if threads is not None:
+            torch.set_num_threads(threads)
+        dist.init_process_group('gloo')
+        try:
+            fn(*args)
+        finally:
+            dist.destroy_process_group()
+        return
+    # single process
+    if nprocs == 1:
+        if threads is not None:
+            torch.set_num_threads(threads)
+        fn(*args)
+        return
+    # spawn processes
+    threads = threads or max(os.cpu_count() // nprocs, 1)
+    mp.spawn(_run_process, args=(nprocs, _free_port(), threads, fn, args), nprocs=nprocs, join=True)
@@ -0,0 +1,174 @@
+import os
+import sys
+import shutil
+import pickle
+import hashlib
+import inspect
+# import torch
+import torch
+# import tensor store
+from .TensorStore import TensorStore
+
+
+""" Fingerprint Helpers """
+
+def file_checksum(fpath:str, chunk_size:int =1 << 20) -> str:
+    """ Compute the sha1 checksum of a file. Returns None if the file does not exist. """
+    # missing files are part of the fingerprint as well
+    if not os.path.isfile(fpath):
+        return None
+    # hash file content in chunks
+    sha = hashlib.sha1()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def source_checksum(cls:type) -> str:
+    """ Compute a checksum over the source code of all modules a class depends on.
+        This invalidates cached features whenever the processing code changes.
+    """
+    sha = hashlib.sha1()
+    # collect modules of class and all base classes
+    modules = sorted(set(klass.__module__ for klass in cls.__mro__))
+    for name in modules:
+        # builtin and third-party modules are identified by their name only
+        module = sys.modules.get(name, None)
+        try:
+            sha.update(inspect.getsource(module).encode('utf-8'))
+        except (TypeError, OSError):
+            sha.update(name.encode('utf-8'))
+    return sha.hexdigest()
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """ Compute a fingerprint of a tokenizer from its type, vocabulary and added tokens. """
+    sha = hashlib.sha1()
+    sha.update(tokenizer.__class__.__name__.encode('utf-8'))
+    # vocabulary including added tokens
+    for token, idx in sorted(tokenizer.get_vocab().items(), key=lambda t: t[1]):
+        sha.update(("%s:%i\n" % (token, idx)).encode('utf-8'))
+    # normalization settings change the tokenization as well
+    sha.update(repr(getattr(tokenizer, 'do_lower_case', None)).encode('utf-8'))
+    sha.update(repr(getattr(tokenizer, 'added_tokens_encoder', {})).encode('utf-8'))
+    return sha.hexdigest()
+
+
+""" Feature Cache """
+
+class FeatureCache(object):
+    """ Persistent on-disk cache for datasets. Holds two tiers:
+            - items: the tokenizer-independent item features yielded by the dataset
+            - features: the final feature tensors built by the model
+        Feature tensors are either saved as torch files and loaded into memory or
+        saved as a sharded tensor store that is memory-mapped when loaded.
+        Entries are keyed by fingerprints of all their inputs and invalidated
+        automatically whenever one of the inputs changes.
+    """
+
+    # increase to invalidate all caches written by previous versions
+    VERSION = 1
+
+    def __init__(self, cache_dir:str, cache_items:bool =True, memory_map:bool =False, shard_size:int =65536):
+        # save values
+        self.cache_dir = cache_dir
+        self.cache_items = cache_items
+        self.memory_map = memory_map
+        self.shard_size = shard_size
+
+    def items_key(self, dataset_type:type, train:bool, data_base_dir:str) -> str:
+        """ Build the key for the item features of a dataset split """
+        sha = hashlib.sha1()
+        sha.update(("%i-%s.%s-%s" % (FeatureCache.VERSION, dataset_type.__module__, dataset_type.__qualname__, train)).encode('utf-8'))
+        sha.update(source_checksum(dataset_type).encode('utf-8'))
+        # checksums of all source files
+        for fpath in dataset_type.source_files(data_base_dir):
+            sha.update(("%s:%s\n" % (os.path.basename(fpath), file_checksum(fpath))).encode('utf-8'))
+        return sha.hexdigest()[:16]
+
+    def features_key(self, items_key:str, model, tokenizer, seq_length:int, kwargs:dict) -> str:
+        """ Build the key for the feature tensors built from the items with the given key """
+        model_type = model.__class__
+        sha = hashlib.sha1()
+        sha.update(items_key.encode('utf-8'))
+        # model type and mode (some models build features depending on the mode)
+        sha.update(("%s.%s-%s" % (model_type.__module__, model_type.__qualname__, model.training)).encode('utf-8'))
+        sha.update(source_checksum(model_type).encode('utf-8'))
+        # tokenizer, sequence length and additional arguments
+        sha.update(tokenizer_fingerprint(tokenizer).encode('utf-8'))
+        sha.update(("%s-%r" % (seq_length, sorted(kwargs.items()))).encode('utf-8'))
+        return sha.hexdigest()[:16]
+
+    def _dataset_dir(self, dataset_type:type) -> str:
+        # dataset types of different tasks may share their name
+        return os.path.join(self.cache_dir, "%s.%s" % (dataset_type.__module__, dataset_type.__qualname__))
+
+    def _path(self, dataset_type:type, train:bool, *keys) -> str:
+        # build path to cache file of a dataset split
+        split = 'train' if train else 'test'
+        return os.path.join(self._dataset_dir(dataset_type), '-'.join((split,) + keys))
+
+    def _invalidate(self, dataset_type:type, train:bool, items_key:str) -> None:
+        # remove all entries of the split that were built from different items
+        dpath = self._dataset_dir(dataset_type)
+        split = 'train' if train else 'test'
+        for fname in os.listdir(dpath):
+            if fname.startswith(split + '-') and (items_key not in fname):
+                fpath = os.path.join(dpath, fname)
+                # tensor stores are directories
+                if os.path.isdir(fpath):
+                    shutil.rmtree(fpath)
+                else:
+                    os.remove(fpath)
+
+    def _write(self, fpath:str, save_fn) -> None:
+        # write to temporary file and move it to make writes atomic
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        tmp_fpath = "%s.%i.tmp" % (fpath, os.getpid())
+        save_fn(tmp_fpath)
+        os.replace(tmp_fpath, fpath)
+
+    def load_items(self, dataset_type:type, train:bool, items_key:str) -> list:
+        """ Load the item features from cache. Returns None on cache miss. """
+        fpath = self._path(dataset_type, train, items_key, 'items.pkl')
+        if (not self.cache_items) or (not os.path.isfile(fpath)):
+            return None
+        with open(fpath, 'rb') as f:
+            return pickle.load(f)
+
+    def save_items(self, dataset_type:type, train:bool, items_key:str, items:list) -> None:
+        """ Save the item features of a dataset split """
+        if not self.cache_items:
+            return
+        # write items and remove outdated entries
+        def save_fn(fpath):
+            with open(fpath, 'wb') as f:
+                pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._write(self._path(dataset_type, train, items_key, 'items.pkl'), save_fn)
+        self._invalidate(dataset_type, train, items_key)
+
+    def load_features(self, dataset_type:type, train:bool, items_key:str, features_key:str) -> tuple:
+        """ Load the feature tensors from cache. Returns None on cache miss. """
+        # open memory-mapped tensor store
+        if self.memory_map:
+            store_dir = self._path(dataset_type, train, items_key, features_key + '.store')
+            return TensorStore(store_dir).open() if TensorStore.exists(store_dir) else None
+        # load tensors into memory
+        fpath = self._path(dataset_type, train, items_key, features_key + '.pt')
+        if not os.path.isfile(fpath):
+            return None
+        return tuple(torch.load(fpath, weights_only=True))
+
+    def save_features(self, dataset_type:type, train:bool, items_key:str, features_key:str, tensors:tuple) -> tuple:
+        """ Save the feature tensors of a dataset split.
+            Returns the tensors to use from now on, which are memory-mapped when using a tensor store.
+        """
+        if self.memory_map:
+            # write tensor store and open it
+            store_dir = self._path(dataset_type, train, items_key, features_key + '.store')
+            os.makedirs(os.path.dirname(store_dir), exist_ok=True)
+            tensors = TensorStore.write(store_dir, tensors, shard_size=self.shard_size).open()
+        else:
+            self._write(self._path(dataset_type, train, items_key, features_key + '.pt'), lambda fpath: torch.save(tuple(tensors), fpath))
+        # remove outdated entries
+        self._invalidate(dataset_type, train, items_key)
+        return tensors
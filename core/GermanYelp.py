@@ -0,0 +1,84 @@
+import os
+# import numpy and pandas
+import numpy as np
+import pandas as pd
+
+
+""" Span Parsing Helpers """
+
+def parse_spans(spans:pd.Series) -> list:
+    """ Parse a series of span strings of the form "(begin, end)" to tuples of integers.
+        Missing or malformed spans are converted to None.
+    """
+    # extract begin and end of all spans at once
+    parts = spans.str.extract(r'^\s*[\(\[]\s*(\d+)\s*,\s*(\d+)\s*[\)\]]\s*$')
+    valid = (parts[0].notna() & parts[1].notna()).values
+    begins = parts[0].fillna(-1).astype(np.int64).values
+    ends = parts[1].fillna(-1).astype(np.int64).values
+    # build tuples
+    return [(int(b), int(e)) if v else None for b, e, v in zip(begins, ends, valid)]
+
+
+""" GermanYelp Corpus """
+
+class GermanYelp(object):
+    """ In-memory GermanYelp corpus shared by all GermanYelp datasets of all tasks.
+        The annotations are parsed once and indexed by sentence.
+    """
+
+    ANNOTATIONS_FILE = "GermanYelp/annotations.csv"
+    SENTENCES_FILE = "GermanYelp/sentences.txt"
+
+    # loaded corpora by data directory and file modification times
+    __corpora = {}
+
+    def __init__(self, data_base_dir:str):
+        # load sentences
+        with open(os.path.join(data_base_dir, GermanYelp.SENTENCES_FILE), 'r', encoding='utf-8') as f:
+            self.sentences = f.read().split('\n')[:-1]
+        # load annotations with typed columns
+        annotations = pd.read_csv(
+            os.path.join(data_base_dir, GermanYelp.ANNOTATIONS_FILE),
+            sep="\t", index_col=0,
+            dtype={'SentenceID': np.int64, 'Aspect': str, 'Opinion': str, 'Sentiment': str}
+        )
+        # parse spans and sentiments
+        sent_ids = annotations['SentenceID'].values.tolist()
+        aspects = parse_spans(annotations['Aspect'])
+        opinions = parse_spans(annotations['Opinion'])
+        sentiments = [s if isinstance(s, str) else None for s in annotations['Sentiment'].values]
+        # list of all annotations (sentence-id, aspect, opinion, sentiment) in order of the file
+        self.annotations = list(zip(sent_ids, aspects, opinions, sentiments))
+
+        # index annotations by sentence
+        # sentence ids are kept in order of their first occurrence
+        self.index = {}
+        for annotation in self.annotations:
+            self.index.setdefault(annotation[0], []).append(annotation)
+
+    @property
+    def sentence_ids(self) -> list:
+        """ Ids of all annotated sentences in order of their first occurrence """
+        return list(self.index.keys())
+
+    @property
+    def relations(self) -> list:
+        """ All complete annotations, i.e. annotations with aspect, opinion and sentiment """
+        return [a for a in self.annotations if all(v is not None for v in a[1:])]
+
+    def sentence_annotations(self, sent_id:int) -> list:
+        """ Get all annotations of a sentence """
+        return self.index.get(sent_id, [])
+
+    @staticmethod
+    def load(data_base_dir:str) -> "GermanYelp":
+        """ Load the corpus from the given data directory. Corpora are cached in
+            memory and only reloaded when one of the source files changes.
+        """
+        # build key from path and modification times
+        fpaths = [os.path.join(data_base_dir, fname) for fname in (GermanYelp.ANNOTATIONS_FILE, GermanYelp.SENTENCES_FILE)]
+        key = tuple((os.path.abspath(fpath), os.path.getmtime(fpath)) for fpath in fpaths)
+        # load corpus
+        if key not in GermanYelp.__corpora:
+            GermanYelp.__corpora[key] = GermanYelp(data_base_dir)
+        return GermanYelp.__corpora[key]
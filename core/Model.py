@@ -4,8 +4,20 @@ import transformers
 class BaseModel(transformers.PreTrainedModel):
     """ Base Class for Models """
 
-    # tokenizer type
+    # tokenizer type and its fast counterpart
     TOKENIZER_TYPE:type = transformers.BertTokenizer
+    FAST_TOKENIZER_TYPE:type = transformers.BertTokenizerFast
+    # indices of the feature tensors that are padded along the sequence dimension
+    # the first one must hold the token ids and is used to find the sequence lengths
+    SEQUENCE_FEATURES:tuple = (0,)
+    # indices of the model outputs (without loss) that are padded along the sequence dimension
+    SEQUENCE_OUTPUTS:tuple = ()
+    # index of the feature tensor holding the labels, ignored labels are negative
+    LABEL_FEATURE:int = -1
+    # file of the weights stored in bf16 next to the full precision weights
+    BF16_WEIGHTS_NAME:str = "pytorch_model.bf16.bin"
+    # file of the full precision weights saved by newer versions of transformers
+    SAFE_WEIGHTS_NAME:str = "model.safetensors"
 
     def build_feature_tensors(self, *item, seq_length:int, tokenizer:transformers.PreTrainedTokenizer) -> tuple:
         """ Build the feature tensors from a given data item. 
@@ -13,6 +25,44 @@ class BaseModel(transformers.PreTrainedModel):
         """
         raise NotImplementedError()
 
+    def group_dataset_items(self, items:list, sentence_ids:list) -> list:
+        """ Merge dataset items that are processed as a single example, e.g. all items of 
+            the same sentence. Receives consecutive dataset items and the index of the sentence 
+            of each item (see BaseDataset.sentence_key) and returns the merged items passed to 
+            build_feature_tensors. Defaults to one example per dataset item.
+        """
+        return items
+
+    @classmethod
+    def weightless(cls, config:transformers.PretrainedConfig) -> "BaseModel":
+        """ Create an instance of the model from its configuration without initializing any parameters.
+            It only provides the functions that do not depend on the weights, e.g. building features.
+        """
+        model = cls.__new__(cls)
+        torch.nn.Module.__init__(model)
+        model.config = config
+        return model
+
+    def feature_builder(self) -> "BaseModel":
+        """ Create a weightless instance of the model that only provides the build_feature_tensors function.
+            It is cheap to send to worker processes. Models whose feature building depends on 
+            more than the configuration and training mode need to override this.
+        """
+        # copy configuration and training mode
+        builder = self.__class__.weightless(self.config)
+        builder.training = self.training
+        return builder
+
+    def set_gradient_checkpointing(self, enabled:bool =True) -> None:
+        """ Enable or disable activation checkpointing of the encoder layers, i.e. their activations
+            are recomputed during the backward pass instead of being kept in memory.
+        """
+        # newer versions of transformers switch checkpointing on the modules
+        if hasattr(self, 'gradient_checkpointing_enable'):
+            self.gradient_checkpointing_enable() if enabled else self.gradient_checkpointing_disable()
+        # older versions read the flag from the configuration shared with the encoder
+        self.config.gradient_checkpointing = enabled
+
     def prepare(self, dataset, tokenizer) -> None:
         """ Prepare the model for the dataset """
         return None
@@ -0,0 +1,137 @@
+# import torch and numpy
+import torch
+import numpy as np
+# import base predictor
+from .Predictor import BasePredictor, TokenizationContext
+
+
+class Pipeline(object):
+    """ Multi-task pipeline that extracts aspects and opinions from sentences, classifies the
+        extracted entities and links aspects to opinions. Spans are passed between the stages as
+        character spans and each stage is batched over all sentences of a document. Stages whose
+        models are built on the same encoder checkpoint share the identical parts of the encoder,
+        and stages with the same vocabulary share the tokenization of the sentences.
+    """
+
+    def __init__(self, 
+        extractor:BasePredictor, 
+        classifier:BasePredictor =None, 
+        linker:BasePredictor =None, 
+        classify:str ='aspects',
+        share_encoder:bool =True
+    ):
+        # check entities to classify
+        if classify not in ('aspects', 'opinions'):
+            raise ValueError("Can only classify aspects or opinions, got %s!" % classify)
+        # save stages
+        self.extractor = extractor
+        self.classifier = classifier
+        self.linker = linker
+        self.classify = classify
+        self.stages = [p for p in (extractor, classifier, linker) if p is not None]
+        # share encoder between stages
+        self.shared_modules = Pipeline.share_encoders([p.model for p in self.stages]) if share_encoder else []
+
+    @staticmethod
+    def same_value(a, b) -> bool:
+        """ Check if two state values are identical. Besides tensors, the state of 
+            quantized layers holds tuples of tensors and plain values like dtypes.
+        """
+        if isinstance(a, torch.Tensor) and isinstance(b, torch.Tensor):
+            return (a.shape == b.shape) and (a.dtype == b.dtype) and torch.equal(a, b)
+        if isinstance(a, tuple) and isinstance(b, tuple):
+            return (len(a) == len(b)) and all(map(Pipeline.same_value, a, b))
+        return (type(a) is type(b)) and (a == b)
+
+    @staticmethod
+    def same_weights(module_a:torch.nn.Module, module_b:torch.nn.Module) -> bool:
+        """ Check if two modules hold identical weights """
+        state_a, state_b = module_a.state_dict(), module_b.state_dict()
+        if state_a.keys() != state_b.keys():
+            return False
+        return all(Pipeline.same_value(state_a[k], state_b[k]) for k in state_a)
+
+    @staticmethod
+    def share_encoders(models:list) -> list:
+        """ Replace the submodules of the encoders of all models by the submodules of the first 
+            model's encoder if they hold identical weights, e.g. the transformer layers of models 
+            built on the same checkpoint. Parts that differ, like resized token embeddings, are 
+            kept. Returns the names of the shared submodules.
+        """
+        if len(models) < 2:
+            return []
+        encoders = [model.base_model for model in models]
+        shared = []
+        for name, module in encoders[0].named_children():
+            others = [getattr(encoder, name, None) for encoder in encoders[1:]]
+            if all((other is not None) and Pipeline.same_weights(module, other) for other in others):
+                # replace submodule by the one of the first encoder
+                for encoder in encoders[1:]:
+                    setattr(encoder, name, module)
+                shared.append(name)
+        return shared
+
+    @staticmethod
+    def same_vocab(tokenizer_a, tokenizer_b) -> bool:
+        """ Check if two tokenizers split texts into the same tokens """
+        return (tokenizer_a.vocab == tokenizer_b.vocab) and (getattr(tokenizer_a, 'do_lower_case', None) == getattr(tokenizer_b, 'do_lower_case', None))
+
+    def context_for(self, predictor:BasePredictor, context:TokenizationContext) -> TokenizationContext:
+        # reuse the tokenization of the extractor if vocabularies match
+        return context if Pipeline.same_vocab(self.extractor.tokenizer, predictor.tokenizer) else None
+
+    def predict_document(self, sentences:list, batch_size:int =32) -> list:
+        """ Run all stages on the sentences of a document. Returns a dictionary for each sentence 
+            holding the aspects, opinions and relations. Each aspect and opinion is given by its 
+            character span and term. Classified entities hold their label and relations refer to 
+            their aspect and opinion by index.
+        """
+        # tokenize all sentences once
+        context = TokenizationContext(sentences, self.extractor.tokenizer)
+
+        # extract aspect and opinion spans
+        spans = self.extractor.predict_spans_batch(sentences, batch_size=batch_size, context=context)
+        results = [
+            {
+                'text': text,
+                'aspects': [{'span': span, 'term': text[span[0]:span[1]]} for span in aspect_spans],
+                'opinions': [{'span': span, 'term': text[span[0]:span[1]]} for span in opinion_spans],
+                'relations': []
+            }
+            for text, (aspect_spans, opinion_spans) in zip(sentences, spans)
+        ]
+
+        # classify entities of all sentences at once
+        if self.classifier is not None:
+            # build one input per sentence with entities
+            entities = [sorted(result[self.classify], key=lambda e: e['span']) for result in results]
+            idx = [i for i, ents in enumerate(entities) if len(ents) > 0]
+            inputs = [{'text': sentences[i], 'entity_spans': [e['span'] for e in entities[i]]} for i in idx]
+            labels = self.classifier.predict_batch(inputs, batch_size=batch_size, context=self.context_for(self.classifier, context))
+            for i, sent_labels in zip(idx, labels):
+                sent_labels = np.asarray(sent_labels).reshape(-1).tolist() if sent_labels is not None else []
+                # entities that could not be classified keep no label
+                for k, entity in enumerate(entities[i]):
+                    entity['label'] = sent_labels[k] if k < len(sent_labels) else None
+
+        # link all aspect opinion pairs of all sentences at once
+        if self.linker is not None:
+            # build one input per sentence holding all its aspect opinion pairs
+            pairs = [[(a, o) for a in range(len(result['aspects'])) for o in range(len(result['opinions']))] for result in results]
+            idx = [i for i, sent_pairs in enumerate(pairs) if len(sent_pairs) > 0]
+            inputs = [
+                {
+                    'text': sentences[i], 
+                    'entity_spans_A': [results[i]['aspects'][a]['span'] for a, _ in pairs[i]], 
+                    'entity_spans_B': [results[i]['opinions'][o]['span'] for _, o in pairs[i]]
+                }
+                for i in idx
+            ]
+            labels = self.linker.predict_batch(inputs, batch_size=batch_size, context=self.context_for(self.linker, context))
+            for i, sent_labels in zip(idx, labels):
+                sent_labels = sent_labels if sent_labels is not None else [None] * len(pairs[i])
+                for (a, o), label in zip(pairs[i], sent_labels):
+                    results[i]['relations'].append({'aspect': a, 'opinion': o, 'label': label})
+
+        # return
+        return results
@@ -1,8 +1,43 @@
-# import torch
+import os
+import json
+import time
+import inspect
+import contextlib
+from itertools import chain
+# import torch and transformers
 import torch
+import transformers
 # import base model and dataset
 from .Model import BaseModel
 from .Dataset import BaseDataset
+# import batching helpers
+from .Batching import sequence_lengths
+# import result cache and torchscript model
+from .ResultCache import ResultCache
+from .TorchScript import TorchScriptModel
+# import utils
+from .utils import batch_encode_with_spans, pad_sequences
+
+
+class TokenizationContext(object):
+    """ Tokenization of all texts of a single request. Each distinct text is tokenized once
+        and its token ids and token spans are shared by item building and postprocessing.
+    """
+
+    def __init__(self, texts:list, tokenizer):
+        self.encodings = {}
+        self.extend(texts, tokenizer)
+
+    def extend(self, texts:list, tokenizer) -> None:
+        """ Tokenize all texts that are not yet part of the context """
+        # tokenize all distinct new texts at once
+        texts = [text for text in dict.fromkeys(texts) if text not in self.encodings]
+        self.encodings.update(zip(texts, batch_encode_with_spans(texts, tokenizer)))
+
+    def __getitem__(self, text:str) -> tuple:
+        # copy token ids as item building may modify them
+        token_ids, token_spans = self.encodings[text]
+        return list(token_ids), token_spans
 
 
 class BasePredictor(object):
@@ -11,6 +46,15 @@ class BasePredictor(object):
     # base model and dataset types
     BASE_MODEL_TYPE = BaseModel
     BASE_DATASET_TYPE = BaseDataset
+    # supported precisions of the model
+    PRECISIONS = ('fp32', 'bf16', 'dynamic-int8')
+    # file holding the dynamically quantized weights in a dump directory
+    QUANTIZED_WEIGHTS_FILE = "pytorch_model.dynamic-int8.bin"
+    # example inputs used to trace the model
+    EXAMPLE_INPUTS:list = []
+    # share cached results between texts only differing in their whitespace characters,
+    # only valid if results do not hold parts of the text
+    NORMALIZE_CACHE_KEYS = True
 
     def __init__(self,
         # model and tokenizer
@@ -18,37 +62,378 @@ class BasePredictor(object):
         pretrained_name:str =None,
         model_kwargs:dict ={},
         device:str ='cpu',
+        fast_tokenizer:bool =False,
+        precision:str ='fp32',
+        torchscript:bool =False,
         # dataset
-        dataset_type:type =None
+        dataset_type:type =None,
+        # result cache
+        cache_size:int =0,
+        cache_path:str =None
     ):
         # save values
         self.device = device
         self.pretrained_name = pretrained_name
         # create tokenizer
-        self.tokenizer = model_type.TOKENIZER_TYPE.from_pretrained(pretrained_name)
+        tokenizer_type = model_type.FAST_TOKENIZER_TYPE if fast_tokenizer else model_type.TOKENIZER_TYPE
+        self.tokenizer = tokenizer_type.from_pretrained(BasePredictor.tokenizer_name(tokenizer_type, pretrained_name))
         # check model type
         if not issubclass(model_type, self.__class__.BASE_MODEL_TYPE):
             raise ValueError("Model Type %s must inherit %s!" % (model_type.__name__, self.__class__.BASE_MODEL_TYPE.__name__))
+        # check precision
+        if precision not in BasePredictor.PRECISIONS:
+            raise ValueError("Precision %s must be one of %s!" % (precision, ', '.join(BasePredictor.PRECISIONS)))
+        if (precision == 'dynamic-int8') and (torch.device(device).type != 'cpu'):
+            raise ValueError("Precision %s is only supported on cpu!" % precision)
+        self.precision = precision
         # create model
-        self.model = model_type.from_pretrained(pretrained_name, **model_kwargs).to(device)
-        self.model.resize_token_embeddings(len(self.tokenizer))
+        self.scripted = None
+        if torchscript:
+            # the traced graphs replace the forward pass of the model, the model only builds the features
+            # tokenization and feature building are defined by the task's model, dataset and tokenizer
+            # types and thus still require transformers
+            self.scripted = TorchScriptModel(BasePredictor.torchscript_dir(pretrained_name, precision), device=device)
+            self.model = model_type.weightless(model_type.config_class.from_pretrained(pretrained_name, **model_kwargs))
+        elif precision == 'dynamic-int8':
+            self.model = self.load_quantized_model(model_type, pretrained_name, model_kwargs)
+        else:
+            self.model = self.load_model(model_type, pretrained_name, model_kwargs).to(device)
         self.model.eval()
+        # labels the model was trained with
+        self.labels = BasePredictor.config_labels(self.model.config)
         # check dataset type
         if not issubclass(dataset_type, self.__class__.BASE_DATASET_TYPE):
             raise ValueError("Dataset Type %s must inherit %s!" % (dataset_type.__name__, self.__class__.BASE_DATASET_TYPE.__name__))
         self.dataset_type = dataset_type
 
+        # create result cache
+        # results are only valid for the same model, weights and dataset labels
+        self.cache = None
+        if (cache_size > 0) or (cache_path is not None):
+            identity = BasePredictor.dump_identity(pretrained_name)
+            namespace = "%s-%s-%s-%s-%s%s" % (self.__class__.__name__, model_type.__name__, identity, dataset_type.__name__, precision, "-torchscript" if torchscript else "")
+            self.cache = ResultCache(namespace, max_size=cache_size, db_path=cache_path, normalize_texts=self.__class__.NORMALIZE_CACHE_KEYS)
+
+    @staticmethod
+    def tokenizer_name(tokenizer_type:type, pretrained_name:str) -> str:
+        """ Get the name or directory to load the tokenizer from. Dump directories hold the tokenizer
+            including all added tokens. Older dumps without tokenizer fall back to the tokenizer of
+            the pretrained model the trainer started from.
+        """
+        trainer_fpath = os.path.join(pretrained_name, "trainer.json")
+        if not os.path.isfile(trainer_fpath):
+            return pretrained_name
+        if any(os.path.isfile(os.path.join(pretrained_name, fname)) for fname in tokenizer_type.vocab_files_names.values()):
+            return pretrained_name
+        with open(trainer_fpath, 'r') as f:
+            return json.loads(f.read())['pretrained-name']
+
+    @staticmethod
+    def dump_identity(pretrained_name:str) -> str:
+        """ Identify a local dump by its path and the time its configuration and weights were last
+            written. Files derived from the weights, e.g. quantized weights and traced graphs, are 
+            written into the dump by predictors and must not change its identity.
+        """
+        if not os.path.isdir(pretrained_name):
+            return pretrained_name
+        fnames = (transformers.CONFIG_NAME, transformers.WEIGHTS_NAME, BaseModel.SAFE_WEIGHTS_NAME, BaseModel.BF16_WEIGHTS_NAME)
+        fpaths = [os.path.join(pretrained_name, fname) for fname in fnames]
+        mtime = max((os.path.getmtime(fpath) for fpath in fpaths if os.path.isfile(fpath)), default=0)
+        return "%s@%f" % (os.path.abspath(pretrained_name), mtime)
+
+    @staticmethod
+    def config_labels(config:transformers.PretrainedConfig) -> list:
+        """ Get the labels packaged in the configuration of a trained model. Returns None if 
+            the configuration only holds the default label names.
+        """
+        id2label = getattr(config, 'id2label', None) or {}
+        labels = [id2label[i] for i in range(len(id2label))]
+        return None if all(label == "LABEL_%i" % i for i, label in enumerate(labels)) else labels
+
+    @staticmethod
+    def weights_file(pretrained_name:str) -> str:
+        """ Get the file of the full precision weights of a dump directory. Newer versions of
+            transformers save the weights in the safetensors format. Returns None if there is
+            no such file, e.g. if the pretrained name is not a directory.
+        """
+        for fname in (BaseModel.SAFE_WEIGHTS_NAME, transformers.WEIGHTS_NAME):
+            fpath = os.path.join(pretrained_name, fname)
+            if os.path.isfile(fpath):
+                return fpath
+        return None
+
+    @staticmethod
+    def load_weights(fpath:str) -> dict:
+        """ Load the memory-mapped state dict of a weights file """
+        if fpath.endswith(".safetensors"):
+            # installed with all versions of transformers saving safetensors
+            from safetensors.torch import load_file
+            return load_file(fpath, device='cpu')
+        return torch.load(fpath, map_location='cpu', mmap=True, weights_only=True)
+
+    @staticmethod
+    def materialize_buffers(model:BaseModel) -> bool:
+        """ Initialize the buffers of a model created on the meta device that are not saved with
+            the weights, i.e. the position and token type ids of the embeddings. Returns whether 
+            all tensors of the model are initialized.
+        """
+        for module in model.modules():
+            for name, buf in list(module.named_buffers(recurse=False)):
+                if buf.is_meta and (name == 'position_ids'):
+                    setattr(module, name, torch.arange(buf.size(-1), dtype=buf.dtype).expand(buf.shape))
+                elif buf.is_meta and (name == 'token_type_ids'):
+                    setattr(module, name, torch.zeros(buf.shape, dtype=buf.dtype))
+        return not any(t.is_meta for t in chain(model.parameters(), model.buffers()))
+
+    def load_model(self, model_type:type, pretrained_name:str, model_kwargs:dict) -> BaseModel:
+        """ Load the model. Models of dump directories are created without initializing any parameters
+            and their weights are memory-mapped from the dump instead of being copied. For bf16 precision, 
+            weights stored in bf16 by the trainer are preferred and kept in bf16.
+        """
+        start_time = time.time()
+        weights_fpath = BasePredictor.weights_file(pretrained_name)
+        if weights_fpath is not None:
+            bf16_fpath = os.path.join(pretrained_name, BaseModel.BF16_WEIGHTS_NAME)
+            if (self.precision == 'bf16') and os.path.isfile(bf16_fpath):
+                weights_fpath = bf16_fpath
+            # create model without allocating its parameters
+            config = model_type.config_class.from_pretrained(pretrained_name, **model_kwargs)
+            with torch.device('meta'):
+                model = model_type(config)
+            # use the memory-mapped weights as parameters
+            model.load_state_dict(BasePredictor.load_weights(weights_fpath), strict=False, assign=True)
+            model.tie_weights()
+            # only use the model if the weights cover all its tensors
+            if BasePredictor.materialize_buffers(model):
+                if model.get_input_embeddings().num_embeddings != len(self.tokenizer):
+                    model.resize_token_embeddings(len(self.tokenizer))
+                print("Loaded %s from memory-mapped %s in %.2fs" % (model_type.__name__, weights_fpath, time.time() - start_time))
+                return model
+        # load model from pretrained weights
+        model = model_type.from_pretrained(pretrained_name, **model_kwargs)
+        model.resize_token_embeddings(len(self.tokenizer))
+        print("Loaded %s from pretrained %s in %.2fs" % (model_type.__name__, pretrained_name, time.time() - start_time))
+        return model
+
+    @staticmethod
+    def quantize(model:BaseModel) -> BaseModel:
+        """ Dynamically quantize all linear layers of a model to int8, i.e. the linear layers of
+            the encoder as well as of all task-specific heads. Weights are stored in int8 and
+            activations are quantized on the fly.
+        """
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    @staticmethod
+    def quantized_skeleton(model:BaseModel) -> BaseModel:
+        """ Replace all linear layers of a model created on the meta device by dynamically quantized 
+            linear layers as created by quantize, without quantizing any weights. The quantized 
+            weights are loaded into the model afterwards.
+        """
+        for module in list(model.modules()):
+            for name, child in list(module.named_children()):
+                if type(child) is torch.nn.Linear:
+                    setattr(module, name, torch.ao.nn.quantized.dynamic.Linear(child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8))
+        return model
+
+    def load_quantized_model(self, model_type:type, pretrained_name:str, model_kwargs:dict) -> BaseModel:
+        """ Create the dynamically quantized model. If the pretrained model is a dump directory
+            the quantized weights are stored next to the full precision weights and loaded
+            directly as long as they are more recent than the full precision weights.
+        """
+        start_time = time.time()
+        fpath = os.path.join(pretrained_name, BasePredictor.QUANTIZED_WEIGHTS_FILE)
+        weights_fpath = BasePredictor.weights_file(pretrained_name)
+        if (weights_fpath is not None) and os.path.isfile(fpath) and (os.path.getmtime(fpath) >= os.path.getmtime(weights_fpath)):
+            # create the quantized model without allocating its parameters
+            config = model_type.config_class.from_pretrained(pretrained_name, **model_kwargs)
+            with torch.device('meta'):
+                model = model_type(config)
+                model.resize_token_embeddings(len(self.tokenizer))
+            model = BasePredictor.quantized_skeleton(model)
+            # use the memory-mapped weights as parameters
+            model.load_state_dict(torch.load(fpath, map_location='cpu', mmap=True, weights_only=True), strict=False, assign=True)
+            if BasePredictor.materialize_buffers(model):
+                print("Loaded %s from memory-mapped %s in %.2fs" % (model_type.__name__, fpath, time.time() - start_time))
+                return model
+        # load full precision model and quantize it
+        model = self.load_model(model_type, pretrained_name, model_kwargs)
+        model = BasePredictor.quantize(model.eval())
+        # save quantized weights in dump directory
+        if os.path.isdir(pretrained_name) and os.access(pretrained_name, os.W_OK):
+            torch.save(model.state_dict(), fpath)
+        return model
+
+    @staticmethod
+    def torchscript_dir(dump_dir:str, precision:str ='fp32') -> str:
+        """ Directory of the traced graphs of a model in the given precision within its dump directory """
+        return os.path.join(dump_dir, "torchscript-%s" % precision)
+
+    def export_torchscript(self, buckets:list, inputs:list =None) -> str:
+        """ Trace the model to TorchScript for the given padded sequence lengths and save the graphs
+            in the dump directory the model was loaded from. The model is traced on the given inputs
+            which default to the example inputs of the predictor. Returns the export directory.
+        """
+        if self.scripted is not None:
+            raise RuntimeError("Model is already traced!")
+        if self.precision == 'bf16':
+            raise ValueError("Precision %s cannot be exported to TorchScript!" % self.precision)
+        if not os.path.isdir(self.pretrained_name):
+            raise ValueError("Traced graphs are saved with the dump directory of a model but got %s!" % self.pretrained_name)
+        # build features of all inputs
+        inputs = [BasePredictor.input_args(inp) for inp in (inputs or self.__class__.EXAMPLE_INPUTS)]
+        features = [self.build_features(*args, **kwargs) for args, kwargs in inputs]
+        # trace and save
+        export_dir = BasePredictor.torchscript_dir(self.pretrained_name, self.precision)
+        TorchScriptModel.export(self.model, self.tokenizer, [f for f in features if f is not None], buckets, export_dir, device=self.device)
+        return export_dir
+
+    def forward_features(self, *tensors) -> tuple:
+        """ Run the model or its traced graphs on a batch of feature tensors. Returns the model outputs. """
+        if self.scripted is not None:
+            return self.scripted(*tensors)
+        with self.autocast():
+            outputs, _ = self.model.preprocess_and_predict(*tensors, tokenizer=self.tokenizer, device=self.device)
+        return outputs
+
+    def autocast(self):
+        """ Context manager to run the model in the precision of the predictor """
+        if self.precision == 'bf16':
+            return torch.autocast(torch.device(self.device).type, dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
     def __call__(self, *args, **kwargs):
         # forward to prediction
         return self.predict(*args, **kwargs)
 
-    @torch.no_grad()
     def predict(self, text, *args, **kwargs):
-        # build and prepare item
-        item = self.dataset_type.build_dataset_item(text, *args, **kwargs, tokenizer=self.tokenizer)
-        item = self.model.build_feature_tensors(*item, tokenizer=self.tokenizer)
-        # predict and postprocess
-        outputs, _ = self.model.preprocess_and_predict(*item, tokenizer=self.tokenizer, device=self.device)
+        return self.predict_batch([self.build_input(text, *args, **kwargs)], batch_size=1)[0]
+
+    def build_input(self, text, *args, **kwargs) -> dict:
+        """ Build a single input for predict_batch from the arguments of a predict call """
+        # bind arguments by name
+        return dict(inspect.signature(self.dataset_type.build_dataset_item).bind_partial(text, *args, **kwargs).arguments)
+
+    @staticmethod
+    def input_args(inp) -> tuple:
+        """ Get the positional and keyword arguments of an input. Inputs are either a text,
+            a tuple of positional arguments or a dictionary of keyword arguments.
+        """
+        if isinstance(inp, str):
+            return (inp,), {}
+        if isinstance(inp, dict):
+            return (), inp
+        return tuple(inp), {}
+
+    @staticmethod
+    def input_text(args:tuple, kwargs:dict) -> str:
+        """ Get the text of an input """
+        return args[0] if len(args) > 0 else kwargs['text']
+
+    def build_features(self, *args, encoding:tuple =None, **kwargs) -> tuple:
+        """ Build the feature tensors of a single input. The encoding of the 
+            text is taken from the tokenization context if given.
+        """
+        item = self.dataset_type.build_dataset_item(*args, **kwargs, tokenizer=self.tokenizer, encoding=encoding)
+        if item is None:
+            return None
+        item = self.model.group_dataset_items([item], [0])[0]
+        return self.model.build_feature_tensors(*item, tokenizer=self.tokenizer)
+
+    def predict_batch(self, inputs:list, batch_size:int =32, context:TokenizationContext =None) -> list:
+        """ Predict on multiple inputs at once. Each input holds the arguments of a single
+            predict call (see input_args). Returns the results in the order of the inputs.
+            Inputs for which no features can be built result in None. A tokenization context
+            can be passed to reuse the tokenization of texts shared with other predictors.
+        """
+        if self.cache is None:
+            return self.compute_batch(inputs, batch_size=batch_size, context=context)
+        # bind arguments by name such that equal inputs share the same key
+        inputs = [self.build_input(*args, **kwargs) for args, kwargs in map(BasePredictor.input_args, inputs)]
+        return self.cache.get_or_compute(inputs, lambda missing: self.compute_batch(missing, batch_size=batch_size, context=context))
+
+    def compute_batch(self, inputs:list, batch_size:int =32, context:TokenizationContext =None) -> list:
+        """ Predict on multiple inputs bypassing the result cache """
+        outputs, texts, context = self.predict_outputs(inputs, batch_size=batch_size, context=context)
+        # postprocess
+        return [self.postprocess_input(out, text, context) if out is not None else None for out, text in zip(outputs, texts)]
+
+    def predict_outputs(self, inputs:list, batch_size:int =32, context:TokenizationContext =None) -> tuple:
+        """ Build the features of all inputs and run the model on them. Returns the model outputs 
+            and texts of all inputs as well as the tokenization context of the request.
+        """
+        inputs = [BasePredictor.input_args(inp) for inp in inputs]
+        texts = [BasePredictor.input_text(args, kwargs) for args, kwargs in inputs]
+        # tokenize all texts of the request once
+        if context is None:
+            context = TokenizationContext(texts, self.tokenizer)
+        else:
+            context.extend(texts, self.tokenizer)
+        # build features of all inputs
+        features = [self.build_features(*args, encoding=context[text], **kwargs) for (args, kwargs), text in zip(inputs, texts)]
+        # predict
+        return self.predict_features(features, batch_size=batch_size), texts, context
+
+    @torch.inference_mode()
+    def predict_features(self, features:list, batch_size:int =32) -> list:
+        """ Run the model on the feature tensors of multiple inputs. The examples of all inputs 
+            are sorted by their length and batches are only padded to their longest sequence.
+            Returns the model outputs of each input in the original order.
+        """
+        sequence_features = self.model.__class__.SEQUENCE_FEATURES
+        sequence_outputs = self.model.__class__.SEQUENCE_OUTPUTS
+        pad_token_id = self.tokenizer.pad_token_id
+        # split the features of all inputs into single examples
+        rows = [(i, j) for i, feats in enumerate(features) if feats is not None for j in range(feats[0].size(0))]
+        row_feats = [tuple(t[j:j+1] if t is not None else None for t in features[i]) for i, j in rows]
+        # remove padding from all examples
+        lengths = [int(sequence_lengths(feats[sequence_features[0]], pad_token_id).item()) for feats in row_feats]
+        row_feats = [
+            tuple(t[:, :n] if (t is not None) and (k in sequence_features) else t for k, t in enumerate(feats))
+            for feats, n in zip(row_feats, lengths)
+        ]
+
+        # examples can only be stacked if their features match in all but the sequence dimension
+        buckets = {}
+        for r in sorted(range(len(rows)), key=lengths.__getitem__):
+            key = tuple(None if t is None else tuple(t.shape[2:] if k in sequence_features else t.shape[1:]) for k, t in enumerate(row_feats[r]))
+            buckets.setdefault(key, []).append(r)
+
+        row_outputs = [None] * len(rows)
+        for bucket in buckets.values():
+            for begin in range(0, len(bucket), batch_size):
+                batch = bucket[begin:begin + batch_size]
+                max_len = max(lengths[r] for r in batch)
+                # stack examples and pad sequence features to the longest sequence of the batch
+                tensors = [[row_feats[r][k] for r in batch] for k in range(len(row_feats[batch[0]]))]
+                tensors = [
+                    None if ts[0] is None else pad_sequences([t[0] for t in ts], max_len, pad_token_id) if k in sequence_features else torch.cat(ts, dim=0)
+                    for k, ts in enumerate(tensors)
+                ]
+                # predict
+                outputs = self.forward_features(*tensors)
+                # postprocessing always receives full precision outputs
+                outputs = tuple(out.float() if isinstance(out, torch.Tensor) and out.is_floating_point() else out for out in outputs)
+                # separate outputs of examples and remove padding
+                for k, r in enumerate(batch):
+                    row_outputs[r] = tuple(
+                        (out[k:k+1, :lengths[r]] if m in sequence_outputs else out[k:k+1]) if isinstance(out, torch.Tensor) else out
+                        for m, out in enumerate(outputs)
+                    )
+
+        # gather outputs of each input
+        input_outputs = [[] for _ in features]
+        for (i, _), outputs in zip(rows, row_outputs):
+            input_outputs[i].append(outputs)
+        # concatenate outputs of all examples of an input
+        return [
+            tuple(torch.cat(outs, dim=0) if isinstance(outs[0], torch.Tensor) else outs[0] for outs in zip(*outputs)) if len(outputs) > 0 else None
+            for outputs in input_outputs
+        ]
+
+    def postprocess_input(self, outputs:tuple, text:str, context:TokenizationContext):
+        """ Post-process the model outputs of a single input. Receives the text of the input and the
+            tokenization context of the request. Defaults to post-processing the model outputs only.
+        """
         return self.postprocess(*outputs)
 
     def postprocess(self, *outputs):
@@ -0,0 +1,204 @@
+import os
+import copy
+import json
+import pickle
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# characters tokenizers split at like a space, i.e. tab, newline, carriage return and
+# the unicode space separators (category Zs)
+_WHITESPACE = {ord(c): ' ' for c in '\t\n\r\u00a0\u1680\u202f\u205f\u3000'}
+_WHITESPACE.update({c: ' ' for c in range(0x2000, 0x200b)})
+
+def normalize_whitespace(text:str) -> str:
+    """ Replace each whitespace character by a space. As every character is replaced
+        by exactly one character, character spans into the text stay valid.
+    """
+    return text.translate(_WHITESPACE)
+
+
+class _Pending(object):
+    """ Result of a request that is currently being computed """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def resolve(self, value, error:Exception =None) -> None:
+        self.value, self.error = value, error
+        self.event.set()
+
+
+class ResultCache(object):
+    """ Two-tier cache of prediction results. Results are held in an in-memory LRU cache
+        of at most max_size entries and optionally persisted to an SQLite database that
+        survives restarts. Concurrent requests of the same key are coalesced, i.e. the
+        result is computed once and shared between all requests. Texts only differing in
+        their whitespace characters optionally share their results (see normalize_whitespace).
+        Each request receives its own copy of the results, so callers may modify them.
+    """
+
+    def __init__(self, namespace:str, max_size:int =10000, db_path:str =None, normalize_texts:bool =False):
+        # save values
+        self.namespace = namespace
+        self.max_size = max_size
+        self.db_path = db_path
+        self.normalize_texts = normalize_texts
+        # in-memory tier and requests currently being computed
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.pending = {}
+        # database connection of the current process
+        self.db_lock = threading.Lock()
+        self.db, self.db_pid = None, None
+        # statistics
+        self.n_memory_hits, self.n_disk_hits, self.n_misses, self.n_coalesced = 0, 0, 0, 0
+
+    def key(self, inp:dict) -> str:
+        """ Build the key of an input from its arguments """
+        if self.normalize_texts:
+            inp = {name: normalize_whitespace(val) if isinstance(val, str) else val for name, val in inp.items()}
+        # canonical serialization - sorted keys and tuples as lists
+        dump = json.dumps([self.namespace, inp], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(dump.encode('utf-8')).hexdigest()
+
+    """ Memory Tier """
+
+    def get_memory(self, key:str) -> tuple:
+        # assumes the lock is held
+        if key not in self.memory:
+            return False, None
+        self.memory.move_to_end(key)
+        return True, self.memory[key]
+
+    def put_memory(self, key:str, value) -> None:
+        with self.lock:
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+            # evict least recently used entries
+            while len(self.memory) > self.max_size:
+                self.memory.popitem(last=False)
+
+    """ Disk Tier """
+
+    def connection(self) -> sqlite3.Connection:
+        # connections cannot be shared with forked processes
+        if (self.db is None) or (self.db_pid != os.getpid()):
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self.db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+            self.db.commit()
+            self.db_pid = os.getpid()
+        return self.db
+
+    def get_disk(self, keys:list) -> dict:
+        if (self.db_path is None) or (len(keys) == 0):
+            return {}
+        with self.db_lock:
+            db, values = self.connection(), {}
+            # query in chunks to stay below the variable limit of sqlite
+            for begin in range(0, len(keys), 500):
+                chunk = keys[begin:begin + 500]
+                rows = db.execute("SELECT key, value FROM results WHERE key IN (%s)" % ','.join('?' * len(chunk)), chunk)
+                values.update((key, pickle.loads(value)) for key, value in rows)
+            return values
+
+    def put_disk(self, items:dict) -> None:
+        if (self.db_path is None) or (len(items) == 0):
+            return
+        with self.db_lock:
+            db = self.connection()
+            db.executemany("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", [(key, pickle.dumps(value)) for key, value in items.items()])
+            db.commit()
+
+    """ Lookup """
+
+    def get_or_compute(self, inputs:list, compute_fn) -> list:
+        """ Get the results of all inputs. Results that are neither cached nor currently
+            computed by another request are computed by passing the list of these inputs
+            to compute_fn, which needs to return their results in the same order. Errors of
+            compute_fn are raised in all requests waiting for the failed results.
+        """
+        keys = [self.key(inp) for inp in inputs]
+        results = [None] * len(inputs)
+        # split into cached, own and others' pending keys
+        own, waiting = OrderedDict(), {}
+        with self.lock:
+            for i, key in enumerate(keys):
+                hit, value = self.get_memory(key)
+                if hit:
+                    results[i] = copy.deepcopy(value)
+                    self.n_memory_hits += 1
+                elif key in own:
+                    # duplicate within the same request
+                    own[key].append(i)
+                    self.n_coalesced += 1
+                elif key in self.pending:
+                    # computed by another request
+                    waiting.setdefault(key, (self.pending[key], []))[1].append(i)
+                    self.n_coalesced += 1
+                else:
+                    self.pending[key] = _Pending()
+                    own[key] = [i]
+
+        error = None
+        try:
+            # look up remaining keys on disk
+            for key, value in self.get_disk(list(own.keys())).items():
+                self.resolve(key, own.pop(key), value, results)
+                with self.lock:
+                    self.n_disk_hits += 1
+            # compute missing results
+            if len(own) > 0:
+                with self.lock:
+                    self.n_misses += len(own)
+                values = compute_fn([inputs[idx[0]] for idx in own.values()])
+                self.put_disk(dict(zip(own.keys(), values)))
+                for (key, idx), value in zip(list(own.items()), values):
+                    self.resolve(key, idx, value, results)
+                    del own[key]
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # release the pending keys that failed with the original error
+            for key in own.keys():
+                with self.lock:
+                    self.pending.pop(key).resolve(None, error if error is not None else RuntimeError("No result was computed"))
+
+        # wait for the results computed by other requests
+        for pending, idx in waiting.values():
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            for i in idx:
+                results[i] = copy.deepcopy(pending.value)
+        # return
+        return results
+
+    def resolve(self, key:str, idx:list, value, results:list) -> None:
+        # fill results with copies, move to memory and release pending requests
+        for i in idx:
+            results[i] = copy.deepcopy(value)
+        self.put_memory(key, value)
+        with self.lock:
+            self.pending.pop(key).resolve(value)
+
+    @property
+    def stats(self) -> dict:
+        """ Hit and miss statistics of the cache """
+        with self.lock:
+            n_requests = self.n_memory_hits + self.n_disk_hits + self.n_misses + self.n_coalesced
+            return {
+                'memory-hits': self.n_memory_hits,
+                'disk-hits': self.n_disk_hits,
+                'misses': self.n_misses,
+                'coalesced': self.n_coalesced,
+                'hit-rate': 1 - self.n_misses / max(n_requests, 1),
+                'memory-size': len(self.memory)
+            }
@@ -0,0 +1,88 @@
+import random
+# import torch and transformers
+import torch
+import transformers
+# import base model and dataset
+from .Model import BaseModel
+from .Dataset import BaseDataset, _yield_chunks
+
+class StreamingDataset(torch.utils.data.IterableDataset):
+    """ Streaming variant of a dataset. Items are read, tokenized and converted
+        to feature tensors lazily while iterating, so memory stays bounded by the
+        shuffle buffer instead of growing with the corpus size.
+    """
+
+    def __init__(self, dataset_type:type, train:bool, model:BaseModel, tokenizer:transformers.BertTokenizer, seq_length:int, data_base_dir:str, shuffle_buffer_size:int =0, chunk_size:int =64, **kwargs):
+        # check dataset type
+        if not issubclass(dataset_type, BaseDataset):
+            raise ValueError("Dataset Type %s must inherit %s!" % (dataset_type.__name__, BaseDataset.__name__))
+        # create an uninitialized instance of the dataset type
+        # it only serves items and does not build any tensors
+        self.source = dataset_type.__new__(dataset_type)
+        # save values
+        self.train = train
+        self.tokenizer = tokenizer
+        self.seq_length = seq_length
+        self.data_base_dir = data_base_dir
+        self.shuffle_buffer_size = shuffle_buffer_size
+        self.chunk_size = chunk_size
+        self.kwargs = kwargs
+        # weightless copy of the model to build features with
+        # keeps the mode the model was in at creation to match the in-memory dataset
+        self.builder = model.feature_builder()
+
+    def yield_item_features(self) -> iter:
+        """ Yield the item features of the current worker's shard """
+        # get current worker
+        worker_info = torch.utils.data.get_worker_info()
+        num_workers, worker_id = (1, 0) if worker_info is None else (worker_info.num_workers, worker_info.id)
+        # each worker processes every n-th sentence
+        sentence, prev = -1, None
+        for feats in self.source.yield_item_features(self.train, self.data_base_dir):
+            key = self.source.sentence_key(feats)
+            sentence += int((key is None) or (key != prev))
+            prev = key
+            if sentence % num_workers == worker_id:
+                yield feats
+
+    def yield_feature_tensors(self) -> iter:
+        """ Yield the feature tensors of all items of the current worker's shard """
+        # process small chunks of items at once
+        for chunk in _yield_chunks(self.yield_item_features(), self.chunk_size, key=self.source.sentence_key):
+            # build dataset items
+            items = self.source.__class__.build_dataset_items(chunk, self.tokenizer)
+            sentence_ids = self.source.sentence_ids(chunk)
+            valid = [i for i, item in enumerate(items) if item is not None]
+            items = self.builder.group_dataset_items([items[i] for i in valid], [sentence_ids[i] for i in valid])
+            for item in items:
+                # build feature tensors
+                tensors = self.builder.build_feature_tensors(*item, seq_length=self.seq_length, **self.kwargs, tokenizer=self.tokenizer)
+                if tensors is None:
+                    continue
+                # yield all examples of the item
+                for i in range(tensors[0].size(0)):
+                    yield tuple(t[i] for t in tensors)
+
+    def __iter__(self) -> iter:
+        # no shuffling
+        if self.shuffle_buffer_size <= 1:
+            yield from self.yield_feature_tensors()
+            return
+        # create random generator
+        # seeded from torch to follow torch.manual_seed and differ between epochs and workers
+        worker_info = torch.utils.data.get_worker_info()
+        seed = worker_info.seed if worker_info is not None else int(torch.empty((), dtype=torch.int64).random_().item())
+        rng = random.Random(seed)
+        # shuffle examples within a fixed size buffer
+        buffer = []
+        for example in self.yield_feature_tensors():
+            if len(buffer) < self.shuffle_buffer_size:
+                buffer.append(example)
+                continue
+            # replace a random example in the buffer
+            i = rng.randrange(len(buffer))
+            yield buffer[i]
+            buffer[i] = example
+        # flush the buffer
+        rng.shuffle(buffer)
+        yield from buffer
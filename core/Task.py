@@ -1,70 +1,116 @@
-# import base classes
-from .Predictor import BasePredictor
-from .Trainer import BaseTrainer
-from .Dataset import BaseDataset
-from .Model import BaseModel
+import importlib
+
+def resolve(name:str):
+    """ Import an object by its qualified name of the form module:attribute """
+    module, _, attr = name.partition(':')
+    return getattr(importlib.import_module(module), attr)
+
+def get_task(name:str) -> "Task":
+    """ Get the registry of a task by the name of its package, e.g. EntityClassification """
+    return importlib.import_module("tasks.%s" % name).task
 
 class Task(object):
-    """ Task """
+    """ Task. All types can be given directly or by their qualified names (module:attribute).
+        Types given by name are only imported when they are accessed, so e.g. processes that
+        only predict never import the trainer and its dependencies.
+    """
 
-    def __init__(self, 
-        predictor_type:type =None,
-        trainer_type:type =None,
-        base_model_type:type =None,
-        base_dataset_type:type =None
+    def __init__(self,
+        predictor_type =None,
+        trainer_type =None,
+        base_model_type =None,
+        base_dataset_type =None
     ):
-        # check types
-        if not issubclass(predictor_type, BasePredictor):
-            raise RuntimeError("Predictor %s must extend the BasePredictor type!" % predictor_type.__name__)
-        if not issubclass(trainer_type, BaseTrainer):
-            raise RuntimeError("Trainer %s must extend the BaseTrainer type!" % trainer_type.__name__)
-        if not issubclass(base_model_type, BaseModel):
-            raise RuntimeError("Model Type %s must extend the BaseModel type!" % base_model_type.__name__)
-        if not issubclass(base_dataset_type, BaseDataset):
-            raise RuntimeError("Dataset Type %s must extend the BaseDataset type!" % base_dataset_type.__name__)
         # save predictor and trainer
-        self.predictor_type = predictor_type
-        self.trainer_type = trainer_type
+        self.__predictor_type = predictor_type
+        self.__trainer_type = trainer_type
         # save base model and dataset types
-        self.base_model_type = base_model_type
-        self.base_dataset_type = base_dataset_type
+        self.__base_model_type = base_model_type
+        self.__base_dataset_type = base_dataset_type
 
         # create model and dataset registries
+        # map names to types or qualified names of types
         self.dataset_registry = {}
         self.model_registry = {}
 
-    def register_dataset(self, name:str):
-        """ Decorator function to register dataset types to the task """
+    @staticmethod
+    def __check_type(t, base_type:type, kind:str) -> type:
+        # import type and check it
+        t = resolve(t) if isinstance(t, str) else t
+        if not issubclass(t, base_type):
+            raise RuntimeError("%s %s must extend the %s type!" % (kind, t.__name__, base_type.__name__))
+        return t
+
+    @property
+    def predictor_type(self) -> type:
+        from .Predictor import BasePredictor
+        self.__predictor_type = Task.__check_type(self.__predictor_type, BasePredictor, "Predictor")
+        return self.__predictor_type
+
+    @property
+    def trainer_type(self) -> type:
+        from .Trainer import BaseTrainer
+        self.__trainer_type = Task.__check_type(self.__trainer_type, BaseTrainer, "Trainer")
+        return self.__trainer_type
+
+    @property
+    def base_model_type(self) -> type:
+        from .Model import BaseModel
+        self.__base_model_type = Task.__check_type(self.__base_model_type, BaseModel, "Model Type")
+        return self.__base_model_type
+
+    @property
+    def base_dataset_type(self) -> type:
+        from .Dataset import BaseDataset
+        self.__base_dataset_type = Task.__check_type(self.__base_dataset_type, BaseDataset, "Dataset Type")
+        return self.__base_dataset_type
+
+    def register_dataset(self, name:str, dataset_type =None):
+        """ Register a dataset type to the task. Either pass the dataset type or its qualified name
+            which is imported lazily, or use the returned decorator function.
+        """
         # check if key is already in use
         if name in self.dataset_registry:
             raise ValueError("Key %s is already in use for %s!" % (name, self.dataset_registry[name]))
 
         def dataset_register_decorator(dataset_type):
             # check dataset type
-            if not issubclass(dataset_type, self.base_dataset_type):
-                raise RuntimeError("Dataset %s must extend the %s type!" % (dataset_type.__name__, self.base_dataset_type.__name__))
+            if not isinstance(dataset_type, str):
+                Task.__check_type(dataset_type, self.base_dataset_type, "Dataset")
             # register
             self.dataset_registry[name] = dataset_type
             # return dataset type
             return dataset_type
 
         # return decorator
-        return dataset_register_decorator
+        return dataset_register_decorator if dataset_type is None else dataset_register_decorator(dataset_type)
 
-    def register_model(self, name:str, model_type:type):
-        """ Decorator function to register model types to the task """
+    def register_model(self, name:str, model_type =None):
+        """ Register a model type to the task. Either pass the model type or its qualified name
+            which is imported lazily, or use the returned decorator function.
+        """
         # check if key is already in use
         if name in self.model_registry:
             raise ValueError("Key %s is already in use for %s!" % (name, self.model_registry[name]))
 
         def model_register_decorator(model_type):
             # check model type
-            if not issubclass(model_type, self.base_model_type):
-                raise RuntimeError("Model %s must extend the %s type!" % (model_type.__name__, self.base_model_type.__name__))
+            if not isinstance(model_type, str):
+                Task.__check_type(model_type, self.base_model_type, "Model")
             # register
             self.model_registry[name] = model_type
             # return model type
             return model_type
 
         # return decorator
-        return model_register_decorator
+        return model_register_decorator if model_type is None else model_register_decorator(model_type)
+
+    def dataset_type(self, name:str) -> type:
+        """ Get a registered dataset type by its name """
+        self.dataset_registry[name] = Task.__check_type(self.dataset_registry[name], self.base_dataset_type, "Dataset")
+        return self.dataset_registry[name]
+
+    def model_type(self, name:str) -> type:
+        """ Get a registered model type by its name """
+        self.model_registry[name] = Task.__check_type(self.model_registry[name], self.base_model_type, "Model")
+        return self.model_registry[name]
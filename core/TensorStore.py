@@ -0,0 +1,107 @@
+import os
+import json
+import shutil
+# import torch and numpy
+import torch
+import numpy as np
+
+
+class ShardedTensor(object):
+    """ Read-only tensor whose rows are spread over a list of equally sized shards.
+        Supports the subset of the tensor interface used by datasets.
+    """
+
+    def __init__(self, shards:list, shard_size:int):
+        # save shards
+        self.shards = shards
+        self.shard_size = shard_size
+        # full shape
+        n = sum(shard.size(0) for shard in shards)
+        self.shape = torch.Size((n,) + tuple(shards[0].shape[1:])) if len(shards) > 0 else torch.Size((0,))
+
+    @property
+    def dtype(self) -> torch.dtype:
+        return self.shards[0].dtype
+
+    def size(self, dim:int =None):
+        return self.shape if dim is None else self.shape[dim]
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, idx:int) -> torch.Tensor:
+        # support negative indices
+        if idx < 0:
+            idx += len(self)
+        if not (0 <= idx < len(self)):
+            raise IndexError("Index %i out of range for tensor with %i rows" % (idx, len(self)))
+        # get row from shard
+        return self.shards[idx // self.shard_size][idx % self.shard_size]
+
+
+class TensorStore(object):
+    """ On-disk store for feature tensors. Each tensor is split into shards of a fixed
+        number of rows that are saved as numpy files and described by an index file.
+        Opening the store memory-maps all shards, so all processes on the same host
+        share the page-cache backed features instead of holding private copies.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, store_dir:str):
+        # load index
+        with open(os.path.join(store_dir, TensorStore.INDEX_FILE), 'r') as f:
+            self.index = json.loads(f.read())
+        # save store directory
+        self.store_dir = store_dir
+
+    @staticmethod
+    def exists(store_dir:str) -> bool:
+        return os.path.isfile(os.path.join(store_dir, TensorStore.INDEX_FILE))
+
+    @staticmethod
+    def write(store_dir:str, tensors:tuple, shard_size:int =65536) -> "TensorStore":
+        """ Write the tensors to a new store at the given directory """
+        # all tensors share the first dimension
+        n = tensors[0].size(0) if len(tensors) > 0 else 0
+        assert all(t.size(0) == n for t in tensors)
+        # write to temporary directory first to make writes atomic
+        tmp_dir = "%s.%i.tmp" % (store_dir.rstrip(os.sep), os.getpid())
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        shards = []
+        for k, begin in enumerate(range(0, n, shard_size)):
+            files = []
+            for i, t in enumerate(tensors):
+                # write shard of tensor
+                fname = "shard-%05i-%i.npy" % (k, i)
+                np.save(os.path.join(tmp_dir, fname), t[begin:begin + shard_size].contiguous().numpy())
+                files.append(fname)
+            shards.append({'num-items': min(shard_size, n - begin), 'files': files})
+
+        # write index
+        with open(os.path.join(tmp_dir, TensorStore.INDEX_FILE), 'w+') as f:
+            f.write(json.dumps({
+                'num-items': n,
+                'shard-size': shard_size,
+                'features': [{'dtype': str(t.numpy().dtype), 'shape': list(t.shape[1:])} for t in tensors],
+                'shards': shards
+            }, indent=4))
+        # move to final location
+        if os.path.isdir(store_dir):
+            shutil.rmtree(store_dir)
+        os.replace(tmp_dir, store_dir)
+        # return store
+        return TensorStore(store_dir)
+
+    def open(self) -> tuple:
+        """ Open all tensors of the store by memory-mapping the shards """
+        n_features, shard_size = len(self.index['features']), self.index['shard-size']
+        # memory-map all shards in copy-on-write mode
+        # pages are shared between processes as long as they are not written to
+        shards = [
+            [torch.from_numpy(np.load(os.path.join(self.store_dir, shard['files'][i]), mmap_mode='c')) for shard in self.index['shards']]
+            for i in range(n_features)
+        ]
+        # build sharded tensors
+        return tuple(ShardedTensor(feature_shards, shard_size) for feature_shards in shards)
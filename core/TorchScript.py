@@ -0,0 +1,132 @@
+import os
+import json
+# import torch
+import torch
+# import utils
+from .utils import pad_sequences
+
+
+class TracingWrapper(torch.nn.Module):
+    """ Wraps a model for tracing. The traced function receives the given feature tensors
+        of an input, i.e. all features built for prediction that are not None, and applies
+        the preprocessing as well as the forward pass of the model.
+    """
+
+    def __init__(self, model:torch.nn.Module, tokenizer, feature_mask:tuple, device:str ='cpu'):
+        torch.nn.Module.__init__(self)
+        # save values
+        self.model = model
+        self.tokenizer = tokenizer
+        self.feature_mask = feature_mask
+        self.device = device
+
+    def forward(self, *tensors) -> tuple:
+        # re-insert the features that are not given
+        tensors = iter(tensors)
+        features = [next(tensors) if given else None for given in self.feature_mask]
+        # preprocess and predict
+        outputs, _ = self.model.preprocess_and_predict(*features, tokenizer=self.tokenizer, device=self.device)
+        return tuple(outputs)
+
+
+class TorchScriptModel(object):
+    """ Model traced to TorchScript for a fixed set of padded sequence lengths (buckets).
+        Each bucket holds a separate graph which runs without the python code of the model.
+        Inputs are padded to the shortest bucket that fits their sequence length and
+        sequence outputs are cut back to the original length. Only depends on torch, but the 
+        feature tensors passed to the graphs are built by the task types using transformers.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, export_dir:str, device:str ='cpu'):
+        # load index
+        with open(os.path.join(export_dir, TorchScriptModel.INDEX_FILE), 'r') as f:
+            self.index = json.loads(f.read())
+        # save values
+        self.device = device
+        self.feature_mask = tuple(self.index['feature-mask'])
+        self.sequence_features = tuple(self.index['sequence-features'])
+        self.sequence_outputs = tuple(self.index['sequence-outputs'])
+        self.pad_token_id = self.index['pad-token-id']
+        # load graphs of all buckets
+        self.buckets = sorted(int(length) for length in self.index['buckets'])
+        self.graphs = {
+            length: torch.jit.load(os.path.join(export_dir, self.index['buckets'][str(length)]), map_location=device).eval()
+            for length in self.buckets
+        }
+
+    @staticmethod
+    def exists(export_dir:str) -> bool:
+        return os.path.isfile(os.path.join(export_dir, TorchScriptModel.INDEX_FILE))
+
+    @staticmethod
+    def export(
+        model:torch.nn.Module,
+        tokenizer,
+        features:list,
+        buckets:list,
+        export_dir:str,
+        device:str ='cpu'
+    ) -> "TorchScriptModel":
+        """ Trace the model for all bucket lengths and save the graphs to the export directory.
+            The features are the feature tensors of example inputs as built for prediction.
+            The first example that fits a bucket is used to trace the graph and all others
+            are used to check that the graph generalizes to other batch and feature sizes.
+        """
+        sequence_features = model.__class__.SEQUENCE_FEATURES
+        pad_token_id = tokenizer.pad_token_id
+        # features that are not given during prediction, e.g. labels
+        feature_mask = tuple(t is not None for t in features[0])
+        wrapper = TracingWrapper(model, tokenizer, feature_mask, device=device).eval()
+        os.makedirs(export_dir, exist_ok=True)
+
+        files = {}
+        for length in sorted(buckets):
+            # pad all examples that fit into the bucket to its length
+            examples = [
+                tuple(pad_sequences(t.unbind(0), length, pad_token_id) if k in sequence_features else t for k, t in enumerate(feats) if t is not None)
+                for feats in features if feats[sequence_features[0]].size(1) <= length
+            ]
+            if len(examples) == 0:
+                raise ValueError("No example input fits into the bucket of length %i!" % length)
+            # check other batch sizes by repeating the rows of the first example
+            check_inputs = [tuple(torch.cat((t, t), dim=0) for t in examples[0])] + examples[1:]
+            # trace and save graph
+            with torch.no_grad():
+                graph = torch.jit.trace(wrapper, examples[0], check_inputs=check_inputs)
+            files[str(length)] = "model-%i.pt" % length
+            torch.jit.save(graph, os.path.join(export_dir, files[str(length)]))
+
+        # write index
+        with open(os.path.join(export_dir, TorchScriptModel.INDEX_FILE), 'w+') as f:
+            f.write(json.dumps({
+                'model-type': model.__class__.__name__,
+                'buckets': files,
+                'feature-mask': feature_mask,
+                'sequence-features': sequence_features,
+                'sequence-outputs': model.__class__.SEQUENCE_OUTPUTS,
+                'pad-token-id': pad_token_id
+            }, indent=4))
+        # load exported model
+        return TorchScriptModel(export_dir, device=device)
+
+    def bucket(self, length:int) -> int:
+        """ Get the shortest bucket that fits the given sequence length """
+        for bucket in self.buckets:
+            if length <= bucket:
+                return bucket
+        raise ValueError("Sequence length %i exceeds the longest bucket of length %i!" % (length, self.buckets[-1]))
+
+    def __call__(self, *features) -> tuple:
+        """ Run the graph of the matching bucket on the feature tensors of a batch """
+        length = features[self.sequence_features[0]].size(1)
+        bucket = self.bucket(length)
+        # pad sequence features to the bucket length and move to device
+        tensors = tuple(
+            (pad_sequences(t.unbind(0), bucket, self.pad_token_id) if k in self.sequence_features else t).to(self.device)
+            for k, (t, given) in enumerate(zip(features, self.feature_mask)) if given
+        )
+        # predict and remove padding from sequence outputs
+        outputs = self.graphs[bucket](*tensors)
+        return tuple(out[:, :length] if k in self.sequence_outputs else out for k, out in enumerate(outputs))
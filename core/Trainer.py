@@ -1,5 +1,7 @@
 import os
 import json
+import time
+import contextlib
 # import torch
 import torch
 import torch.nn.functional as F
@@ -8,19 +10,35 @@ import transformers
 # import base model and dataset
 from .Model import BaseModel
 from .Dataset import BaseDataset
+from .StreamingDataset import StreamingDataset
+# import batching helpers
+from .Batching import BucketBatchSampler, DynamicPaddingCollator, PinWorkerThreads, dataset_sequence_lengths, padding_waste
+# import memory helpers
+from .utils import peak_memory, reset_peak_memory
+# import data parallel helpers
+from . import Distributed
 # import f1-score metric
 from sklearn.metrics import f1_score
-# import visualization tools
+# import progress bar
+# matplotlib is only imported when plotting
 from tqdm import tqdm
-from matplotlib import pyplot as plt
 
 
 class BaseTrainer(object):
-    """ Base Class for Trainers """
+    """ Base Class for Trainers. When created in a process of an initialized process group
+        (see core.Distributed.launch), the trainer runs data-parallel: each process trains
+        on its share of the data with batches of batch_size examples and the gradients are
+        synchronized by a DistributedDataParallel wrapper. Metrics are computed and the
+        trainer is dumped by the main process only.
+    """
 
     # base model and dataset types
     BASE_MODEL_TYPE = BaseModel
     BASE_DATASET_TYPE = BaseDataset
+    # data parallel wrapper of the model
+    distributed_model = None
+    # supported training precisions
+    PRECISIONS = ('fp32', 'bf16')
 
     def __init__(self, 
         # model and tokenizer
@@ -28,22 +46,53 @@ class BaseTrainer(object):
         pretrained_name:str =None,
         model_kwargs:dict ={},
         device:str ='cpu',
+        fast_tokenizer:bool =False,
+        precision:str ='fp32',
+        gradient_checkpointing:bool =False,
         # data
         dataset_type:torch.utils.data.Dataset =None,
         data_base_dir:str ='./data',
         dataset_kwargs:dict ={},
         seq_length:int =None,
         batch_size:int =None,
+        micro_batch_size:int =None,
+        cache_dir:str =None,
+        memory_map:bool =False,
+        streaming:bool =False,
+        shuffle_buffer_size:int =1024,
+        num_build_workers:int =0,
+        dynamic_padding:bool =False,
+        max_tokens:int =None,
+        num_workers:int =0,
+        prefetch_factor:int =None,
+        persistent_workers:bool =False,
+        worker_threads:int =1,
         # optimizer
         learning_rate:float =None,
         weight_decay:float =None,
     ):
+        # check precision
+        if precision not in BaseTrainer.PRECISIONS:
+            raise ValueError("Precision %s must be one of %s!" % (precision, ', '.join(BaseTrainer.PRECISIONS)))
         # save values
         self.device = device
+        self.precision = precision
         self.pretrained_name = pretrained_name
         self.lr, self.wd = learning_rate, weight_decay
+        self.seq_length, self.batch_size, self.micro_batch_size = seq_length, batch_size, micro_batch_size
+        self.gradient_checkpointing = gradient_checkpointing
+        # data parallel setup
+        self.rank, self.world_size = Distributed.get_rank(), Distributed.get_world_size()
+        self.is_main_process = (self.rank == 0)
+        if (self.world_size > 1) and (streaming or dynamic_padding):
+            raise ValueError("Streaming and dynamic padding are not supported in data-parallel training!")
+        # checkpointing recomputes the forward pass during backward which marks the parameters 
+        # ready for gradient synchronization twice when searching for unused parameters
+        if (self.world_size > 1) and gradient_checkpointing:
+            raise ValueError("Gradient checkpointing is not supported in data-parallel training!")
         # create tokenizer
-        self.tokenizer = model_type.TOKENIZER_TYPE.from_pretrained(pretrained_name)
+        tokenizer_type = model_type.FAST_TOKENIZER_TYPE if fast_tokenizer else model_type.TOKENIZER_TYPE
+        self.tokenizer = tokenizer_type.from_pretrained(pretrained_name)
 
         # check model type
         if not issubclass(model_type, self.__class__.BASE_MODEL_TYPE):
@@ -52,22 +101,146 @@ class BaseTrainer(object):
         self.model = model_type.from_pretrained(pretrained_name, **model_kwargs)
         self.model.to(device)
         self.model.train()
+        self.model.set_gradient_checkpointing(gradient_checkpointing)
         # create optimizer
         self.optim = transformers.AdamW(self.model.parameters(), lr=self.lr, weight_decay=self.wd)
 
         # check dataset type
         if not issubclass(dataset_type, self.__class__.BASE_DATASET_TYPE):
             raise ValueError("Dataset Type %s must inherit %s!" % (dataset_type.__name__, self.__class__.BASE_DATASET_TYPE.__name__))
-        # initialize dataloaders
+        # create datasets
         self.dataset_name = dataset_type.__name__
-        self.train_dataloader = torch.utils.data.DataLoader(dataset_type(True, self.model, self.tokenizer, seq_length, data_base_dir, **dataset_kwargs), shuffle=True, batch_size=batch_size)
-        self.test_dataloader = torch.utils.data.DataLoader(dataset_type(False, self.model, self.tokenizer, seq_length, data_base_dir, **dataset_kwargs), batch_size=batch_size)
+        # build and cache features in the main process first, the other processes wait 
+        # for the main process to report whether building succeeded and load the cache
+        if not self.is_main_process:
+            error = Distributed.broadcast(None)
+            if error is not None:
+                raise RuntimeError("Building the datasets failed in the main process: %s" % error)
+        try:
+            if streaming:
+                # build items lazily while iterating
+                train_data = StreamingDataset(dataset_type, True, self.model, self.tokenizer, seq_length, data_base_dir, shuffle_buffer_size=shuffle_buffer_size, **dataset_kwargs)
+                test_data = StreamingDataset(dataset_type, False, self.model, self.tokenizer, seq_length, data_base_dir, **dataset_kwargs)
+            else:
+                train_data = dataset_type(True, self.model, self.tokenizer, seq_length, data_base_dir, cache_dir=cache_dir, memory_map=memory_map, num_build_workers=num_build_workers, **dataset_kwargs)
+                test_data = dataset_type(False, self.model, self.tokenizer, seq_length, data_base_dir, cache_dir=cache_dir, memory_map=memory_map, num_build_workers=num_build_workers, **dataset_kwargs)
+        except Exception as e:
+            if self.is_main_process:
+                Distributed.broadcast(repr(e))
+            raise
+        if self.is_main_process:
+            Distributed.broadcast(None)
+            # report the throughput of building features that were not cached
+            for split, data in (("Train", train_data), ("Test", test_data)):
+                if getattr(data, 'build_stats', None) is not None:
+                    n_items, elapsed = data.build_stats
+                    print("Built %s features of %i items in %.2fs (%.1f items/s)" % (split.lower(), n_items, elapsed, n_items / max(elapsed, 1e-6)))
+        # initialize dataloaders, batches are assembled by worker processes 
+        # while the model trains on the previous batches
+        self.loader_kwargs = {} if num_workers == 0 else {
+            'num_workers': num_workers,
+            'persistent_workers': persistent_workers,
+            'worker_init_fn': PinWorkerThreads(worker_threads)
+        }
+        if (num_workers > 0) and (prefetch_factor is not None):
+            self.loader_kwargs['prefetch_factor'] = prefetch_factor
+        self.train_dataloader = self.build_dataloader(train_data, True, batch_size, dynamic_padding=dynamic_padding, max_tokens=max_tokens)
+        self.test_dataloader = self.build_dataloader(test_data, False, batch_size, dynamic_padding=dynamic_padding, max_tokens=max_tokens)
 
         # prepare model and move to device
-        self.model.prepare(self.train_dataloader.dataset, self.tokenizer)
+        self.model.prepare(train_data.source if streaming else train_data, self.tokenizer)
+        # wrap model for data parallel training, models may hold parameters that are not used
+        # for the task, e.g. the pooler, and buffers are not synchronized as the processes 
+        # may run different numbers of micro-batches
+        if self.world_size > 1:
+            self.distributed_model = torch.nn.parallel.DistributedDataParallel(
+                Distributed.PreprocessAndPredict(self.model),
+                find_unused_parameters=True,
+                broadcast_buffers=False
+            )
 
-        # save training metrics
+        # save training metrics, mean time per training step, time waited for data and peak memory of each epoch
         self.metrics = None
+        self.step_times = []
+        self.data_wait_times = []
+        self.peak_memory = []
+
+    def build_dataloader(self, dataset:torch.utils.data.Dataset, train:bool, batch_size:int, dynamic_padding:bool =False, max_tokens:int =None) -> torch.utils.data.DataLoader:
+        """ Create the dataloader for the given train or test dataset.
+            With dynamic padding, sequences are only padded to the longest sequence of their batch
+            and examples of similar lengths are grouped into the same batches.
+        """
+        # streaming datasets are shuffled by the dataset itself
+        streaming = isinstance(dataset, torch.utils.data.IterableDataset)
+        # each process trains on its share of the shuffled dataset and evaluates 
+        # every world_size-th example, so no test example is evaluated twice
+        if self.world_size > 1:
+            sampler = torch.utils.data.distributed.DistributedSampler(dataset, shuffle=True) if train else \
+                range(self.rank, len(dataset), self.world_size)
+            return torch.utils.data.DataLoader(dataset, sampler=sampler, batch_size=batch_size, **self.loader_kwargs)
+        if not dynamic_padding:
+            return torch.utils.data.DataLoader(dataset, shuffle=train and not streaming, batch_size=batch_size, **self.loader_kwargs)
+
+        # collate function cutting off padding
+        sequence_features = self.model.__class__.SEQUENCE_FEATURES
+        collate_fn = DynamicPaddingCollator(sequence_features, self.tokenizer.pad_token_id)
+        # lengths of streamed sequences are not known in advance
+        if streaming:
+            return torch.utils.data.DataLoader(dataset, batch_size=batch_size, collate_fn=collate_fn, **self.loader_kwargs)
+
+        # group examples of similar lengths in batches
+        lengths = dataset_sequence_lengths(dataset, sequence_features[0], self.tokenizer.pad_token_id)
+        sampler = BucketBatchSampler(lengths, batch_size=batch_size if max_tokens is None else None, max_tokens=max_tokens, shuffle=train)
+        # report padding waste
+        waste_before, waste_after = padding_waste(lengths, sampler.batches, dataset.tensors[sequence_features[0]].size(1))
+        print("Padding waste (%s): %.1f%% -> %.1f%%" % ("Train" if train else "Test", 100 * waste_before, 100 * waste_after))
+        # create dataloader
+        return torch.utils.data.DataLoader(dataset, batch_sampler=sampler, collate_fn=collate_fn, **self.loader_kwargs)
+
+    @staticmethod
+    def _num_batches(dataloader:torch.utils.data.DataLoader) -> int:
+        # streaming datasets have no known length
+        try:
+            return len(dataloader)
+        except TypeError:
+            return None
+
+    def autocast(self):
+        """ Context manager to run the forward pass in the precision of the trainer. Only the computations
+            run in bf16, the parameters, gradients and optimizer states are kept in fp32.
+        """
+        if self.precision == 'bf16':
+            return torch.autocast(torch.device(self.device).type, dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    def count_targets(self, *batch) -> int:
+        """ Count the valid targets of a batch, i.e. the labels that are not ignored (-1),
+            in the label tensor of the batch (see BaseModel.LABEL_FEATURE). The losses of 
+            the models are means over their valid targets.
+        """
+        labels = batch[self.model.__class__.LABEL_FEATURE]
+        return int((labels >= 0).sum().item())
+
+    def split_batch(self, batch:list) -> list:
+        """ Split a batch into micro-batches of at most micro_batch_size examples, so only a 
+            micro-batch is passed through the model at once. Returns the micro-batches and 
+            their share of the valid targets of the batch, so the weighted mean losses of the
+            micro-batches add up to the mean loss of the batch. Micro-batches without valid
+            targets are left out as their loss is not defined.
+        """
+        n = batch[0].size(0)
+        size = self.micro_batch_size or n
+        micro_batches = [[t[begin:begin + size] for t in batch] for begin in range(0, n, size)]
+        n_targets = [self.count_targets(*micro_batch) for micro_batch in micro_batches]
+        return [(micro_batch, k / sum(n_targets)) for micro_batch, k in zip(micro_batches, n_targets) if k > 0]
+
+    def preprocess_and_predict(self, *batch) -> tuple:
+        """ Preprocess and predict a given batch. During data-parallel training the forward 
+            pass runs through the distributed wrapper to synchronize the gradients.
+        """
+        if (self.distributed_model is not None) and self.model.training:
+            return self.distributed_model(*batch, tokenizer=self.tokenizer, device=self.device)
+        return self.model.preprocess_and_predict(*batch, tokenizer=self.tokenizer, device=self.device)
 
     def predict_batch(self, *batch) -> tuple:
         """ Pass a batch through the model and compute the loss.
@@ -83,92 +256,178 @@ class BaseTrainer(object):
 
         # train model
         self.model.train()
-        train_running_loss = 0
+        train_running_loss, n_train_batches, step_time, data_wait_time = 0, 0, 0, 0
+        reset_peak_memory(self.device)
+        # shuffle differently in each epoch
+        if isinstance(self.train_dataloader.sampler, torch.utils.data.distributed.DistributedSampler):
+            self.train_dataloader.sampler.set_epoch(len(self.step_times))
         # create progress bar
-        with tqdm(total=len(self.train_dataloader), ascii=True) as pbar:
+        with tqdm(total=BaseTrainer._num_batches(self.train_dataloader), ascii=True, disable=not self.is_main_process) as pbar:
             pbar.set_description("Train")
 
+            wait_start = time.perf_counter()
             for i, batch in enumerate(self.train_dataloader, 1):
-                # get loss
-                loss, _ = self.predict_batch(*batch)
-                train_running_loss += loss.item()
-                # backpropagate and update parameters
+                start = time.perf_counter()
+                data_wait_time += start - wait_start
                 self.optim.zero_grad()
-                loss.backward()
-                self.optim.step()
+                # accumulate gradients of all micro-batches
+                micro_batches = self.split_batch(batch)
+                if (len(micro_batches) == 0) and (self.distributed_model is not None):
+                    # the process still has to take part in the gradient synchronization,
+                    # the zero weight keeps its undefined loss out of the gradient
+                    micro_batches = [([t[:self.micro_batch_size or t.size(0)] for t in batch], 0.0)]
+                for k, (micro_batch, weight) in enumerate(micro_batches, 1):
+                    # only synchronize gradients of the last micro-batch
+                    no_sync = (self.distributed_model is not None) and (k < len(micro_batches))
+                    with (self.distributed_model.no_sync() if no_sync else contextlib.nullcontext()):
+                        # get loss
+                        with self.autocast():
+                            loss, _ = self.predict_batch(*micro_batch)
+                        train_running_loss += loss.item() * weight if weight > 0 else 0
+                        # backpropagate weighted by the share of valid targets of the micro-batch
+                        (loss * weight).backward()
+                # update parameters once per batch, batches without valid targets are skipped
+                if len(micro_batches) > 0:
+                    self.optim.step()
+                step_time += time.perf_counter() - start
 
                 # update progress bar
                 pbar.set_postfix({'loss': train_running_loss / i})
                 pbar.update(1)
+                n_train_batches = i
+                wait_start = time.perf_counter()
+        # track time per training step, time waited for data and peak memory
+        self.step_times.append(step_time / max(n_train_batches, 1))
+        self.data_wait_times.append(data_wait_time)
+        self.peak_memory.append(peak_memory(self.device))
+        if self.is_main_process:
+            print("Data wait: %.2fs (%.1f%% of the training loop, %.1fms per batch)" % (
+                data_wait_time, 100 * data_wait_time / max(data_wait_time + step_time, 1e-9), 1e3 * data_wait_time / max(n_train_batches, 1)
+            ))
+            print("Peak memory: %.1f MB (batch size %s, micro-batch size %s, sequence length %s, gradient checkpointing %s)" % (
+                self.peak_memory[-1] / 2**20, self.batch_size, self.micro_batch_size or self.batch_size, self.seq_length, 
+                "on" if self.gradient_checkpointing else "off"
+            ))
 
         # test model
         self.model.eval()
-        test_running_loss, eval_caches = 0, []
+        test_running_loss, eval_caches, n_test_batches = 0, [], 0
         # no gradients needed for evaluation
-        with torch.no_grad():
+        with torch.no_grad(), self.autocast():
             # create progress bar
-            with tqdm(total=len(self.test_dataloader), ascii=True) as pbar:
+            with tqdm(total=BaseTrainer._num_batches(self.test_dataloader), ascii=True, disable=not self.is_main_process) as pbar:
                 pbar.set_description("Test")
 
                 for i, batch in enumerate(self.test_dataloader, 1):
-                    # evaluate batch and move all cached tensors to cpu
-                    loss, cache = self.predict_batch(*batch)
-                    cache = (t.cpu() for t in cache if isinstance(t, torch.Tensor))
-                    # update tracked values
-                    test_running_loss += loss.item()
-                    eval_caches.append(cache)
+                    # without gradients the whole batch fits through the model at once
+                    # the loss of batches without valid targets is not defined
+                    if self.count_targets(*batch) > 0:
+                        # evaluate batch and move all cached tensors to cpu
+                        loss, cache = self.predict_batch(*batch)
+                        cache = tuple(t.float().cpu() if t.is_floating_point() else t.cpu() for t in cache if isinstance(t, torch.Tensor))
+                        # update tracked values
+                        test_running_loss += loss.item()
+                        eval_caches.append(cache)
                     # update progress bar
                     pbar.set_postfix({'loss': test_running_loss / i})
                     pbar.update(1)
+                    n_test_batches = i
 
-        # compute metrics and stuff
-        metrics = self.compute_metrics(eval_caches)
+        # average losses over all processes
+        train_running_loss, n_train_batches, test_running_loss, n_test_batches = Distributed.all_reduce_sum(
+            train_running_loss, n_train_batches, test_running_loss, n_test_batches)
+        # compute metrics on the caches of all processes in the main process
+        caches = Distributed.gather(eval_caches)
+        metrics = self.compute_metrics([cache for caches_ in caches for cache in caches_]) if self.is_main_process else None
+        metrics = Distributed.broadcast(metrics)
         assert type(metrics) is tuple
         # return all metrics
         return (
-            train_running_loss / len(self.train_dataloader), 
-            test_running_loss / len(self.test_dataloader),
+            train_running_loss / max(n_train_batches, 1), 
+            test_running_loss / max(n_test_batches, 1),
         ) + metrics
 
     def train(self, epochs:int) -> None:
 
-        metric_caches = []
+        metric_caches, self.step_times, self.data_wait_times, self.peak_memory = [], [], [], []
         # run epochs
         for e in range(1, epochs + 1):
-            print("Epoch %i" % e)
+            if self.is_main_process:
+                print("Epoch %i" % e)
             # run epoch
             metrics = self.run_epoch()
             metric_caches.append(metrics)
             # print
-            print("Evaluation: %s" % ', '.join(["%.3f" % m for m in metrics]))
+            if self.is_main_process:
+                print("Evaluation: %s" % ', '.join(["%.3f" % m for m in metrics]))
         # build metric lists
         self.metrics = tuple(zip(*metric_caches))
 
-    def dump(self, dump_base_path:str):
+    def dump(self, dump_base_path:str, bf16_weights:bool =False):
+        """ Save the trainer setup, metrics, model, tokenizer and optimizer. The dump directory 
+            holds everything a predictor needs to load the model. Optionally, the weights 
+            are additionally stored in bf16 for predictors running in bf16.
+            In data-parallel training only the main process writes the dump.
+        """
+        if not self.is_main_process:
+            return
         # create full path to dump directory
         dump_dir = os.path.join(
             dump_base_path, 
             self.model.__class__.__name__, 
             "%s-%s" % (self.pretrained_name, self.dataset_name)
         )
+        # full precision dump of the same setup to compare against
+        baseline_dir = dump_dir
+        if self.precision != 'fp32':
+            dump_dir = "%s-%s" % (dump_dir, self.precision)
         # create directory
         os.makedirs(dump_dir, exist_ok=True)
-        # save trainer setup in directory
+        # save trainer setup and performance in directory
+        setup = {
+            'pretrained-name': self.pretrained_name,
+            'dataset': self.dataset_name,
+            'learning-rate': self.lr,
+            'weight-decay': self.wd,
+            'precision': self.precision,
+            'seq-length': self.seq_length,
+            'batch-size': self.batch_size,
+            'micro-batch-size': self.micro_batch_size,
+            'gradient-checkpointing': self.gradient_checkpointing,
+            'num-workers': self.loader_kwargs.get('num_workers', 0),
+            'step-time': self.step_times,
+            'data-wait': self.data_wait_times,
+            'peak-memory': self.peak_memory,
+            'final-metrics': [m[-1] for m in self.metrics] if self.metrics is not None else None
+        }
+        # compare against the full precision baseline
+        baseline_fpath = os.path.join(baseline_dir, "trainer.json")
+        if (self.precision != 'fp32') and os.path.isfile(baseline_fpath):
+            with open(baseline_fpath, 'r') as f:
+                baseline = json.loads(f.read())
+            if (len(baseline.get('step-time', [])) > 0) and (len(self.step_times) > 0):
+                setup['baseline'] = {
+                    'step-time': baseline['step-time'],
+                    'final-metrics': baseline['final-metrics'],
+                    'speedup': (sum(baseline['step-time']) / len(baseline['step-time'])) / (sum(self.step_times) / len(self.step_times))
+                }
         with open(os.path.join(dump_dir, "trainer.json"), 'w+') as f:
-            f.write(json.dumps({
-                'pretrained-name': self.pretrained_name,
-                'dataset': self.dataset_name,
-                'learning-rate': self.lr,
-                'weight-decay': self.wd
-            }, indent=4))
+            f.write(json.dumps(setup, indent=4))
         # save plot
+        from matplotlib import pyplot as plt
         self.plot().savefig(os.path.join(dump_dir, 'metrics.png'))
         plt.close()
-        # save model and optimizer
+        # save model, tokenizer and optimizer
         self.model.save_pretrained(dump_dir)
+        self.tokenizer.save_pretrained(dump_dir)
         torch.save(self.optim.state_dict(), os.path.join(dump_dir, 'optimizer.bin'))
+        # save bf16 weights
+        if bf16_weights:
+            state = {key: val.bfloat16() if val.is_floating_point() else val for key, val in self.model.state_dict().items()}
+            torch.save(state, os.path.join(dump_dir, BaseModel.BF16_WEIGHTS_NAME))
 
     def plot(self, figsize=(8, 5)):
+        from matplotlib import pyplot as plt
         # create figure
         fig, ax = plt.subplots(1, 1, figsize=figsize)
         # plot train and test loss
@@ -186,7 +445,7 @@ class SimpleTrainer(BaseTrainer):
     
     def predict_batch(self, *batch) -> tuple:
         # predict on batch
-        outputs, labels = self.model.preprocess_and_predict(*batch, tokenizer=self.tokenizer, device=self.device)
+        outputs, labels = self.preprocess_and_predict(*batch)
         loss, logits, labels = outputs[0], outputs[1], labels.to(self.device)
         # get the valid labels and logits
         mask = (labels >= 0)
@@ -205,6 +464,7 @@ class SimpleTrainer(BaseTrainer):
         return micro_f1, macro_f1
 
     def plot(self, figsize=(8, 5)):
+        from matplotlib import pyplot as plt
         # create figure
         fig, (loss_ax, f1_ax) = plt.subplots(2, 1, figsize=figsize, sharex=True)
         # plot train and test loss
@@ -1,9 +1,11 @@
 # import torch
+import torch
 import torch.nn as nn
 # import numpy
 import numpy as np
 # import utils
 import unicodedata
+import xml.etree.ElementTree as ET
 from functools import wraps
 
 
@@ -32,6 +34,91 @@ def align_shape(L:list, shape:tuple, fill_value:float =0) -> np.ndarray:
     # match the shape of a one dimensional array
     return np.asarray(L + [fill_value] * (shape[0] - len(L)))
 
+def pad_sequences(sequences:list, length:int =None, fill_value:int =0, dtype:torch.dtype =None, return_lengths:bool =False) -> torch.Tensor:
+    """ Fill/Cut a list of ragged sequences to the given length and write them into 
+        a single preallocated tensor of shape (len(sequences), length). The length
+        defaults to the length of the longest sequence. Optionally also returns the
+        lengths of the sequences after cutting. Sequences can also be tensors, which
+        are padded along their first dimension and keep their further dimensions,
+        type and device. The type defaults to the type of the tensors or long.
+    """
+    # get lengths of all sequences after cutting
+    length = max((len(seq) for seq in sequences), default=0) if length is None else length
+    lengths = [min(len(seq), length) for seq in sequences]
+    if (len(sequences) > 0) and isinstance(sequences[0], torch.Tensor):
+        # preallocate buffer on the device of the tensors
+        first = sequences[0]
+        out = first.new_full((len(sequences), length) + tuple(first.shape[1:]), fill_value, dtype=dtype or first.dtype)
+        for i, (seq, n) in enumerate(zip(sequences, lengths)):
+            out[i, :n] = seq[:n]
+        return (out, torch.LongTensor(lengths)) if return_lengths else out
+    # preallocate buffer of target type and write sequences row by row
+    # the numpy buffer is shared with the returned tensor, so no copy is needed
+    out = np.full((len(sequences), length), fill_value, dtype=torch.empty((), dtype=dtype or torch.long).numpy().dtype)
+    for i, (seq, n) in enumerate(zip(sequences, lengths)):
+        out[i, :n] = seq[:n]
+    out = torch.from_numpy(out)
+    # return
+    return (out, torch.LongTensor(lengths)) if return_lengths else out
+
+
+""" Data Loading Helpers """
+
+def iterparse_elements(fpath:str, tag:str) -> iter:
+    """ Incrementally parse an xml file and yield all elements with the given tag.
+        Elements are cleared and detached from the tree once they are processed,
+        so memory stays constant independent of the file size.
+    """
+    # stack of currently open elements
+    stack = []
+    for event, elem in ET.iterparse(fpath, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == tag:
+            yield elem
+        elif any(e.tag == tag for e in stack):
+            # element is part of an element that is not yet processed
+            continue
+        # free processed element
+        elem.clear()
+        if len(stack) > 0:
+            stack[-1].remove(elem)
+
+
+""" Memory Helpers """
+
+def reset_peak_memory(device:str ='cpu') -> None:
+    """ Reset the peak memory tracked by peak_memory """
+    if torch.device(device).type == 'cuda':
+        torch.cuda.reset_peak_memory_stats(device)
+        return
+    # reset the peak resident set size of the process (linux only)
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def peak_memory(device:str ='cpu') -> int:
+    """ Get the peak memory in bytes since the last reset. For cuda devices this is the peak of the
+        allocated device memory and otherwise the peak resident set size of the process.
+    """
+    if torch.device(device).type == 'cuda':
+        return torch.cuda.max_memory_allocated(device)
+    # read peak resident set size (linux only)
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # fall back to the peak over the lifetime of the process
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
 
 """ Model Decorator Helpers """
 
@@ -153,6 +240,30 @@ def build_token_spans(tokens:list, text:str) -> list:
     return spans
 
 
+def encode_with_spans(text:str, tokenizer) -> tuple:
+    """ Tokenize a text and get the character span of each token.
+        Fast tokenizers provide the spans directly through their offset mappings.
+        Returns the token ids and the token spans.
+    """
+    return batch_encode_with_spans([text], tokenizer)[0]
+
+def batch_encode_with_spans(texts:list, tokenizer) -> list:
+    """ Tokenize a list of texts and get the character spans of all tokens.
+        Fast tokenizers encode all texts in a single call.
+        Returns a list of token ids and token spans per text.
+    """
+    # nothing to encode
+    if len(texts) == 0:
+        return []
+    # slow tokenizers need to recover the spans from the tokens
+    if not getattr(tokenizer, 'is_fast', False):
+        tokens = [tokenizer.tokenize(text) for text in texts]
+        return [(tokenizer.convert_tokens_to_ids(toks), build_token_spans(toks, text)) for toks, text in zip(tokens, texts)]
+    # encode all texts at once
+    encodings = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True)
+    return [(list(ids), [tuple(span) for span in spans]) for ids, spans in zip(encodings['input_ids'], encodings['offset_mapping'])]
+
+
 """ Begin-In-Out Scheme Helpers """
 
 def mark_bio_scheme(token_spans:list, entity_spans:list) -> list:
@@ -0,0 +1,45 @@
+""" Export a trained model to TorchScript graphs for a set of padded sequence lengths """
+import argparse
+# import task registry
+from core.Task import get_task
+
+
+def export(task:str, model_name:str, dataset_name:str, pretrained_name:str, buckets:list, precision:str) -> None:
+    """ Trace the model of a dump directory and save the graphs with the dump """
+    # import predictor, model and dataset type
+    # the trainer and its dependencies are not imported
+    task = get_task(task)
+    predictor_type, model_type, dataset_type = task.predictor_type, task.model_type(model_name), task.dataset_type(dataset_name)
+    # load model
+    predictor = predictor_type(
+        model_type=model_type,
+        pretrained_name=pretrained_name,
+        precision=precision,
+        dataset_type=dataset_type
+    )
+    # trace model for all buckets
+    export_dir = predictor.export_torchscript(buckets)
+    print("Saved graphs for sequence lengths %s to %s" % (', '.join(map(str, sorted(buckets))), export_dir))
+
+
+if __name__ == '__main__':
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="Export a trained model to TorchScript graphs for a set of padded sequence lengths.")
+    parser.add_argument("--task", type=str, required=True, help="Name of the task, e.g. EntityClassification")
+    parser.add_argument("--model", type=str, required=True, help="Name of the model, e.g. BertForEntityClassification")
+    parser.add_argument("--dataset", type=str, required=True, help="Name of the dataset the model was trained on, e.g. SemEval2015Task12_AspectPolarity")
+    parser.add_argument("--pretrained-name", type=str, required=True, help="Dump directory of the trained model")
+    parser.add_argument("--buckets", type=int, nargs='+', default=[32, 64, 128, 256], help="Padded sequence lengths to trace the model for")
+    parser.add_argument("--precision", type=str, default='fp32', choices=['fp32', 'dynamic-int8'], help="Precision of the exported model")
+    args = parser.parse_args()
+
+    # export model
+    export(
+        task=args.task,
+        model_name=args.model,
+        dataset_name=args.dataset,
+        pretrained_name=args.pretrained_name,
+        buckets=args.buckets,
+        precision=args.precision
+    )
@@ -0,0 +1,116 @@
+""" Compare latency, memory and f1-scores of a trained model in different precisions """
+import io
+import time
+import argparse
+import statistics
+# import torch
+import torch
+# import task registry
+from core.Task import get_task
+
+
+def model_size(model:torch.nn.Module) -> int:
+    """ Size of the weights of a model in bytes """
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+def evaluate(trainer_type:type, predictor, dataset:torch.utils.data.Dataset, batch_size:int) -> tuple:
+    """ Evaluate the model of a predictor on a dataset with the metrics of the task's trainer.
+        Returns the metrics and the number of examples processed per second.
+    """
+    # the trainer only needs the model, tokenizer and device to compute the metrics
+    trainer = trainer_type.__new__(trainer_type)
+    trainer.model, trainer.tokenizer, trainer.device = predictor.model, predictor.tokenizer, predictor.device
+    dataloader = torch.utils.data.DataLoader(dataset, shuffle=False, batch_size=batch_size)
+    # evaluate in the precision of the predictor
+    caches, start = [], time.perf_counter()
+    with torch.inference_mode(), predictor.autocast():
+        for batch in dataloader:
+            _, cache = trainer.predict_batch(*batch)
+            caches.append(tuple(t.float().cpu() if t.is_floating_point() else t.cpu() for t in cache))
+    duration = time.perf_counter() - start
+    # compute metrics
+    return trainer.compute_metrics(caches), len(dataset) / duration
+
+def latency(predictor, dataset:torch.utils.data.Dataset, n_samples:int) -> float:
+    """ Median latency of predicting single examples in seconds """
+    times = []
+    for i in range(min(n_samples, len(dataset))):
+        features = tuple(t[i:i+1] for t in dataset.tensors)
+        start = time.perf_counter()
+        predictor.predict_features([features], batch_size=1)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def report(task:str, model_name:str, dataset_name:str, pretrained_name:str, precisions:list, seq_length:int, batch_size:int, n_samples:int, data_base_dir:str, cache_dir:str) -> None:
+    """ Compare the given precisions of a model on the test dataset against full precision """
+    # import predictor, trainer, model and dataset type
+    task = get_task(task)
+    predictor_type, trainer_type = task.predictor_type, task.trainer_type
+    model_type, dataset_type = task.model_type(model_name), task.dataset_type(dataset_name)
+    # full precision is the baseline
+    precisions = ['fp32'] + [p for p in precisions if p != 'fp32']
+
+    rows, dataset = [], None
+    for precision in precisions:
+        print("Evaluating %s" % precision)
+        predictor = predictor_type(
+            model_type=model_type,
+            pretrained_name=pretrained_name,
+            precision=precision,
+            dataset_type=dataset_type
+        )
+        # build test dataset once, features are built as during training
+        if dataset is None:
+            builder = predictor.model.feature_builder()
+            builder.train()
+            dataset = dataset_type(False, builder, predictor.tokenizer, seq_length, data_base_dir, cache_dir=cache_dir)
+        # measure
+        metrics, throughput = evaluate(trainer_type, predictor, dataset, batch_size)
+        rows.append((precision, model_size(predictor.model), latency(predictor, dataset, n_samples), throughput, metrics))
+        # free model before loading the next one
+        del predictor
+
+    # print report
+    _, base_size, base_latency, base_throughput, base_metrics = rows[0]
+    print("%-14s %12s %14s %20s   %s" % ("Precision", "Size (MB)", "Latency (ms)", "Throughput (ex/s)", "Metrics (diff)"))
+    for precision, size, lat, throughput, metrics in rows:
+        print("%-14s %7.1f %3.1fx %9.2f %3.1fx %14.1f %4.1fx   %s" % (
+            precision,
+            size / 2**20, base_size / size,
+            lat * 1e3, base_latency / lat,
+            throughput, throughput / base_throughput,
+            ', '.join("%.3f (%+.3f)" % (m, m - b) for m, b in zip(metrics, base_metrics))
+        ))
+
+
+if __name__ == '__main__':
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="Compare latency, memory and f1-scores of a trained model in different precisions.")
+    parser.add_argument("--task", type=str, required=True, help="Name of the task, e.g. EntityClassification")
+    parser.add_argument("--model", type=str, required=True, help="Name of the model, e.g. BertForEntityClassification")
+    parser.add_argument("--dataset", type=str, required=True, help="Name of the dataset, e.g. SemEval2015Task12_AspectPolarity")
+    parser.add_argument("--pretrained-name", type=str, required=True, help="Dump directory of the trained model")
+    parser.add_argument("--seq-length", type=int, required=True, help="Sequence length")
+    parser.add_argument("--precisions", type=str, nargs='*', default=['bf16', 'dynamic-int8'], help="Precisions to compare against fp32")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size of the evaluation")
+    parser.add_argument("--latency-samples", type=int, default=200, help="Number of single examples to measure the latency on")
+    parser.add_argument("--data-base-dir", type=str, default="./data", help="Base directory of the datasets")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Directory of the feature cache")
+    args = parser.parse_args()
+
+    # run report
+    report(
+        task=args.task,
+        model_name=args.model,
+        dataset_name=args.dataset,
+        pretrained_name=args.pretrained_name,
+        precisions=args.precisions,
+        seq_length=args.seq_length,
+        batch_size=args.batch_size,
+        n_samples=args.latency_samples,
+        data_base_dir=args.data_base_dir,
+        cache_dir=args.cache_dir
+    )
@@ -1,18 +1,18 @@
 
-def RelationExtraction():
+def build_RelationExtraction():
 
     # Relation Extraction imports
     from tasks.RelationExtraction.Predictor import RelationExtractionPredictor
     from tasks.RelationExtraction.models import BertForRelationExtraction
     from tasks.RelationExtraction.datasets import (
         SemEval2010Task8,
-        GermanYelpRelation,
-        GermanYelpPolarity,
+        GermanYelp_Linking,
+        GermanYelp_Polarity,
         SmartdataCorpus,
     )
 
     # create predictor
-    predictor = RelationExtractionPredictor(
+    return RelationExtractionPredictor(
         model_type = BertForRelationExtraction,
         pretrained_name = 'bert-base-uncased',
         device = 'cpu',
@@ -20,6 +20,11 @@ def RelationExtraction():
         dataset_type=SemEval2010Task8
     )
 
+def RelationExtraction():
+
+    # create predictor
+    predictor = build_RelationExtraction()
+
     # predict label
     label = predictor(
         text="Nasa sends names into space.",
@@ -31,26 +36,31 @@ def RelationExtraction():
     print("Label: %s" % label)
 
 
-def EntityClassification():
+def build_EntityClassification():
 
     # Entity Classfication imports
     from tasks.EntityClassification.Predictor import EntityClassificationPredictor
     from tasks.EntityClassification.models import BertForEntityClassification, BertForSentencePairClassification
     from tasks.EntityClassification.datasets import (
-        SemEval2015Task12_AspectSentiment, 
-        SemEval2015Task12_OpinionSentiment, 
-        GermanYelpSentiment
+        SemEval2015Task12_AspectPolarity, 
+        SemEval2015Task12_OpinionPolarity, 
+        GermanYelp_AspectPolarity
     )
 
     # create predictor
-    predictor = EntityClassificationPredictor(
+    return EntityClassificationPredictor(
         model_type = BertForEntityClassification,
         pretrained_name = 'bert-base-uncased',
         device = 'cpu',
         # dataset
-        dataset_type=SemEval2015Task12_AspectSentiment
+        dataset_type=SemEval2015Task12_AspectPolarity
     )
 
+def EntityClassification():
+
+    # create predictor
+    predictor = build_EntityClassification()
+
     # predict entity labels
     label = predictor(
         text="Nasa sends names into space.",
@@ -61,7 +71,7 @@ def EntityClassification():
     print("Labels:", label)
 
 
-def AspectOpinionExtraction():
+def build_AspectOpinionExtraction():
 
     # Aspect Opinion Extraction imports
     from tasks.AspectOpinionExtraction.Predictor import AspectOpinionExtractionPredictor
@@ -72,7 +82,7 @@ def AspectOpinionExtraction():
     )
 
     # create predictor
-    predictor = AspectOpinionExtractionPredictor(
+    return AspectOpinionExtractionPredictor(
         model_type = BertForAspectOpinionExtraction,
         pretrained_name = 'bert-base-uncased',
         device = 'cpu',
@@ -80,6 +90,11 @@ def AspectOpinionExtraction():
         dataset_type=SemEval2015Task12
     )
 
+def AspectOpinionExtraction():
+
+    # create predictor
+    predictor = build_AspectOpinionExtraction()
+
     # predict aspect and opinions
     aspects, opinions = predictor(text="The coffee was hot and tasty.")
 
@@ -88,7 +103,7 @@ def AspectOpinionExtraction():
     print("Opinions:", opinions)
     
 
-def AspectBasedSentimentAnalysis():
+def build_AspectBasedSentimentAnalysis():
 
     # Aspect Opinion Extraction imports
     from tasks.AspectBasedSentimentAnalysis.Predictor import AspectBasedSentimentAnalysisPredictor
@@ -98,7 +113,7 @@ def AspectBasedSentimentAnalysis():
     )
 
     # create predictor
-    predictor = AspectBasedSentimentAnalysisPredictor(
+    return AspectBasedSentimentAnalysisPredictor(
         model_type = BertForSentencePairClassification,
         pretrained_name = 'bert-base-uncased',
         device = 'cpu',
@@ -106,6 +121,11 @@ def AspectBasedSentimentAnalysis():
         dataset_type=SemEval2014Task4
     )
 
+def AspectBasedSentimentAnalysis():
+
+    # create predictor
+    predictor = build_AspectBasedSentimentAnalysis()
+
     # predict label
     polarity = predictor(
         text="The waiter forgot what we ordered.",
@@ -115,9 +135,44 @@ def AspectBasedSentimentAnalysis():
     # print
     print("Polarity:", polarity)
 
+
+def ReviewPipeline():
+
+    # import pipeline
+    from core.Pipeline import Pipeline
+
+    # create pipeline extracting, classifying and linking aspects and opinions
+    pipeline = Pipeline(
+        extractor=build_AspectOpinionExtraction(),
+        classifier=build_EntityClassification(),
+        linker=build_RelationExtraction()
+    )
+
+    # process all sentences of a review at once
+    results = pipeline.predict_document([
+        "The coffee was hot and tasty.",
+        "The waiter forgot what we ordered."
+    ])
+
+    # print
+    print("Shared encoder modules:", pipeline.shared_modules)
+    for result in results:
+        print(result)
+
+
+# predictor factories by task name
+# used as routes by the inference server
+PREDICTORS = {
+    'RelationExtraction': build_RelationExtraction,
+    'EntityClassification': build_EntityClassification,
+    'AspectOpinionExtraction': build_AspectOpinionExtraction,
+    'AspectBasedSentimentAnalysis': build_AspectBasedSentimentAnalysis
+}
+
 if __name__ == '__main__':
 
     RelationExtraction()
     EntityClassification()
     AspectOpinionExtraction()
-    AspectBasedSentimentAnalysis()
\ No newline at end of file
+    AspectBasedSentimentAnalysis()
+    ReviewPipeline()
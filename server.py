@@ -0,0 +1,149 @@
+""" Pre-forked multi-process HTTP inference server for the task predictors """
+import os
+import gc
+import sys
+import json
+import signal
+import argparse
+import http.server
+# import torch and numpy
+import torch
+import numpy as np
+
+
+def to_json(obj):
+    """ Convert prediction results to json serializable objects """
+    if isinstance(obj, (np.ndarray, np.generic, torch.Tensor)):
+        return obj.tolist()
+    if isinstance(obj, (list, tuple)):
+        return [to_json(o) for o in obj]
+    if isinstance(obj, dict):
+        return {key: to_json(val) for key, val in obj.items()}
+    return obj
+
+
+class PredictionHandler(http.server.BaseHTTPRequestHandler):
+    """ Request handler serving one route per predictor.
+        POST /<Task> with a json body that is either a single input, i.e. the keyword 
+        arguments of the predict function, or {"inputs": [...]} holding multiple inputs.
+    """
+
+    def send_json(self, code:int, obj) -> None:
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        # health check
+        if self.path.rstrip('/') in ('', '/health'):
+            self.send_json(200, {'worker': os.getpid(), 'routes': sorted(self.server.predictors.keys())})
+        else:
+            self.send_json(404, {'error': "Unknown route %s" % self.path})
+
+    def do_POST(self) -> None:
+        # get predictor of route
+        predictor = self.server.predictors.get(self.path.strip('/'), None)
+        if predictor is None:
+            self.send_json(404, {'error': "Unknown route %s" % self.path})
+            return
+        # parse request
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8'))
+        except ValueError as e:
+            self.send_json(400, {'error': "Invalid request: %s" % e})
+            return
+        # predict
+        try:
+            if isinstance(request, dict) and ('inputs' in request):
+                self.send_json(200, {'results': to_json(predictor.predict_batch(request['inputs']))})
+            else:
+                self.send_json(200, {'result': to_json(predictor.predict_batch([request])[0])})
+        except Exception as e:
+            self.send_json(500, {'error': "%s: %s" % (e.__class__.__name__, e)})
+
+    def log_message(self, format, *args) -> None:
+        # prefix log messages with the worker id
+        http.server.BaseHTTPRequestHandler.log_message(self, "[%i] " % os.getpid() + format, *args)
+
+
+class PredictionServer(http.server.HTTPServer):
+    """ HTTP server holding the predictors. All workers accept connections on the same socket. """
+
+    request_queue_size = 128
+
+    def __init__(self, address:tuple, predictors:dict):
+        http.server.HTTPServer.__init__(self, address, PredictionHandler)
+        self.predictors = predictors
+
+
+def serve(predictors:dict, host:str ='127.0.0.1', port:int =8000, num_workers:int =None, num_threads:int =None) -> None:
+    """ Serve the predictors from num_workers forked worker processes. The models are loaded 
+        once in the parent and their parameters are moved to shared memory before forking, 
+        so all workers read the same weights instead of holding private copies. The cores
+        are partitioned between the workers through the number of torch threads per worker.
+    """
+    num_workers = num_workers or os.cpu_count()
+    num_threads = num_threads or max(os.cpu_count() // num_workers, 1)
+    # create server socket in parent to share it with all workers
+    # port 0 lets the os pick an unused port
+    server = PredictionServer((host, port), predictors)
+    host, port = server.server_address[:2]
+    # move parameters to shared memory
+    for predictor in predictors.values():
+        predictor.model.share_memory()
+    # move all objects to the permanent generation so the garbage collector
+    # of the workers does not write to pages shared with the parent
+    gc.freeze()
+
+    workers = []
+    for _ in range(num_workers):
+        pid = os.fork()
+        if pid == 0:
+            # worker process
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            torch.set_num_threads(num_threads)
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        workers.append(pid)
+    print("Serving %s on http://%s:%i with %i workers and %i threads each" % (', '.join(predictors.keys()), host, port, num_workers, num_threads), flush=True)
+
+    # stop workers when the parent is terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for pid in workers:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        server.server_close()
+
+
+if __name__ == '__main__':
+
+    # import predictor factories
+    from predict import PREDICTORS
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="Serve the task predictors from multiple worker processes.")
+    parser.add_argument("--tasks", type=str, nargs='*', default=None, help="Tasks to serve, defaults to all tasks in predict.py")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes, defaults to the number of cores")
+    parser.add_argument("--threads", type=int, default=None, help="Number of torch threads per worker, defaults to cores divided by workers")
+    args = parser.parse_args()
+
+    # load all predictors once in the parent process
+    tasks = args.tasks or list(PREDICTORS.keys())
+    predictors = {task: PREDICTORS[task]() for task in tasks}
+    # serve
+    serve(predictors, host=args.host, port=args.port, num_workers=args.workers, num_threads=args.threads)
@@ -10,10 +10,16 @@ class AspectBasedSentimentAnalysisPredictor(BasePredictor):
 
     BASE_MODEL_TYPE = AspectBasedSentimentAnalysisModel
     BASE_DATASET_TYPE = AspectBasedSentimentAnalysisDataset
+    # example inputs used to trace the model
+    EXAMPLE_INPUTS = [
+        {'text': "The waiter forgot what we ordered.", 'aspect_terms': ["service"]},
+        {'text': "The coffee was hot and tasty.", 'aspect_terms': ["food", "drinks"]}
+    ]
 
     def postprocess(self, logits, *additionals):
         # get numpy array of all posible labels
-        labels = np.array(self.dataset_type.LABELS)
+        # prefer the labels the model was trained with
+        labels = np.array(self.labels or self.dataset_type.LABELS)
         # get predicted label
         pred = logits.max(dim=-1)[1].cpu().numpy()
         label = labels[pred]
@@ -3,11 +3,8 @@ import torch
 # import base model, tokenizer and dataset
 from .models import AspectBasedSentimentAnalysisModel
 from .datasets import AspectBasedSentimentAnalysisDataset
-# import base trainer and metrics
+# import base trainer
 from core.Trainer import SimpleTrainer
-from sklearn.metrics import f1_score
-# import matplotlib
-from matplotlib import pyplot as plt
 
 class AspectBasedSentimentAnalysisTrainer(SimpleTrainer):
 
@@ -21,17 +18,33 @@ class AspectBasedSentimentAnalysisTrainer(SimpleTrainer):
         pretrained_name:str =None,
         model_kwargs:dict ={},
         device:str ='cpu',
+        fast_tokenizer:bool =False,
+        precision:str ='fp32',
+        gradient_checkpointing:bool =False,
         # data
         dataset_type:torch.utils.data.Dataset =None,
         data_base_dir:str ='./data',
         seq_length:int =None,
         batch_size:int =None,
+        micro_batch_size:int =None,
+        cache_dir:str =None,
+        memory_map:bool =False,
+        streaming:bool =False,
+        shuffle_buffer_size:int =1024,
+        num_build_workers:int =0,
+        dynamic_padding:bool =False,
+        max_tokens:int =None,
+        num_workers:int =0,
+        prefetch_factor:int =None,
+        persistent_workers:bool =False,
+        worker_threads:int =1,
         # optimizer
         learning_rate:float =None,
         weight_decay:float =None,
     ):
         # update model kwargs
-        model_kwargs.update({'num_labels': dataset_type.num_labels})
+        # the labels are saved with the model configuration
+        model_kwargs.update({'num_labels': dataset_type.num_labels, 'id2label': dict(enumerate(dataset_type.LABELS))})
         # initialize trainer
         SimpleTrainer.__init__(self, 
             # model
@@ -39,6 +52,9 @@ class AspectBasedSentimentAnalysisTrainer(SimpleTrainer):
             pretrained_name=pretrained_name,
             model_kwargs=model_kwargs,
             device=device,
+            fast_tokenizer=fast_tokenizer,
+            precision=precision,
+            gradient_checkpointing=gradient_checkpointing,
             # optimizer
             learning_rate=learning_rate,
             weight_decay=weight_decay,
@@ -46,6 +62,18 @@ class AspectBasedSentimentAnalysisTrainer(SimpleTrainer):
             dataset_type=dataset_type,
             data_base_dir=data_base_dir,
             seq_length=seq_length,
-            batch_size=batch_size
+            batch_size=batch_size,
+            micro_batch_size=micro_batch_size,
+            cache_dir=cache_dir,
+            memory_map=memory_map,
+            streaming=streaming,
+            shuffle_buffer_size=shuffle_buffer_size,
+            num_build_workers=num_build_workers,
+            dynamic_padding=dynamic_padding,
+            max_tokens=max_tokens,
+            num_workers=num_workers,
+            prefetch_factor=prefetch_factor,
+            persistent_workers=persistent_workers,
+            worker_threads=worker_threads
         )
     
\ No newline at end of file
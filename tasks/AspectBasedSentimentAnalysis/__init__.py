@@ -0,0 +1,19 @@
+""" Aspect-based Sentiment Analysis Task """
+from core.Task import Task
+
+# all types are given by their qualified names and only imported on access
+task = Task(
+    predictor_type="tasks.AspectBasedSentimentAnalysis.Predictor:AspectBasedSentimentAnalysisPredictor",
+    trainer_type="tasks.AspectBasedSentimentAnalysis.Trainer:AspectBasedSentimentAnalysisTrainer",
+    base_model_type="tasks.AspectBasedSentimentAnalysis.models:AspectBasedSentimentAnalysisModel",
+    base_dataset_type="tasks.AspectBasedSentimentAnalysis.datasets:AspectBasedSentimentAnalysisDataset"
+)
+
+# register models
+task.register_model("BertForSentencePairClassification", "tasks.AspectBasedSentimentAnalysis.models:BertForSentencePairClassification")
+task.register_model("BertCapsuleNetwork", "tasks.AspectBasedSentimentAnalysis.models:BertCapsuleNetwork")
+# register datasets
+task.register_dataset("SemEval2014Task4", "tasks.AspectBasedSentimentAnalysis.datasets:SemEval2014Task4")
+task.register_dataset("SemEval2014Task4_Restaurants", "tasks.AspectBasedSentimentAnalysis.datasets:SemEval2014Task4_Restaurants")
+task.register_dataset("SemEval2014Task4_Laptops", "tasks.AspectBasedSentimentAnalysis.datasets:SemEval2014Task4_Laptops")
+task.register_dataset("SemEval2014Task4_Category", "tasks.AspectBasedSentimentAnalysis.datasets:SemEval2014Task4_Category")
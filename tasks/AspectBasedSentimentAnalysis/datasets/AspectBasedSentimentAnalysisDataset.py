@@ -13,15 +13,17 @@ class AspectBasedSentimentAnalysisDataset(BaseDataset, metaclass=__AspectBasedSe
 
     # list of all labels
     LABELS = []
+    # the first item feature is the text
+    ENCODES_TEXT = True
 
     def yield_item_features(self, train:bool, data_base_dir:str ='./data'):
         raise NotImplementedError()
 
     @classmethod
-    def build_dataset_item(cls, text:str, aspect_terms:list, labels:list =None, tokenizer=None):
+    def build_dataset_item(cls, text:str, aspect_terms:list, labels:list =None, tokenizer=None, encoding:tuple =None):
             
         # tokenize text and aspect terms
-        input_ids = tokenizer.encode(text)
+        input_ids = tokenizer.build_inputs_with_special_tokens(encoding[0]) if encoding is not None else tokenizer.encode(text)
         aspects_token_ids = [tokenizer.encode(term) for term in aspect_terms]
 
         # build labels
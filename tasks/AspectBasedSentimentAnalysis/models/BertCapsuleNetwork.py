@@ -7,7 +7,7 @@ from .AspectBasedSentimentAnalysisModel import AspectBasedSentimentAnalysisModel
 # import dataset
 from ..datasets import AspectBasedSentimentAnalysisDataset
 # import utils
-from core.utils import align_shape
+from core.utils import pad_sequences
 
 
 """ Custom Configuration """
@@ -94,6 +94,8 @@ class BilinearAttention(nn.Module):
 """ Bert Capsule Module """
 
 def squash(x, dim=-1):
+    # compute norms in full precision, also when running in bf16
+    x = x.float()
     squared = (x * x).sum(dim=dim, keepdim=True)
     scale = torch.sqrt(squared) / (1.0 + squared)
     return scale * x
@@ -105,6 +107,8 @@ class BertCapsuleNetwork(AspectBasedSentimentAnalysisModel, BertModel):
 
     # set config class for bert model
     config_class = BertCapsuleNetworkConfig
+    # token ids and token type ids are padded along the sequence
+    SEQUENCE_FEATURES = (0, 1)
 
     def __init__(self, config:BertConfig):
         # initialize bert model
@@ -143,11 +147,8 @@ class BertCapsuleNetwork(AspectBasedSentimentAnalysisModel, BertModel):
         # tokenize labels
         label_tokens = [tokenizer.tokenize(label) for label in labels]
         label_ids = [tokenizer.convert_tokens_to_ids(tokens) for tokens in label_tokens]
-        # create input ids for model
-        shape = (len(labels), max((len(ids) for ids in label_ids)))
-        input_ids = align_shape(label_ids, shape, tokenizer.pad_token_id)
         # create input tensors
-        input_ids = torch.LongTensor(input_ids)
+        input_ids = pad_sequences(label_ids, fill_value=tokenizer.pad_token_id)
         attention_mask = torch.LongTensor((input_ids != tokenizer.pad_token_id).long())
         input_ids, attention_mask = input_ids.to(self.device), attention_mask.to(self.device)
         # pass through model
@@ -188,9 +189,9 @@ class BertCapsuleNetwork(AspectBasedSentimentAnalysisModel, BertModel):
         # choose minimal sequence length to fit all examples
         if seq_length is None:
             seq_length = max((len(ids) for ids in sentence_pairs), default=0)
-        # convert to tensors
-        sentence_pairs = torch.LongTensor(align_shape(sentence_pairs, (len(sentence_pairs), seq_length), tokenizer.pad_token_id))
-        token_type_ids = torch.LongTensor(align_shape(token_type_ids, (len(token_type_ids), seq_length), tokenizer.pad_token_id))
+        # fill and convert to tensors
+        sentence_pairs = pad_sequences(sentence_pairs, seq_length, tokenizer.pad_token_id)
+        token_type_ids = pad_sequences(token_type_ids, seq_length, tokenizer.pad_token_id)
         labels = torch.LongTensor(labels) if labels is not None else None
         # return items
         return sentence_pairs, token_type_ids, labels
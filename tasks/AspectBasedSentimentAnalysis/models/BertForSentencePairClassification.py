@@ -3,13 +3,16 @@ import torch
 from transformers import BertForSequenceClassification
 from .AspectBasedSentimentAnalysisModel import AspectBasedSentimentAnalysisModel
 # import utils
-from core.utils import align_shape
+from core.utils import pad_sequences
 
 class BertForSentencePairClassification(AspectBasedSentimentAnalysisModel, BertForSequenceClassification):
     """ Implementation of "Utilizing BERT for Aspect-Based Sentiment Analysis via Constructing Auxiliary Sentence" (NAACL 2019)
         Paper: https://arxiv.org/abs/1903.09588
     """
 
+    # token ids and token type ids are padded along the sequence
+    SEQUENCE_FEATURES = (0, 1)
+
     def build_feature_tensors(self, input_ids, aspects_token_ids, labels, seq_length=None, tokenizer=None) -> list:
         # one label per entity span
         assert (labels is None) or (len(aspects_token_ids) == len(labels))
@@ -36,9 +39,9 @@ class BertForSentencePairClassification(AspectBasedSentimentAnalysisModel, BertF
         # choose minimal sequence length to fit all examples
         if seq_length is None:
             seq_length = max((len(ids) for ids in sentence_pairs), default=0)
-        # convert to tensors
-        sentence_pairs = torch.LongTensor(align_shape(sentence_pairs, (len(sentence_pairs), seq_length), tokenizer.pad_token_id))
-        token_type_ids = torch.LongTensor(align_shape(token_type_ids, (len(token_type_ids), seq_length), tokenizer.pad_token_id))
+        # fill and convert to tensors
+        sentence_pairs = pad_sequences(sentence_pairs, seq_length, tokenizer.pad_token_id)
+        token_type_ids = pad_sequences(token_type_ids, seq_length, tokenizer.pad_token_id)
         labels = torch.LongTensor(labels) if labels is not None else None
         # return items
         return sentence_pairs, token_type_ids, labels
@@ -4,23 +4,42 @@ from core.Predictor import BasePredictor
 from .models import AspectOpinionExtractionModel
 from .datasets import AspectOpinionExtractionDataset
 # import utils
-from core.utils import build_token_spans, get_spans_from_bio_scheme
+from core.utils import get_spans_from_bio_scheme
 
 
 class AspectOpinionExtractionPredictor(BasePredictor):
 
     BASE_MODEL_TYPE = AspectOpinionExtractionModel
     BASE_DATASET_TYPE = AspectOpinionExtractionDataset
+    # example inputs used to trace the model
+    EXAMPLE_INPUTS = [
+        "The coffee was hot and tasty.",
+        "The waiter forgot what we ordered."
+    ]
+    # results hold the aspect and opinion terms of the text
+    NORMALIZE_CACHE_KEYS = False
 
-    def predict(self, text, *args, **kwargs):
-        # predict
-        aspect_token_spans, opinion_token_spans = BasePredictor.predict(self, text, *args, **kwargs)
-        # build token spans
-        tokens = self.tokenizer.tokenize(text)
-        spans = build_token_spans(tokens, text)
+    def predict_spans_batch(self, texts:list, batch_size:int =32, context=None) -> list:
+        """ Predict the character spans of the aspects and opinions of multiple texts """
+        outputs, texts, context = self.predict_outputs(texts, batch_size=batch_size, context=context)
+        return [self.postprocess_spans(out, text, context) if out is not None else ([], []) for out, text in zip(outputs, texts)]
+
+    def postprocess_spans(self, outputs, text, context) -> tuple:
+        # predict token spans
+        aspect_token_spans, opinion_token_spans = self.postprocess(*outputs)
+        # get character spans of the tokens from the tokenization of the request
+        _, spans = context[text]
+        # build character spans of aspects and opinions
+        aspect_spans = [(spans[s][0], spans[e-1][1]) for s, e in aspect_token_spans]
+        opinion_spans = [(spans[s][0], spans[e-1][1]) for s, e in opinion_token_spans]
+        # return
+        return aspect_spans, opinion_spans
+
+    def postprocess_input(self, outputs, text, context):
         # get aspect and opinion terms
-        aspect_terms = [text[spans[s][0]:spans[e-1][1]] for s, e in aspect_token_spans]
-        opinion_terms = [text[spans[s][0]:spans[e-1][1]] for s, e in opinion_token_spans]
+        aspect_spans, opinion_spans = self.postprocess_spans(outputs, text, context)
+        aspect_terms = [text[b:e] for b, e in aspect_spans]
+        opinion_terms = [text[b:e] for b, e in opinion_spans]
         
         # return
         return aspect_terms, opinion_terms
@@ -6,8 +6,6 @@ from .datasets import AspectOpinionExtractionDataset
 # import base trainer and metrics
 from core.Trainer import BaseTrainer
 from sklearn.metrics import f1_score
-# import matplotlib
-from matplotlib import pyplot as plt
 
 
 class AspectOpinionExtractionTrainer(BaseTrainer):
@@ -18,7 +16,7 @@ class AspectOpinionExtractionTrainer(BaseTrainer):
 
     def predict_batch(self, *batch) -> tuple:
         # predict on batch
-        outputs, (labels_a, labels_o) = self.model.preprocess_and_predict(*batch, tokenizer=self.tokenizer, device=self.device)
+        outputs, (labels_a, labels_o) = self.preprocess_and_predict(*batch)
         loss, logits_a, logits_o = outputs[0], outputs[1], outputs[2]
         labels_a, labels_o = labels_a.to(self.device), labels_o.to(self.device)
         # get the valid labels and logits
@@ -39,6 +37,7 @@ class AspectOpinionExtractionTrainer(BaseTrainer):
         return macro_f1_aspects, macro_f1_opinions
 
     def plot(self, figsize=(8, 5)):
+        from matplotlib import pyplot as plt
         # create figure
         fig, (loss_ax, f1_ax) = plt.subplots(2, 1, figsize=figsize, sharex=True)
         # plot train and test loss
@@ -0,0 +1,16 @@
+""" Aspect-Opinion Extraction Task """
+from core.Task import Task
+
+# all types are given by their qualified names and only imported on access
+task = Task(
+    predictor_type="tasks.AspectOpinionExtraction.Predictor:AspectOpinionExtractionPredictor",
+    trainer_type="tasks.AspectOpinionExtraction.Trainer:AspectOpinionExtractionTrainer",
+    base_model_type="tasks.AspectOpinionExtraction.models:AspectOpinionExtractionModel",
+    base_dataset_type="tasks.AspectOpinionExtraction.datasets:AspectOpinionExtractionDataset"
+)
+
+# register models
+task.register_model("BertForAspectOpinionExtraction", "tasks.AspectOpinionExtraction.models:BertForAspectOpinionExtraction")
+# register datasets
+task.register_dataset("SemEval2015Task12", "tasks.AspectOpinionExtraction.datasets:SemEval2015Task12")
+task.register_dataset("GermanYelpDataset", "tasks.AspectOpinionExtraction.datasets:GermanYelpDataset")
@@ -1,29 +1,29 @@
-import os
-import pandas as pd
 # import base dataset
 from .AspectOpinionExtractionDataset import AspectOpinionExtractionDataset
+# import shared german yelp corpus
+from core.GermanYelp import GermanYelp
 
 
 class GermanYelpDataset(AspectOpinionExtractionDataset):
 
-    ANNOTATIONS_FILE = "GermanYelp/annotations.csv"
-    SENTENCES_FILE = "GermanYelp/sentences.txt"
+    ANNOTATIONS_FILE = GermanYelp.ANNOTATIONS_FILE
+    SENTENCES_FILE = GermanYelp.SENTENCES_FILE
 
     def yield_item_features(self, train:bool, data_base_dir:str ='./data'):
 
-        # load annotations and sentences
-        annotations = pd.read_csv(os.path.join(data_base_dir, GermanYelpDataset.ANNOTATIONS_FILE), sep="\t", index_col=0)
-        sentences = open(os.path.join(data_base_dir, GermanYelpDataset.SENTENCES_FILE), 'r', encoding='utf-8').read().split('\n')[:-1]
+        # load corpus
+        corpus = GermanYelp.load(data_base_dir)
         # separate all sentences into training and testing sentences
-        n_train_samples = int(len(sentences) * 0.8)
+        n_train_samples = int(len(corpus.sentences) * 0.8)
         
-        for k, group in annotations.groupby('SentenceID'):
+        for k in sorted(corpus.sentence_ids):
             # only load train or test data, not both
             if ((k < n_train_samples) and not train) or ((k >= n_train_samples) and train):
                 continue
             # read sentence, aspects and opinions
-            sentence = sentences[k]
-            aspects = [eval(span) for span in group['Aspect'].dropna().unique()]
-            opinions = [eval(span) for span in group['Opinion'].dropna().unique()]
+            sentence = corpus.sentences[k]
+            annotations = corpus.sentence_annotations(k)
+            aspects = list(dict.fromkeys(a for _, a, _, _ in annotations if a is not None))
+            opinions = list(dict.fromkeys(o for _, _, o, _ in annotations if o is not None))
             # yield item features
             yield sentence, aspects, opinions
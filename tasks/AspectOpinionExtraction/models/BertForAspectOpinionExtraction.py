@@ -6,10 +6,17 @@ from .AspectOpinionExtractionModel import AspectOpinionExtractionModel
 from transformers import BertConfig
 from transformers import BertForTokenClassification
 # import utils
-from core.utils import align_shape
+from core.utils import pad_sequences
 
 class BertForAspectOpinionExtraction(AspectOpinionExtractionModel, BertForTokenClassification):
 
+    # token ids and bio-schemes are padded along the sequence
+    SEQUENCE_FEATURES = (0, 1, 2)
+    # aspect and opinion logits are predicted per token
+    SEQUENCE_OUTPUTS = (0, 1)
+    # aspect and opinion bio-schemes label the same tokens
+    LABEL_FEATURE = 1
+
     def __init__(self, config:BertConfig):
         # number of labels to predict is 3+3 = 6
         # BIO-Scheme for aspects and opinions separately
@@ -19,16 +26,10 @@ class BertForAspectOpinionExtraction(AspectOpinionExtractionModel, BertForTokenC
 
     def build_feature_tensors(self, input_ids, aspect_bio, opinion_bio, seq_length=None, tokenizer=None):
 
-        # fill sequence length
-        if seq_length is not None:
-            input_ids = align_shape(input_ids, (seq_length,), tokenizer.pad_token_id)
-            aspect_bio = align_shape(aspect_bio, (seq_length,), -1) if aspect_bio is not None else None
-            opinion_bio = align_shape(opinion_bio, (seq_length,), -1) if opinion_bio is not None else None
-
-        # convert to tensors
-        input_ids = torch.LongTensor([input_ids])
-        aspect_bio = torch.LongTensor([aspect_bio]) if aspect_bio is not None else None
-        opinion_bio = torch.LongTensor([opinion_bio]) if opinion_bio is not None else None
+        # fill sequence length and convert to tensors
+        input_ids = pad_sequences([input_ids], seq_length, tokenizer.pad_token_id)
+        aspect_bio = pad_sequences([aspect_bio], seq_length, -1) if aspect_bio is not None else None
+        opinion_bio = pad_sequences([opinion_bio], seq_length, -1) if opinion_bio is not None else None
         # return feature tensors
         return input_ids, aspect_bio, opinion_bio
 
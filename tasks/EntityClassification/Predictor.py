@@ -10,10 +10,16 @@ class EntityClassificationPredictor(BasePredictor):
 
     BASE_MODEL_TYPE = EntityClassificationModel
     BASE_DATASET_TYPE = EntityClassificationDataset
+    # example inputs used to trace the model
+    EXAMPLE_INPUTS = [
+        {'text': "Nasa sends names into space.", 'entity_spans': [(11, 16), (22, 27)]},
+        {'text': "The coffee was hot and tasty.", 'entity_spans': [(4, 10), (15, 18), (23, 28)]}
+    ]
 
     def postprocess(self, logits, *additionals):
         # get numpy array of all posible labels
-        labels = np.array(self.dataset_type.LABELS)
+        # prefer the labels the model was trained with
+        labels = np.array(self.labels or self.dataset_type.LABELS)
         # get predicted label
         pred = logits.max(dim=-1)[1].cpu().numpy()
         label = labels[pred]
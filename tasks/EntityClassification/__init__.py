@@ -0,0 +1,23 @@
+""" Entity Classification Task """
+from core.Task import Task
+
+# all types are given by their qualified names and only imported on access
+task = Task(
+    predictor_type="tasks.EntityClassification.Predictor:EntityClassificationPredictor",
+    trainer_type="tasks.EntityClassification.Trainer:EntityClassificationTrainer",
+    base_model_type="tasks.EntityClassification.models:EntityClassificationModel",
+    base_dataset_type="tasks.EntityClassification.datasets:EntityClassificationDataset"
+)
+
+# register models
+task.register_model("BertForEntityClassification", "tasks.EntityClassification.models:BertForEntityClassification")
+task.register_model("BertForSentencePairClassification", "tasks.EntityClassification.models:BertForSentencePairClassification")
+task.register_model("BertCapsuleNetwork", "tasks.EntityClassification.models:BertCapsuleNetwork")
+# register datasets
+task.register_dataset("GermanYelp_OpinionPolarity", "tasks.EntityClassification.datasets:GermanYelp_OpinionPolarity")
+task.register_dataset("GermanYelp_AspectPolarity", "tasks.EntityClassification.datasets:GermanYelp_AspectPolarity")
+task.register_dataset("SemEval2015Task12_AspectPolarity", "tasks.EntityClassification.datasets:SemEval2015Task12_AspectPolarity")
+task.register_dataset("SemEval2015Task12_OpinionPolarity", "tasks.EntityClassification.datasets:SemEval2015Task12_OpinionPolarity")
+task.register_dataset("SemEval2014Task4", "tasks.EntityClassification.datasets:SemEval2014Task4")
+task.register_dataset("SemEval2014Task4_Laptops", "tasks.EntityClassification.datasets:SemEval2014Task4_Laptops")
+task.register_dataset("SemEval2014Task4_Restaurants", "tasks.EntityClassification.datasets:SemEval2014Task4_Restaurants")
@@ -1,7 +1,7 @@
 # import base dataset and tokenizer
 from core.Dataset import BaseDataset
 # import utils
-from core.utils import build_token_spans
+from core.utils import encode_with_spans
 
 class __EntityClassificationDatasetType(type):
 
@@ -15,12 +15,14 @@ class EntityClassificationDataset(BaseDataset, metaclass=__EntityClassificationD
 
     # list of all labels
     LABELS = []
+    # the first item feature is the text
+    ENCODES_TEXT = True
 
     def yield_item_features(self, train:bool, data_base_dir:str ='./data'):
         raise NotImplementedError()
 
     @classmethod
-    def build_dataset_item(cls, text:str, entity_spans:list, labels:list =None, tokenizer=None):
+    def build_dataset_item(cls, text:str, entity_spans:list, labels:list =None, tokenizer=None, encoding:tuple =None):
 
         if labels is not None:
             # exactly one label per entity
@@ -28,9 +30,8 @@ class EntityClassificationDataset(BaseDataset, metaclass=__EntityClassificationD
             # build label-to-id map
             label2id = {l: i for i, l in enumerate(cls.LABELS)}
         
-        # tokenize text
-        tokens = tokenizer.tokenize(text)
-        input_ids = tokenizer.convert_tokens_to_ids(tokens)
+        # tokenize text and build token spans
+        input_ids, token_spans = encoding if encoding is not None else encode_with_spans(text, tokenizer)
 
         if len(entity_spans) == 0:
             return input_ids, [], []
@@ -42,8 +43,6 @@ class EntityClassificationDataset(BaseDataset, metaclass=__EntityClassificationD
         # remove entities that overlap
         entity_spans = [entity_spans[0]] + [(b, e) for i, (b, e) in enumerate(entity_spans[1:]) if entity_spans[i][1] <= b]
 
-        # build token spans
-        token_spans = build_token_spans(tokens, text)
         # build entity token spans
         entity_token_spans, entity_id = [[-1, -1] for _ in range(len(entity_spans))], 0
         for i, (token_b, token_e) in enumerate(token_spans):
@@ -1,13 +1,11 @@
-import os
-# import numpy and pandas
-import numpy as np
-import pandas as pd
 # import base dataset
 from .EntityClassificationDataset import EntityClassificationDataset
+# import shared german yelp corpus
+from core.GermanYelp import GermanYelp
 
 class __GermanYelp_Base(EntityClassificationDataset):
-    ANNOTATIONS_FILE = "GermanYelp/annotations.csv"
-    SENTENCES_FILE = "GermanYelp/sentences.txt"
+    ANNOTATIONS_FILE = GermanYelp.ANNOTATIONS_FILE
+    SENTENCES_FILE = GermanYelp.SENTENCES_FILE
     # entity labels
     LABELS = ["positive", "negative"]
 
@@ -15,28 +13,23 @@ class __GermanYelp_Base(EntityClassificationDataset):
 class GermanYelp_OpinionPolarity(__GermanYelp_Base):
 
     def yield_item_features(self, train:bool, data_base_dir:str) -> iter:
-        # load annotations and sentences
-        annotations = pd.read_csv(os.path.join(data_base_dir, GermanYelp_OpinionPolarity.ANNOTATIONS_FILE), sep="\t", index_col=0)
-        sentences = open(os.path.join(data_base_dir, GermanYelp_OpinionPolarity.SENTENCES_FILE), 'r', encoding='utf-8').read().split('\n')[:-1]
+        # load corpus
+        corpus = GermanYelp.load(data_base_dir)
         # separate all sentences into training and testing sentences
-        n_train_samples = int(len(sentences) * 0.8)
+        n_train_samples = int(len(corpus.sentences) * 0.8)
 
-        for sent_id in annotations['SentenceID'].unique():
+        for sent_id in corpus.sentence_ids:
             # only load train or test data, not both
             if ((sent_id < n_train_samples) and not train) or ((sent_id >= n_train_samples) and train):
                 continue
             # get sentence
-            sent = sentences[sent_id]
-            # get all annotations of the current sentence
-            sent_annotations = annotations[annotations['SentenceID'] == sent_id]
-            opinions = sent_annotations['Opinion']
-            opinions = sent_annotations[opinions == opinions]
-            opinions, polarities = opinions['Opinion'].values, opinions['Sentiment'].values
-            # remove double opinions
-            opinions, unique_idx = np.unique(opinions, return_index=True)
-            polarities = polarities[unique_idx]
-            # convert strings to tuples
-            opinions = list(map(eval, opinions))
+            sent = corpus.sentences[sent_id]
+            # get all unique opinions of the current sentence and their polarities
+            opinion_polarities = {}
+            for _, _, opinion, sentiment in corpus.sentence_annotations(sent_id):
+                if (opinion is not None) and (opinion not in opinion_polarities):
+                    opinion_polarities[opinion] = sentiment
+            opinions, polarities = list(opinion_polarities.keys()), list(opinion_polarities.values())
 
             # yield features for this item
             yield sent, opinions, polarities
@@ -45,35 +38,28 @@ class GermanYelp_OpinionPolarity(__GermanYelp_Base):
 class GermanYelp_AspectPolarity(__GermanYelp_Base):
 
     def yield_item_features(self, train:bool, data_base_dir:str ='./data') -> iter:
-        # load annotations and sentences
-        annotations = pd.read_csv(os.path.join(data_base_dir, GermanYelp_OpinionPolarity.ANNOTATIONS_FILE), sep="\t", index_col=0)
-        sentences = open(os.path.join(data_base_dir, GermanYelp_OpinionPolarity.SENTENCES_FILE), 'r', encoding='utf-8').read().split('\n')[:-1]
-        # remove all non-relation annotations
-        annotations.dropna(inplace=True)
-        unique_sent_ids = annotations['SentenceID'].unique()
+        # load corpus
+        corpus = GermanYelp.load(data_base_dir)
+        # group all relation annotations by sentence
+        sent_relations = {}
+        for annotation in corpus.relations:
+            sent_relations.setdefault(annotation[0], []).append(annotation)
         # separate training and testing set
-        n_train_samples = int(len(unique_sent_ids) * 0.8)
-        for k, sent_id in enumerate(unique_sent_ids):
+        n_train_samples = int(len(sent_relations) * 0.8)
+        for k, (sent_id, relations) in enumerate(sent_relations.items()):
             # only load train or test data, not both
             if ((k < n_train_samples) and not train) or ((k >= n_train_samples) and train):
                 continue
-            # get sentence and it's annotations
-            sent = sentences[sent_id]
-            sent_annotations = annotations[annotations['SentenceID'] == sent_id]
-            # get aspects and sentiments
-            aspects, polarities = [], []
-            # group annotations by aspects
-            for aspect in sent_annotations['Aspect'].unique():
-                # get all annotations with the same aspect
-                aspect_annotations = sent_annotations[sent_annotations['Aspect'] == aspect]
-                # get polarity by majority
-                n_positives = (aspect_annotations['Sentiment'].values == GermanYelp_AspectPolarity.LABELS[0]).sum()
-                n_negatives = len(aspect_annotations.index) - n_positives
-                is_positive = (n_positives >= n_negatives)
-                polarity = GermanYelp_OpinionPolarity.LABELS[1 - int(is_positive)]
-                # add to lists
-                aspects.append(eval(aspect))
-                polarities.append(polarity)
+            # get sentence
+            sent = corpus.sentences[sent_id]
+            # count positive and negative relations of each aspect
+            n_positives, n_relations = {}, {}
+            for _, aspect, _, sentiment in relations:
+                n_positives[aspect] = n_positives.get(aspect, 0) + int(sentiment == GermanYelp_AspectPolarity.LABELS[0])
+                n_relations[aspect] = n_relations.get(aspect, 0) + 1
+            # get polarity by majority
+            aspects = list(n_relations.keys())
+            polarities = [GermanYelp_AspectPolarity.LABELS[1 - int(n_positives[a] >= n_relations[a] - n_positives[a])] for a in aspects]
 
             # yield item
             yield sent, aspects, polarities
@@ -1,8 +1,8 @@
 import os
-# import xml parser
-import xml.etree.ElementTree as ET
 # import base dataset
 from .EntityClassificationDataset import EntityClassificationDataset
+# import utils
+from core.utils import iterparse_elements
 
 class __SemEval2014Task4(EntityClassificationDataset):
 
@@ -13,20 +13,20 @@ class __SemEval2014Task4(EntityClassificationDataset):
     TEST_FILE = None
 
     def yield_item_features(self, train:bool, data_base_dir:str) -> iter:
-        
+        yield from self.yield_file_item_features(self.__class__, train, data_base_dir)
+
+    def yield_file_item_features(self, dataset_type:type, train:bool, data_base_dir:str) -> iter:
+        """ Yield the item features from the files of the given dataset type """
         # build full paths to files
-        fname = SemEval2014Task4.TRAIN_FILE if train else SemEval2014Task4.TEST_FILE
+        fname = dataset_type.TRAIN_FILE if train else dataset_type.TEST_FILE
         fpath = os.path.join(data_base_dir, fname)
-        # parse xml file
-        tree = ET.parse(fpath)
-        root = tree.getroot()
 
-        # parse all reviews
-        for sentence in root:
+        # stream all sentences of the xml file
+        for sentence in iterparse_elements(fpath, 'sentence'):
             # get sentence
             text = sentence.find('text').text
             # get aspect terms and labels
-            aspect_label_pairs = self.get_aspect_label_pairs(sentence)
+            aspect_label_pairs = dataset_type.get_aspect_label_pairs(self, sentence)
             aspect_spans, labels = zip(*aspect_label_pairs) if len(aspect_label_pairs) > 0 else ([], [])
             # yield item
             yield text, aspect_spans, labels
@@ -79,5 +79,5 @@ class SemEval2014Task4(SemEval2014Task4_Restaurants, SemEval2014Task4_Laptops):
     """
     def yield_item_features(self, train:bool, data_base_dir:str) -> iter:
         # yield from restaurant and from laptop dataset
-        yield from SemEval2014Task4_Restaurants.yield_item_features(self, train, data_base_dir)
-        yield from SemEval2014Task4_Laptops.yield_item_features(self, train, data_base_dir)
+        yield from self.yield_file_item_features(SemEval2014Task4_Restaurants, train, data_base_dir)
+        yield from self.yield_file_item_features(SemEval2014Task4_Laptops, train, data_base_dir)
@@ -1,8 +1,8 @@
 import os
-# import xml parser
-import xml.etree.ElementTree as ET
 # import base dataset
 from .EntityClassificationDataset import EntityClassificationDataset
+# import utils
+from core.utils import iterparse_elements
 
 
 class SemEval2015Task12_AspectPolarity(EntityClassificationDataset):
@@ -18,34 +18,29 @@ class SemEval2015Task12_AspectPolarity(EntityClassificationDataset):
     def yield_item_features(self, train:bool, data_base_dir:str ='./data'):
 
         # build full paths to files
-        fname = SemEval2015Task12_AspectSentiment.TRAIN_FILE if train else SemEval2015Task12_AspectSentiment.TEST_FILE
+        fname = SemEval2015Task12_AspectPolarity.TRAIN_FILE if train else SemEval2015Task12_AspectPolarity.TEST_FILE
         fpath = os.path.join(data_base_dir, fname)
 
-        # parse xml file
-        tree = ET.parse(fpath)
-        root = tree.getroot()
-        
-        # parse all reviews
-        for review in root:
-            for sent in review[0].findall('sentence'):
-                # get sentence
-                text = sent.find('text').text
-                # find opinions
-                opinions = sent.find('Opinions')
-                if opinions is None:
-                    continue
-                # get aspects and sentiments
-                aspects = [(int(o.attrib['from']), int(o.attrib['to'])) for o in opinions]
-                sentiments = [o.attrib['polarity'] for o in opinions]
-                # remove unvalids - no aspect target
-                sentiments = [s for s, (b, e) in zip(sentiments, aspects) if b < e]
-                aspects = [(b, e) for (b, e) in aspects if b < e]
-                # no aspects found
-                if len(aspects) == 0:
-                    continue
-                
-                # build dataset item
-                yield text, aspects, sentiments
+        # stream all sentences of all reviews
+        for sent in iterparse_elements(fpath, 'sentence'):
+            # get sentence
+            text = sent.find('text').text
+            # find opinions
+            opinions = sent.find('Opinions')
+            if opinions is None:
+                continue
+            # get aspects and sentiments
+            aspects = [(int(o.attrib['from']), int(o.attrib['to'])) for o in opinions]
+            sentiments = [o.attrib['polarity'] for o in opinions]
+            # remove unvalids - no aspect target
+            sentiments = [s for s, (b, e) in zip(sentiments, aspects) if b < e]
+            aspects = [(b, e) for (b, e) in aspects if b < e]
+            # no aspects found
+            if len(aspects) == 0:
+                continue
+            
+            # build dataset item
+            yield text, aspects, sentiments
 
 
 
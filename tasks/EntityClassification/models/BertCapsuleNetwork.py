@@ -5,7 +5,7 @@ from ...AspectBasedSentimentAnalysis.models import BertCapsuleNetwork as BaseMod
 # import dataset
 from ..datasets import EntityClassificationDataset
 # import utils
-from core.utils import align_shape
+from core.utils import pad_sequences
 
 class BertCapsuleNetwork(EntityClassificationModel, BaseModel):
     """ "A Challenge Dataset and Effective Models for Aspect-Based Sentiment Analysis"
@@ -37,9 +37,9 @@ class BertCapsuleNetwork(EntityClassificationModel, BaseModel):
         # choose minimal sequence length to fit all examples
         if seq_length is None:
             seq_length = max((len(ids) for ids in sentence_pairs), default=0)
-        # convert to tensors
-        sentence_pairs = torch.LongTensor(align_shape(sentence_pairs, (len(sentence_pairs), seq_length), tokenizer.pad_token_id))
-        token_type_ids = torch.LongTensor(align_shape(token_type_ids, (len(token_type_ids), seq_length), tokenizer.pad_token_id))
+        # fill and convert to tensors
+        sentence_pairs = pad_sequences(sentence_pairs, seq_length, tokenizer.pad_token_id)
+        token_type_ids = pad_sequences(token_type_ids, seq_length, tokenizer.pad_token_id)
         labels = torch.LongTensor(labels) if labels is not None else None
         # return items
         return sentence_pairs, token_type_ids, labels
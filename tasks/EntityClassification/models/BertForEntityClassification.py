@@ -6,20 +6,17 @@ import torch.nn.functional as F
 from .EntityClassificationModel import EntityClassificationModel
 # import Bert Model and Tokenizer
 from transformers import BertModel, BertPreTrainedModel
-from transformers import BertTokenizer
+from transformers import BertTokenizer, BertTokenizerFast
 # import dataset
 from ..datasets import EntityClassificationDataset
 # import utils
-from core.utils import align_shape, train_default_kwargs, eval_default_kwargs
+from core.utils import pad_sequences, train_default_kwargs, eval_default_kwargs
 
-class BertForEntityClassificationTokenizer(BertTokenizer):
-    """ Tokenizer for the Bert Entity Classification Model """
+class __EntityMarkerTokens(object):
+    """ Entity marker tokens shared by the slow and fast tokenizer """
 
-    def __init__(self, *args, **kwargs) -> None:
-        # initialize tokenizer
-        BertTokenizer.__init__(self, *args, **kwargs)
-        # add entity marker tokens
-        self.add_tokens(['[e]', '[/e]'])
+    # entity marker tokens
+    MARKER_TOKENS = ['[e]', '[/e]']
 
     @property
     def entity_token_id(self) -> int:
@@ -28,11 +25,30 @@ class BertForEntityClassificationTokenizer(BertTokenizer):
     def _entity_token_id(self) -> int:
         return self.convert_tokens_to_ids('[/e]')
 
+class BertForEntityClassificationTokenizer(__EntityMarkerTokens, BertTokenizer):
+    """ Tokenizer for the Bert Entity Classification Model """
+
+    def __init__(self, *args, **kwargs) -> None:
+        # initialize tokenizer
+        BertTokenizer.__init__(self, *args, **kwargs)
+        # add entity marker tokens
+        self.add_tokens(self.MARKER_TOKENS)
+
+class BertForEntityClassificationTokenizerFast(__EntityMarkerTokens, BertTokenizerFast):
+    """ Fast Tokenizer for the Bert Entity Classification Model """
+
+    def __init__(self, *args, **kwargs) -> None:
+        # initialize tokenizer
+        BertTokenizerFast.__init__(self, *args, **kwargs)
+        # add entity marker tokens
+        self.add_tokens(self.MARKER_TOKENS)
+
 
 class BertForEntityClassification(EntityClassificationModel, BertPreTrainedModel):
 
-    # set tokenizer type
+    # set tokenizer types
     TOKENIZER_TYPE = BertForEntityClassificationTokenizer
+    FAST_TOKENIZER_TYPE = BertForEntityClassificationTokenizerFast
 
     def __init__(self, config):
         BertPreTrainedModel.__init__(self, config)
@@ -66,14 +82,10 @@ class BertForEntityClassification(EntityClassificationModel, BertPreTrainedModel
             # get entity start id
             entity_starts.insert(0, b + 2 * i)
 
-        # fill tensors
-        input_ids = align_shape(input_ids, (seq_length,), tokenizer.pad_token_id) if seq_length is not None else input_ids
-        entity_starts = align_shape(entity_starts, (max_entities,), -1) if max_entities is not None else entity_starts
-        labels = align_shape(labels, (max_entities,), -1) if labels is not None else None
-        # convert to tensors
-        input_ids = torch.LongTensor([input_ids])
-        entity_starts = torch.LongTensor([entity_starts])
-        labels = torch.LongTensor([labels]) if labels is not None else None
+        # fill and convert to tensors
+        input_ids = pad_sequences([input_ids], seq_length, tokenizer.pad_token_id)
+        entity_starts = pad_sequences([entity_starts], max_entities, -1)
+        labels = pad_sequences([labels], max_entities, -1) if labels is not None else None
         # return features tensors
         return input_ids, entity_starts, labels
 
@@ -3,7 +3,7 @@ import torch
 from .EntityClassificationModel import EntityClassificationModel
 from ...AspectBasedSentimentAnalysis.models import BertForSentencePairClassification as BaseModel
 # import utils
-from core.utils import align_shape
+from core.utils import pad_sequences
 
 class BertForSentencePairClassification(EntityClassificationModel, BaseModel):
     """ Implementation of "Utilizing BERT for Aspect-Based Sentiment Analysis via Constructing Auxiliary Sentence" (NAACL 2019)
@@ -35,9 +35,9 @@ class BertForSentencePairClassification(EntityClassificationModel, BaseModel):
         # choose minimal sequence length to fit all examples
         if seq_length is None:
             seq_length = max((len(ids) for ids in sentence_pairs), default=0)
-        # convert to tensors
-        sentence_pairs = torch.LongTensor(align_shape(sentence_pairs, (len(sentence_pairs), seq_length), tokenizer.pad_token_id))
-        token_type_ids = torch.LongTensor(align_shape(token_type_ids, (len(token_type_ids), seq_length), tokenizer.pad_token_id))
+        # fill and convert to tensors
+        sentence_pairs = pad_sequences(sentence_pairs, seq_length, tokenizer.pad_token_id)
+        token_type_ids = pad_sequences(token_type_ids, seq_length, tokenizer.pad_token_id)
         labels = torch.LongTensor(labels) if labels is not None else None
         # return items
         return sentence_pairs, token_type_ids, labels
\ No newline at end of file
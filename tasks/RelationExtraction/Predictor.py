@@ -1,21 +1,83 @@
-# import numpy
+import inspect
+# import torch and numpy
+import torch
 import numpy as np
 # import base predictor
-from core.Predictor import BasePredictor
+from core.Predictor import BasePredictor, TokenizationContext
 # import base model and dataset type
 from .models import RelationExtractionModel
 from .datasets import RelationExtractionDataset
+# import utils
+from core.utils import pad_sequences
 
 class RelationExtractionPredictor(BasePredictor):
+    """ Predictor for Relation Extraction. Besides a single entity pair, an input can hold
+        multiple entity pairs of the same text given by the lists entity_spans_A and 
+        entity_spans_B. These are classified together, e.g. in a single forward pass by 
+        models grouping the pairs of a sentence, and result in the labels of all pairs.
+    """
 
     BASE_MODEL_TYPE = RelationExtractionModel
     BASE_DATASET_TYPE = RelationExtractionDataset
+    # example inputs used to trace the model
+    EXAMPLE_INPUTS = [
+        {'text': "Nasa sends names into space.", 'entity_span_A': (11, 16), 'entity_span_B': (22, 27)},
+        {'text': "The coffee was hot and tasty.", 'entity_span_A': (4, 10), 'entity_span_B': (15, 18)}
+    ]
+
+    @staticmethod
+    def is_multi_pair(args:tuple, kwargs:dict) -> bool:
+        """ Check if the arguments of an input hold multiple entity pairs """
+        if 'entity_spans_A' in kwargs:
+            return True
+        # spans of multiple pairs are lists of spans
+        return (len(args) > 1) and all(isinstance(span, (tuple, list)) for span in args[1])
+
+    def build_input(self, text, *args, **kwargs) -> dict:
+        if not RelationExtractionPredictor.is_multi_pair((text,) + args, kwargs):
+            return BasePredictor.build_input(self, text, *args, **kwargs)
+        # bind arguments of multiple entity pairs by name
+        return dict(inspect.signature(self.dataset_type.build_sentence_items).bind_partial(text, *args, **kwargs).arguments)
+
+    def build_features(self, *args, encoding:tuple =None, **kwargs) -> tuple:
+        if not RelationExtractionPredictor.is_multi_pair(args, kwargs):
+            return BasePredictor.build_features(self, *args, encoding=encoding, **kwargs)
+        # build the items of all valid entity pairs and group them as a single sentence
+        items = self.dataset_type.build_sentence_items(*args, **kwargs, tokenizer=self.tokenizer, encoding=encoding)
+        items = [item for item in items if item is not None]
+        if len(items) == 0:
+            return None
+        items = self.model.group_dataset_items(items, [0] * len(items))
+        features = [self.model.build_feature_tensors(*item, tokenizer=self.tokenizer) for item in items]
+        # all pairs need to be classified to match the labels to the pairs
+        if any(feats is None for feats in features):
+            return None
+        # stack the examples of all items and pad sequence features to the longest one
+        sequence_features = self.model.__class__.SEQUENCE_FEATURES
+        return tuple(
+            None if ts[0] is None else pad_sequences([row for t in ts for row in t], fill_value=self.tokenizer.pad_token_id) if k in sequence_features else torch.cat(ts, dim=0)
+            for k, ts in enumerate(zip(*features))
+        )
+
+    def compute_batch(self, inputs:list, batch_size:int =32, context:TokenizationContext =None) -> list:
+        outputs, texts, context = self.predict_outputs(inputs, batch_size=batch_size, context=context)
+        results = []
+        for (args, kwargs), out, text in zip(map(BasePredictor.input_args, inputs), outputs, texts):
+            # single entity pair
+            if not RelationExtractionPredictor.is_multi_pair(args, kwargs):
+                results.append(self.postprocess(*out)[0] if out is not None else None)
+                continue
+            # match labels to the entity pairs - pairs without dataset item keep no label
+            items = self.dataset_type.build_sentence_items(*args, **kwargs, tokenizer=self.tokenizer, encoding=context[text])
+            labels = iter(self.postprocess(*out).tolist() if out is not None else [])
+            results.append([next(labels, None) if item is not None else None for item in items])
+        return results
 
     def postprocess(self, logits, *additionals):
         # get numpy array of all posible labels
-        labels = np.array(self.dataset_type.RELATIONS)
-        # get predicted label
+        # prefer the labels the model was trained with
+        labels = np.array(self.labels or self.dataset_type.RELATIONS)
+        # get predicted labels of all entity pairs
+        # models classifying all pairs of a sentence return logits of shape (1, n_pairs, n_labels)
         pred = logits.max(dim=-1)[1].cpu().numpy()
-        label = labels[pred]
-        # return
-        return label[0]
+        return labels[pred].flatten()
@@ -0,0 +1,20 @@
+""" Relation Extraction Task """
+from core.Task import Task
+
+# all types are given by their qualified names and only imported on access
+task = Task(
+    predictor_type="tasks.RelationExtraction.Predictor:RelationExtractionPredictor",
+    trainer_type="tasks.RelationExtraction.Trainer:RelationExtractionTrainer",
+    base_model_type="tasks.RelationExtraction.models:RelationExtractionModel",
+    base_dataset_type="tasks.RelationExtraction.datasets:RelationExtractionDataset"
+)
+
+# register models
+task.register_model("BertForRelationExtraction", "tasks.RelationExtraction.models:BertForRelationExtraction")
+task.register_model("BertForSentenceRelationExtraction", "tasks.RelationExtraction.models:BertForSentenceRelationExtraction")
+# register datasets
+task.register_dataset("GermanYelp_Linking", "tasks.RelationExtraction.datasets:GermanYelp_Linking")
+task.register_dataset("GermanYelp_Polarity", "tasks.RelationExtraction.datasets:GermanYelp_Polarity")
+task.register_dataset("GermanYelp_LinkingAndPolarity", "tasks.RelationExtraction.datasets:GermanYelp_LinkingAndPolarity")
+task.register_dataset("SemEval2010Task8", "tasks.RelationExtraction.datasets:SemEval2010Task8")
+task.register_dataset("SmartdataCorpus", "tasks.RelationExtraction.datasets:SmartdataCorpus")
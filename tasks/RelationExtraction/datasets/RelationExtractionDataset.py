@@ -2,7 +2,7 @@
 from core.Dataset import BaseDataset
 from transformers import PreTrainedTokenizer
 # import utils
-from core.utils import build_token_spans
+from core.utils import encode_with_spans
 
 class __RelationExtractionDatasetType(type):
 
@@ -15,17 +15,23 @@ class RelationExtractionDataset(BaseDataset, metaclass=__RelationExtractionDatas
     """ Base Dataset for the Relation Extraction Task """
 
     RELATIONS = []
+    # the first item feature is the text
+    ENCODES_TEXT = True
 
     def yield_item_features(self, train:bool, data_base_dir:str ='./data') -> iter:
         raise NotImplementedError()
 
     @classmethod
-    def build_dataset_item(cls, text:str, entity_span_A:tuple, entity_span_B:tuple, label:str =None, tokenizer:PreTrainedTokenizer =None):
+    def sentence_key(cls, feats:tuple) -> str:
+        # consecutive entity pairs of the same text belong to the same sentence
+        return feats[0]
+
+    @classmethod
+    def build_dataset_item(cls, text:str, entity_span_A:tuple, entity_span_B:tuple, label:str =None, tokenizer:PreTrainedTokenizer =None, encoding:tuple =None):
         # get label id
         label = cls.RELATIONS.index(label) if label is not None else None
         # tokenize text and build token spans
-        tokens = tokenizer.tokenize(text)
-        token_spans = build_token_spans(tokens, text)
+        token_ids, token_spans = encoding if encoding is not None else encode_with_spans(text, tokenizer)
         # find entity tokens
         entity_tokens_A = [i for i, (b, e) in enumerate(token_spans) if (entity_span_A[0] <= b) and (e <= entity_span_A[1])]
         entity_tokens_B = [i for i, (b, e) in enumerate(token_spans) if (entity_span_B[0] <= b) and (e <= entity_span_B[1])]
@@ -39,7 +45,33 @@ class RelationExtractionDataset(BaseDataset, metaclass=__RelationExtractionDatas
         # find entity token spans
         entity_token_span_A = (entity_tokens_A[0], entity_tokens_A[-1] + 1)
         entity_token_span_B = (entity_tokens_B[0], entity_tokens_B[-1] + 1)
-        # convert tokens to ids
-        token_ids = tokenizer.convert_tokens_to_ids(tokens)
         # return item
-        return token_ids, entity_token_span_A, entity_token_span_B, label
\ No newline at end of file
+        return token_ids, entity_token_span_A, entity_token_span_B, label
+
+    @classmethod
+    def build_sentence_items(cls, text:str, entity_spans_A:list, entity_spans_B:list, labels:list =None, tokenizer:PreTrainedTokenizer =None, encoding:tuple =None) -> list:
+        """ Build the dataset items of multiple entity pairs of the same text. The text is 
+            tokenized only once. Returns None for entity pairs for which no item can be built.
+        """
+        labels = labels if labels is not None else [None] * len(entity_spans_A)
+        encoding = encoding if encoding is not None else encode_with_spans(text, tokenizer)
+        return [cls.build_dataset_item(text, A, B, label, encoding=encoding) for A, B, label in zip(entity_spans_A, entity_spans_B, labels)]
+
+    @staticmethod
+    def group_items_by_sentence(items:list, sentence_ids:list) -> list:
+        """ Group consecutive dataset items of the same sentence into a single item of the form
+            (input_ids, entity_token_spans_A, entity_token_spans_B, labels) holding all entity 
+            pairs of the sentence. Labels are None if the items are not labeled.
+        """
+        groups, prev = [], None
+        for (input_ids, entity_token_span_A, entity_token_span_B, label), sentence_id in zip(items, sentence_ids):
+            # start a new group for each new sentence
+            if (len(groups) == 0) or (sentence_id != prev):
+                groups.append((input_ids, [], [], []))
+                prev = sentence_id
+            # add entity pair to group
+            groups[-1][1].append(entity_token_span_A)
+            groups[-1][2].append(entity_token_span_B)
+            groups[-1][3].append(label)
+        # return grouped items
+        return [(input_ids, spans_A, spans_B, labels if None not in labels else None) for input_ids, spans_A, spans_B, labels in groups]
@@ -1,9 +1,11 @@
 import os
+import re
 import json
+import multiprocessing as mp
 # import base dataset
 from .RelationExtractionDataset import RelationExtractionDataset
 # utils
-from itertools import combinations
+from itertools import combinations, islice
 
 class SmartdataCorpus(RelationExtractionDataset):
     """ German Smartdata Corpus
@@ -14,40 +16,67 @@ class SmartdataCorpus(RelationExtractionDataset):
     TEST_FILE = "SmartdataCorpus/test.json"
 
     RELATIONS = ["Acquisition", "Insolvency", "Layoffs", "Merger", "OrganizationLeadership", "SpinOff", "Strike"]
+    ENTITY_TYPES = ['organization-company', 'person', 'org-position', 'trigger', 'organization']
+
+    # number of worker processes to decode documents with
+    # documents are decoded in the current process when set to zero
+    DECODE_WORKERS = 0
+    DECODE_CHUNK_SIZE = 64
 
     def yield_item_features(self, train:bool, data_base_dir:str ='./data'):
 
         # build full path 
         fname = SmartdataCorpus.TRAIN_FILE if train else SmartdataCorpus.TEST_FILE
         fpath = os.path.join(data_base_dir, fname)
-        # read data
+
+        # read documents line by line
+        # the first document of the dump is skipped
         with open(fpath, 'r', encoding='utf-8') as f:
-            json_dumps = f.read().split('}\n{')
-            json_dumps = [('' if i == 0 else '{') +  s + ('' if i == len(json_dumps) - 1 else '}') for i, s in enumerate(json_dumps)]
-            documents = [json.loads(dump) for dump in json_dumps][1:]
-
-        # process data
-        for doc in documents:
-            for sent in doc['sentences']['array']:
-                # get sentence string
-                begin, end = sent['span']['start'], sent['span']['end']
-                sent_string = doc['text']['string'][begin:end]
-                off = -begin
-
-                for rel in sent['relationMentions']['array']:
-                    rel_type = rel['name']
-
-                    # check type
-                    if rel_type not in SmartdataCorpus.RELATIONS:
-                        continue
-                    
-                    types = ['organization-company', 'person', 'org-position', 'trigger', 'organization']
-                    args = tuple(arg for arg in rel['args']['array'] if arg['conceptMention']['type'] in types)
-                    # create bi-relations from n-ary relations
-                    for argA, argB in combinations(args, 2):
-                        # get entity spans
-                        argA, argB = argA['conceptMention'], argB['conceptMention']
-                        spanA = (argA['span']['start'] + off, argA['span']['end'] + off)
-                        spanB = (argB['span']['start'] + off, argB['span']['end'] + off)
-
-                        yield sent_string, spanA, spanB, rel_type
+            lines = islice((line for line in f if len(line.strip()) > 0), 1, None)
+            # pool cannot be used from daemonic processes, e.g. dataloader workers
+            if (self.__class__.DECODE_WORKERS > 0) and not mp.current_process().daemon:
+                with mp.Pool(self.__class__.DECODE_WORKERS) as pool:
+                    for doc_items in pool.imap(decode_document, lines, chunksize=self.__class__.DECODE_CHUNK_SIZE):
+                        yield from doc_items
+            else:
+                for line in lines:
+                    yield from decode_document(line)
+
+
+# pattern matching any of the relation types
+# documents not matching it are skipped without decoding
+__RELATIONS_PATTERN = re.compile('|'.join(re.escape(rel) for rel in SmartdataCorpus.RELATIONS))
+
+def decode_document(line:str) -> list:
+    """ Decode a single json document and build the item features of all its relations """
+    # skip documents that cannot contain any relation of interest
+    if __RELATIONS_PATTERN.search(line) is None:
+        return []
+    doc = json.loads(line)
+
+    # process data
+    items = []
+    for sent in doc['sentences']['array']:
+        # get sentence string
+        begin, end = sent['span']['start'], sent['span']['end']
+        sent_string = doc['text']['string'][begin:end]
+        off = -begin
+
+        for rel in sent['relationMentions']['array']:
+            rel_type = rel['name']
+
+            # check type
+            if rel_type not in SmartdataCorpus.RELATIONS:
+                continue
+            
+            args = tuple(arg for arg in rel['args']['array'] if arg['conceptMention']['type'] in SmartdataCorpus.ENTITY_TYPES)
+            # create bi-relations from n-ary relations
+            for argA, argB in combinations(args, 2):
+                # get entity spans
+                argA, argB = argA['conceptMention'], argB['conceptMention']
+                spanA = (argA['span']['start'] + off, argA['span']['end'] + off)
+                spanB = (argB['span']['start'] + off, argB['span']['end'] + off)
+
+                items.append((sent_string, spanA, spanB, rel_type))
+    # return
+    return items
@@ -5,20 +5,17 @@ import torch.nn.functional as F
 from .RelationExtractionModel import RelationExtractionModel
 # import Bert Model and Tokenizer
 from transformers import BertModel, BertPreTrainedModel
-from transformers import BertTokenizer
+from transformers import BertTokenizer, BertTokenizerFast
 # import dataset
 from ..datasets import RelationExtractionDataset
 # import utils
-from core.utils import align_shape
+from core.utils import pad_sequences
 
-class BertForRelationExtractionTokenizer(BertTokenizer):
-    """ Tokenizer for the Bert Entity Classification Model """
+class __EntityMarkerTokens(object):
+    """ Entity marker tokens shared by the slow and fast tokenizer """
 
-    def __init__(self, *args, **kwargs) -> None:
-        # initialize tokenizer
-        BertTokenizer.__init__(self, *args, **kwargs)
-        # add entity marker tokens
-        self.add_tokens(['[e1]', '[/e1]', '[e2]', '[/e2]', '[blank]'])
+    # entity marker tokens
+    MARKER_TOKENS = ['[e1]', '[/e1]', '[e2]', '[/e2]', '[blank]']
 
     @property
     def entity1_token_id(self):
@@ -36,14 +33,33 @@ class BertForRelationExtractionTokenizer(BertTokenizer):
     def blank_token_id(self):
         return self.convert_tokens_to_ids('[blank]')
 
+class BertForRelationExtractionTokenizer(__EntityMarkerTokens, BertTokenizer):
+    """ Tokenizer for the Bert Entity Classification Model """
+
+    def __init__(self, *args, **kwargs) -> None:
+        # initialize tokenizer
+        BertTokenizer.__init__(self, *args, **kwargs)
+        # add entity marker tokens
+        self.add_tokens(self.MARKER_TOKENS)
+
+class BertForRelationExtractionTokenizerFast(__EntityMarkerTokens, BertTokenizerFast):
+    """ Fast Tokenizer for the Bert Relation Extraction Model """
+
+    def __init__(self, *args, **kwargs) -> None:
+        # initialize tokenizer
+        BertTokenizerFast.__init__(self, *args, **kwargs)
+        # add entity marker tokens
+        self.add_tokens(self.MARKER_TOKENS)
+
 
 class BertForRelationExtraction(RelationExtractionModel, BertPreTrainedModel):
     """ Implementation of "Matching the Blanks: Distributional Similarity for Relation Learning"
         Paper: https://arxiv.org/abs/1906.03158
     """
 
-    # set tokenizer type
+    # set tokenizer types
     TOKENIZER_TYPE = BertForRelationExtractionTokenizer
+    FAST_TOKENIZER_TYPE = BertForRelationExtractionTokenizerFast
 
     def __init__(self, config):
         BertPreTrainedModel.__init__(self, config)
@@ -82,13 +98,10 @@ class BertForRelationExtraction(RelationExtractionModel, BertPreTrainedModel):
         # get entity start positions
         e1_e2_start = (marked_input_ids.index(tokenizer.entity1_token_id), marked_input_ids.index(tokenizer.entity2_token_id))
 
-        if seq_length is not None:
-            # fill input ids to reach sequence length
-            assert len(marked_input_ids) <= seq_length
-            marked_input_ids = align_shape(marked_input_ids, (seq_length,), tokenizer.pad_token_id)
-
+        # fill input ids to reach sequence length
+        assert (seq_length is None) or (len(marked_input_ids) <= seq_length)
         # convert to tensors
-        marked_input_ids = torch.LongTensor([marked_input_ids])
+        marked_input_ids = pad_sequences([marked_input_ids], seq_length, tokenizer.pad_token_id)
         e1_e2_start = torch.LongTensor([e1_e2_start])
         label = torch.LongTensor([label]) if label is not None else None
         # return new item features
@@ -0,0 +1,128 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+# import base model
+from .RelationExtractionModel import RelationExtractionModel
+# import Bert Model
+from transformers import BertModel, BertPreTrainedModel
+# import dataset
+from ..datasets import RelationExtractionDataset
+# import utils
+from core.utils import pad_sequences, train_default_kwargs, eval_default_kwargs
+
+class BertForSentenceRelationExtraction(RelationExtractionModel, BertPreTrainedModel):
+    """ Relation Extraction Model that encodes each sentence only once and classifies all entity 
+        pairs of the sentence from the shared sequence output. Entities are represented by the 
+        mean of their token embeddings. In contrast to entity markers this needs a single forward
+        pass per sentence instead of one per entity pair.
+    """
+
+    def __init__(self, config):
+        BertPreTrainedModel.__init__(self, config)
+        # initialize bert and classifier
+        self.bert = BertModel(config)
+        self.dropout = nn.Dropout(config.hidden_dropout_prob)
+        self.classifier = nn.Linear(config.hidden_size * 2, config.num_labels)
+        # initialize weights
+        self.init_weights()
+
+    def group_dataset_items(self, items:list, sentence_ids:list) -> list:
+        # build one item per sentence holding all its entity pairs
+        return RelationExtractionDataset.group_items_by_sentence(items, sentence_ids)
+
+    @train_default_kwargs(max_pairs=8)
+    @eval_default_kwargs(seq_length=None, max_pairs=None)
+    def build_feature_tensors(self, input_ids:list, entity_spans_A:list, entity_spans_B:list, labels:list, seq_length:int =None, max_pairs:int =None, tokenizer=None) -> tuple:
+
+        if seq_length is not None:
+            # remove entity pairs that are out of bounds
+            valid = [max(e_A, e_B) <= seq_length for (_, e_A), (_, e_B) in zip(entity_spans_A, entity_spans_B)]
+            entity_spans_A = [span for span, v in zip(entity_spans_A, valid) if v]
+            entity_spans_B = [span for span, v in zip(entity_spans_B, valid) if v]
+            labels = [l for l, v in zip(labels, valid) if v] if labels is not None else None
+        # no entity pairs left
+        if len(entity_spans_A) == 0:
+            return None
+
+        # split entity pairs into chunks of at most max_pairs pairs
+        # each chunk is an example sharing the input ids of the sentence
+        max_pairs = max_pairs or len(entity_spans_A)
+        chunks = range(0, len(entity_spans_A), max_pairs)
+        n = len(chunks)
+        # build entity span tensors - padded pairs have empty spans
+        spans_A = torch.zeros((n, max_pairs, 2), dtype=torch.long)
+        spans_B = torch.zeros((n, max_pairs, 2), dtype=torch.long)
+        for i, b in enumerate(chunks):
+            spans_A[i, :len(entity_spans_A[b:b+max_pairs])] = torch.LongTensor(entity_spans_A[b:b+max_pairs])
+            spans_B[i, :len(entity_spans_B[b:b+max_pairs])] = torch.LongTensor(entity_spans_B[b:b+max_pairs])
+
+        # fill and convert to tensors
+        input_ids = pad_sequences([input_ids] * n, seq_length, tokenizer.pad_token_id)
+        labels = pad_sequences([labels[b:b+max_pairs] for b in chunks], max_pairs, -1) if labels is not None else None
+        # return feature tensors
+        return input_ids, spans_A, spans_B, labels
+
+    def preprocess(self, input_ids, entity_spans_A, entity_spans_B, labels, tokenizer):
+        # create attention mask
+        mask = (input_ids != tokenizer.pad_token_id)
+        # create keyword arguments
+        return {
+            'input_ids': input_ids,
+            'attention_mask': mask,
+            'entity_spans_A': entity_spans_A,
+            'entity_spans_B': entity_spans_B,
+            'labels': labels
+        }, labels
+
+    @staticmethod
+    def pool_spans(sequence_output:torch.FloatTensor, spans:torch.LongTensor) -> torch.FloatTensor:
+        """ Mean-pool the token embeddings of all spans. Empty spans result in zero vectors. """
+        # build mask of shape (batch, n_spans, seq_length) marking the tokens of each span
+        positions = torch.arange(sequence_output.size(1), device=sequence_output.device)
+        mask = (spans[:, :, 0:1] <= positions) & (positions < spans[:, :, 1:2])
+        mask = mask.to(sequence_output.dtype)
+        # average token embeddings of each span
+        pooled = mask.bmm(sequence_output)
+        return pooled / mask.sum(dim=-1, keepdim=True).clamp(min=1)
+
+    def forward(self, 
+        input_ids,
+        attention_mask=None,
+        token_type_ids=None,
+        entity_spans_A=None,
+        entity_spans_B=None,
+        position_ids=None,
+        head_mask=None,
+        inputs_embeds=None,
+        labels=None,
+        output_attentions=None,
+        output_hidden_states=None,
+    ):
+        # pass through bert
+        outputs = self.bert(
+            input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids, 
+            position_ids=position_ids, head_mask=head_mask, inputs_embeds=inputs_embeds, 
+            output_attentions=output_attentions, output_hidden_states=output_hidden_states
+        )
+
+        sequence_output = outputs[0]
+        # build classifier input for all entity pairs
+        v1v2 = torch.cat((
+            BertForSentenceRelationExtraction.pool_spans(sequence_output, entity_spans_A),
+            BertForSentenceRelationExtraction.pool_spans(sequence_output, entity_spans_B)
+        ), dim=-1)
+        # pass through classifier
+        v1v2 = self.dropout(v1v2)
+        logits = self.classifier(v1v2)
+        # build outputs
+        outputs = (logits,) + outputs[2:]
+
+        # compute the loss
+        if labels is not None:
+            # get valid labels and logits
+            mask = labels >= 0
+            loss = F.cross_entropy(logits[mask], labels[mask])
+            outputs = (loss,) + outputs
+
+        # return output
+        return outputs
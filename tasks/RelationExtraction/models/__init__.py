@@ -1,2 +1,3 @@
 from .RelationExtractionModel import RelationExtractionModel
-from .BertForRelationExtraction import BertForRelationExtraction
\ No newline at end of file
+from .BertForRelationExtraction import BertForRelationExtraction
+from .BertForSentenceRelationExtraction import BertForSentenceRelationExtraction
\ No newline at end of file
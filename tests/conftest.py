@@ -0,0 +1,4 @@
+import os
+import sys
+# make the modules of the repository importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
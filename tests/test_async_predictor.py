@@ -0,0 +1,59 @@
+""" Tests of the asyncio front-end of the predictors """
+import time
+import asyncio
+# import async predictor
+from core.AsyncPredictor import AsyncPredictor
+
+
+class UpperPredictor(object):
+    """ Predictor failing on the input "bad" """
+
+    def __init__(self):
+        self.batches = []
+
+    def build_input(self, text):
+        return text
+
+    def predict_batch(self, inputs, batch_size):
+        self.batches.append(list(inputs))
+        if "bad" in inputs:
+            raise ValueError("bad input")
+        return [inp.upper() for inp in inputs]
+
+
+def test_batches_concurrent_requests():
+    predictor = UpperPredictor()
+    async_predictor = AsyncPredictor(predictor, max_batch_size=8, max_wait=0.1)
+    async def run():
+        return await asyncio.gather(*(async_predictor.predict_async(text) for text in "abc"))
+    try:
+        assert asyncio.run(run()) == ["A", "B", "C"]
+        assert predictor.batches == [["a", "b", "c"]]
+    finally:
+        async_predictor.close()
+
+def test_invalid_input_only_fails_its_own_request():
+    predictor = UpperPredictor()
+    async_predictor = AsyncPredictor(predictor, max_batch_size=8, max_wait=0.1)
+    async def run():
+        return await asyncio.gather(*(async_predictor.predict_async(text) for text in ["a", "bad", "c"]), return_exceptions=True)
+    try:
+        a, bad, c = asyncio.run(run())
+        assert (a, c) == ("A", "C") and isinstance(bad, ValueError)
+        # the failed batch is predicted one input at a time
+        assert predictor.batches[1:] == [["a"], ["bad"], ["c"]]
+    finally:
+        async_predictor.close()
+
+def test_closed_event_loop_of_caller():
+    async_predictor = AsyncPredictor(UpperPredictor(), max_batch_size=8, max_wait=0.01)
+    try:
+        # the caller's event loop is closed before the result is resolved
+        loop = asyncio.new_event_loop()
+        async_predictor.queue.put(("a", loop.create_future(), loop, time.monotonic()))
+        loop.close()
+        # the inference thread keeps serving requests
+        assert asyncio.run(async_predictor.predict_async("b")) == "B"
+        assert async_predictor.thread.is_alive()
+    finally:
+        async_predictor.close()
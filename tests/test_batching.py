@@ -0,0 +1,34 @@
+""" Tests of the length-grouped batch sampler """
+import random
+# import torch and pytest
+import torch
+import pytest
+# import batch sampler
+from core.Batching import BucketBatchSampler
+
+
+@pytest.mark.parametrize('shuffle', [True, False])
+def test_token_budget(shuffle):
+    torch.manual_seed(0)
+    rng = random.Random(0)
+    lengths = [rng.randint(1, 64) for _ in range(500)]
+    sampler = BucketBatchSampler(lengths, max_tokens=256, shuffle=shuffle, pool_size=4)
+    batches = list(sampler)
+    # each example is part of exactly one batch
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    # the padded batches stay within the budget
+    assert all(len(batch) * max(lengths[i] for i in batch) <= 256 for batch in batches)
+
+def test_example_exceeding_budget_forms_own_batch():
+    sampler = BucketBatchSampler([4, 100, 4], max_tokens=16, shuffle=False)
+    assert list(sampler) == [[0, 2], [1]]
+
+def test_fixed_batch_size_sorted():
+    lengths = [5, 1, 4, 2, 3]
+    sampler = BucketBatchSampler(lengths, batch_size=2, shuffle=False)
+    assert list(sampler) == [[1, 3], [4, 2], [0]]
+    assert len(sampler) == 3
+
+def test_requires_batch_size_or_budget():
+    with pytest.raises(ValueError):
+        BucketBatchSampler([1, 2, 3])
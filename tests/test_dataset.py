@@ -0,0 +1,62 @@
+""" Tests of building the feature tensors of datasets """
+# import torch and pytest
+import torch
+import pytest
+# import base dataset
+from core.Dataset import BaseDataset, _yield_chunks
+
+
+class ToyDataset(BaseDataset):
+    """ Items are integers, multiples of 7 are invalid """
+
+    @classmethod
+    def build_dataset_item(cls, x, tokenizer):
+        return (x,) if x % 7 != 0 else None
+
+class ToyModel(object):
+    """ Builds a varying number of examples per item """
+
+    def feature_builder(self):
+        return self
+
+    def group_dataset_items(self, items, sentence_ids):
+        return items
+
+    def build_feature_tensors(self, x, seq_length, tokenizer):
+        n = x % 3
+        return (torch.full((n, seq_length), x), torch.arange(n) + 10 * x) if n > 0 else None
+
+
+def expected_features(items:list, seq_length:int) -> tuple:
+    feats = [ToyModel().build_feature_tensors(x, seq_length, None) for (x,) in items if x % 7 != 0]
+    feats = [f for f in feats if f is not None]
+    return tuple(torch.cat(ts, dim=0) for ts in zip(*feats))
+
+
+@pytest.mark.parametrize('num_workers', [0, 2])
+def test_build_features_keeps_order(num_workers):
+    items = [(x,) for x in range(1, 200)]
+    dataset = ToyDataset.__new__(ToyDataset)
+    tensors = dataset.build_features(items, ToyModel(), None, 4, num_workers=num_workers, chunk_size=16)
+    expected = expected_features(items, 4)
+    assert len(tensors) == len(expected)
+    assert all(torch.equal(a, b) for a, b in zip(tensors, expected))
+    assert dataset.build_stats[0] == len(items)
+
+def test_build_features_from_iterator():
+    # the number of items is not known in advance
+    dataset = ToyDataset.__new__(ToyDataset)
+    items = [(x,) for x in range(1, 50)]
+    tensors = dataset.build_features(iter(items), ToyModel(), None, 2, chunk_size=4)
+    assert all(torch.equal(a, b) for a, b in zip(tensors, expected_features(items, 2)))
+
+def test_build_features_without_valid_items():
+    dataset = ToyDataset.__new__(ToyDataset)
+    assert dataset.build_features([(7,), (14,), (3,)], ToyModel(), None, 2) == ()
+
+def test_chunks_keep_sentences_together():
+    items = [("a", 0), ("a", 1), ("a", 2), ("b", 3), ("c", 4), ("c", 5)]
+    # chunks are extended until the sentence changes
+    chunks = list(_yield_chunks(items, 2, key=lambda item: item[0]))
+    assert chunks == [items[:3], items[3:]]
+    assert [len(chunk) for chunk in _yield_chunks(items, 4)] == [4, 2]
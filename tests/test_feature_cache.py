@@ -0,0 +1,76 @@
+""" Tests of the keys and invalidation of the feature cache """
+import os
+# import torch
+import torch
+# import cache and base dataset
+from core.Dataset import BaseDataset
+from core.FeatureCache import FeatureCache
+
+
+class ToyDataset(BaseDataset):
+    TRAIN_FILE = "toy/train.txt"
+
+class ToyModel(object):
+    training = True
+
+class ToyTokenizer(object):
+    def __init__(self, vocab:dict):
+        self.vocab = vocab
+    def get_vocab(self) -> dict:
+        return self.vocab
+
+
+def write(fpath:str, content:str) -> None:
+    os.makedirs(os.path.dirname(fpath), exist_ok=True)
+    with open(fpath, 'w') as f:
+        f.write(content)
+
+
+def test_items_key_follows_source_files(tmp_path):
+    cache = FeatureCache(str(tmp_path / "cache"))
+    data_dir = str(tmp_path / "data")
+    write(os.path.join(data_dir, ToyDataset.TRAIN_FILE), "a")
+    key = cache.items_key(ToyDataset, True, data_dir)
+    # same inputs result in the same key
+    assert cache.items_key(ToyDataset, True, data_dir) == key
+    # other split and changed source file
+    assert cache.items_key(ToyDataset, False, data_dir) != key
+    write(os.path.join(data_dir, ToyDataset.TRAIN_FILE), "b")
+    assert cache.items_key(ToyDataset, True, data_dir) != key
+
+def test_features_key_follows_inputs(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    model, tokenizer = ToyModel(), ToyTokenizer({'a': 0, 'b': 1})
+    key = cache.features_key("items", model, tokenizer, 8, {})
+    assert cache.features_key("items", model, tokenizer, 8, {}) == key
+    assert cache.features_key("other", model, tokenizer, 8, {}) != key
+    assert cache.features_key("items", model, tokenizer, 16, {}) != key
+    assert cache.features_key("items", model, tokenizer, 8, {'max_pairs': 4}) != key
+    assert cache.features_key("items", model, ToyTokenizer({'a': 0, 'c': 1}), 8, {}) != key
+    # features depend on the mode of the model
+    model.training = False
+    assert cache.features_key("items", model, tokenizer, 8, {}) != key
+
+def test_save_load_and_invalidate(tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    tensors = (torch.arange(6).view(3, 2), torch.ones(3))
+    # miss, save and hit
+    assert cache.load_items(ToyDataset, True, "old") is None
+    assert cache.load_features(ToyDataset, True, "old", "features") is None
+    cache.save_items(ToyDataset, True, "old", [("a",), ("b",)])
+    cache.save_features(ToyDataset, True, "old", "features", tensors)
+    assert cache.load_items(ToyDataset, True, "old") == [("a",), ("b",)]
+    assert all(torch.equal(a, b) for a, b in zip(cache.load_features(ToyDataset, True, "old", "features"), tensors))
+    # entries of other items of the split are removed, the other split is kept
+    cache.save_items(ToyDataset, False, "old", [("c",)])
+    cache.save_items(ToyDataset, True, "new", [("d",)])
+    assert cache.load_items(ToyDataset, True, "old") is None
+    assert cache.load_features(ToyDataset, True, "old", "features") is None
+    assert cache.load_items(ToyDataset, False, "old") == [("c",)]
+
+def test_memory_mapped_features(tmp_path):
+    cache = FeatureCache(str(tmp_path), memory_map=True, shard_size=2)
+    tensors = (torch.arange(10).view(5, 2), torch.arange(5).float())
+    # memory-mapped tensors are indexed by example
+    for loaded in (cache.save_features(ToyDataset, True, "items", "features", tensors), cache.load_features(ToyDataset, True, "items", "features")):
+        assert all(torch.equal(torch.stack([a[i] for i in range(len(a))]), b) for a, b in zip(loaded, tensors))
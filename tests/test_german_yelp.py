@@ -0,0 +1,16 @@
+""" Tests of the parsing of the GermanYelp corpus """
+# import numpy and pandas
+import numpy as np
+import pandas as pd
+# import span parsing
+from core.GermanYelp import parse_spans
+
+
+def test_parse_spans_matches_eval():
+    spans = ["(0, 5)", "(12,20)", " ( 3 , 4 ) ", "[7, 9]", "(100, 1024)"]
+    # previously all spans were evaluated as python literals
+    assert parse_spans(pd.Series(spans)) == [tuple(eval(span)) for span in spans]
+
+def test_parse_spans_missing_and_malformed():
+    spans = pd.Series(["(1, 2)", np.nan, None, "", "(1, 2, 3)", "(a, b)", "1, 2"], dtype=object)
+    assert parse_spans(spans) == [(1, 2), None, None, None, None, None, None]
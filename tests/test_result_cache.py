@@ -0,0 +1,76 @@
+""" Tests of the prediction result cache """
+import time
+import threading
+# import pytest
+import pytest
+# import result cache
+from core.ResultCache import ResultCache, normalize_whitespace
+
+
+def test_hits_and_duplicates():
+    cache, calls = ResultCache("test"), []
+    compute = lambda inputs: calls.append(list(inputs)) or [inp['text'].upper() for inp in inputs]
+    assert cache.get_or_compute([{'text': "a"}, {'text': "b"}, {'text': "a"}], compute) == ["A", "B", "A"]
+    assert cache.get_or_compute([{'text': "b"}, {'text': "c"}], compute) == ["B", "C"]
+    # each input is computed once
+    assert calls == [[{'text': "a"}, {'text': "b"}], [{'text': "c"}]]
+    assert cache.stats['memory-hits'] == 1
+
+def test_concurrent_requests_are_coalesced():
+    cache, calls, started = ResultCache("test"), [], threading.Event()
+    def compute(inputs):
+        calls.append(inputs)
+        started.set()
+        time.sleep(0.2)
+        return [[inp['text']] for inp in inputs]
+    results = []
+    thread = threading.Thread(target=lambda: results.append(cache.get_or_compute([{'text': "a"}], compute)))
+    thread.start()
+    started.wait()
+    # the second request waits for the result of the first one
+    results.append(cache.get_or_compute([{'text': "a"}], compute))
+    thread.join()
+    assert (len(calls) == 1) and (results == [[["a"]], [["a"]]])
+    assert cache.stats['coalesced'] == 1
+    # each request receives its own copy
+    results[0][0].append("b")
+    assert results[1][0] == ["a"]
+
+def test_waiting_requests_receive_the_error():
+    cache, started = ResultCache("test"), threading.Event()
+    class ComputeError(Exception):
+        pass
+    def compute(inputs):
+        started.set()
+        time.sleep(0.2)
+        raise ComputeError()
+    errors = []
+    def request():
+        try:
+            cache.get_or_compute([{'text': "a"}], compute)
+        except ComputeError as e:
+            errors.append(e)
+    thread = threading.Thread(target=request)
+    thread.start()
+    started.wait()
+    request()
+    thread.join()
+    assert len(errors) == 2
+    # failed results are not cached
+    assert cache.get_or_compute([{'text': "a"}], lambda inputs: ["A"]) == ["A"]
+
+def test_disk_tier(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    ResultCache("test", db_path=db_path).get_or_compute([{'text': "a"}], lambda inputs: ["A"])
+    # a new cache reads the results of the database
+    cache = ResultCache("test", db_path=db_path)
+    assert cache.get_or_compute([{'text': "a"}], lambda inputs: pytest.fail("result should be cached")) == ["A"]
+    assert cache.stats['disk-hits'] == 1
+    # other namespaces do not share results
+    assert ResultCache("other", db_path=db_path).get_or_compute([{'text': "a"}], lambda inputs: ["B"]) == ["B"]
+
+def test_normalized_texts_share_results():
+    assert normalize_whitespace("a\tb c") == "a b c"
+    cache = ResultCache("test", normalize_texts=True)
+    cache.get_or_compute([{'text': "a b"}], lambda inputs: ["A"])
+    assert cache.get_or_compute([{'text': "a\tb"}], lambda inputs: ["B"]) == ["A"]
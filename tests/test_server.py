@@ -0,0 +1,55 @@
+""" Smoke test of the inference server on localhost """
+import os
+import re
+import sys
+import json
+import signal
+import subprocess
+import urllib.error
+import urllib.request
+# import pytest
+import pytest
+
+# serves a predictor echoing the upper-cased text from two workers on an unused port
+SERVE = """
+import torch, server
+class EchoPredictor(object):
+    def __init__(self):
+        self.model = torch.nn.Linear(4, 4)
+    def predict_batch(self, inputs):
+        return [inp['text'].upper() for inp in inputs]
+server.serve({'Echo': EchoPredictor()}, port=0, num_workers=2, num_threads=1)
+"""
+
+
+def request(url:str, body:dict =None) -> tuple:
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="The server forks its workers")
+def test_serve_and_terminate():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen([sys.executable, '-c', SERVE], cwd=root, stdout=subprocess.PIPE, text=True)
+    try:
+        # wait for the server to listen
+        line = proc.stdout.readline()
+        port = int(re.search(r"http://[^:]+:(\d+)", line).group(1))
+        url = "http://127.0.0.1:%i" % port
+        # health check
+        status, body = request(url + "/health")
+        assert (status == 200) and (body['routes'] == ['Echo'])
+        # single and multiple inputs
+        assert request(url + "/Echo", {'text': "abc"}) == (200, {'result': "ABC"})
+        assert request(url + "/Echo", {'inputs': [{'text': "a"}, {'text': "b"}]}) == (200, {'results': ["A", "B"]})
+        # unknown route
+        assert request(url + "/Unknown", {'text': "abc"})[0] == 404
+    finally:
+        # terminating the parent stops all workers
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+        proc.stdout.close()
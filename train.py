@@ -1,71 +1,92 @@
 """ Training Script for all BERT Models """
-import torch
+import argparse
+# import task registry
+from core.Task import get_task
+# import launcher
+from core.Distributed import launch
 
 
-# Aspect-based Sentiment Analysis imports
-# from tasks.AspectBasedSentimentAnalysis.Trainer import AspectBasedSentimentAnalysisTrainer as Trainer
-# from tasks.AspectBasedSentimentAnalysis.models import BertForSentencePairClassification, BertCapsuleNetwork
-# from tasks.AspectBasedSentimentAnalysis.datasets import (
-#     SemEval2014Task4,
-#     SemEval2014Task4_Laptops,
-#     SemEval2014Task4_Restaurants,
-#     SemEval2014Task4_Category,
-# )
-
-# Aspect Opinion Extraction imports
-# from tasks.AspectOpinionExtraction.Trainer import AspectOpinionExtractionTrainer as Trainer
-# from tasks.AspectOpinionExtraction.models import BertForAspectOpinionExtraction
-# from tasks.AspectOpinionExtraction.datasets import (
-#     SemEval2015Task12, 
-#     GermanYelpDataset
-# )
-
-# Entity Classfication imports
-from tasks.EntityClassification.Trainer import EntityClassificationTrainer as Trainer
-from tasks.EntityClassification.models import (
-    BertForEntityClassification, 
-    BertForSentencePairClassification,
-    BertCapsuleNetwork
-)
-from tasks.EntityClassification.datasets import (
-    SemEval2015Task12_AspectPolarity, 
-    SemEval2015Task12_OpinionPolarity, 
-    GermanYelp_OpinionPolarity,
-    GermanYelp_AspectPolarity,
-    SemEval2014Task4,
-    SemEval2014Task4_Laptops,
-    SemEval2014Task4_Restaurants
-)
+def train(task:str, model_name:str, dataset_name:str, trainer_kwargs:dict, epochs:int, dump_base_path:str) -> None:
+    """ Train a model on a dataset and save the results. Runs in each process of a data-parallel run. """
+    # import trainer, model and dataset type
+    task = get_task(task)
+    trainer_type, model_type, dataset_type = task.trainer_type, task.model_type(model_name), task.dataset_type(dataset_name)
+    # create trainer
+    trainer = trainer_type(
+        model_type=model_type,
+        dataset_type=dataset_type,
+        **trainer_kwargs
+    )
+    # train and save results
+    trainer.train(epochs=epochs)
+    trainer.dump(dump_base_path)
 
-# Relation Extraction imports
-# from tasks.RelationExtraction.Trainer import RelationExtractionTrainer as Trainer
-# from tasks.RelationExtraction.models import BertForRelationExtraction
-# from tasks.RelationExtraction.datasets import (
-#     SemEval2010Task8,
-#     GermanYelp_Linking,
-#     GermanYelp_Polarity,
-#     GermanYelp_LinkingAndPolarity,
-#     SmartdataCorpus,
-# )
 
 if __name__ == '__main__':
 
-    # create trainer
-    trainer = Trainer(
-        # model
-        model_type = BertForEntityClassification,
-        pretrained_name = 'bert-base-german-cased',
-        device = 'cpu',
-        # dataset
-        dataset_type = GermanYelp_AspectPolarity,
-        data_base_dir = "./data",
-        seq_length = 64,
-        batch_size = 8,
-        # optimizer
-        learning_rate = 1e-5,
-        weight_decay = 0.01,
-    )
-    # train and save results
-    trainer.train(epochs=5)
-    trainer.dump('./results/')
+    # parse arguments
+    parser = argparse.ArgumentParser(description="Train a model on a dataset, optionally data-parallel in multiple processes.")
+    parser.add_argument("--task", type=str, default="EntityClassification", help="Name of the task")
+    parser.add_argument("--model", type=str, default="BertForEntityClassification", help="Name of the model")
+    parser.add_argument("--dataset", type=str, default="GermanYelp_AspectPolarity", help="Name of the dataset")
+    parser.add_argument("--pretrained-name", type=str, default="bert-base-german-cased", help="Name of the pretrained model")
+    parser.add_argument("--device", type=str, default="cpu", help="Device to train on")
+    parser.add_argument("--fast-tokenizer", action='store_true', help="Use the fast tokenizer of the model")
+    parser.add_argument("--precision", type=str, default="fp32", choices=['fp32', 'bf16'], help="Precision of the forward pass")
+    parser.add_argument("--data-base-dir", type=str, default="./data", help="Base directory of the datasets")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Directory of the feature cache, features are not cached by default")
+    parser.add_argument("--memory-map", action='store_true', help="Memory-map the cached features instead of loading them")
+    parser.add_argument("--num-build-workers", type=int, default=0, help="Number of processes building the features")
+    parser.add_argument("--streaming", action='store_true', help="Build the features lazily while iterating the training data")
+    parser.add_argument("--shuffle-buffer-size", type=int, default=1024, help="Number of examples streamed training data is shuffled in")
+    parser.add_argument("--dynamic-padding", action='store_true', help="Only pad sequences to the longest sequence of their batch")
+    parser.add_argument("--max-tokens", type=int, default=None, help="Maximum number of padded tokens per batch with dynamic padding")
+    parser.add_argument("--seq-length", type=int, default=64, help="Sequence length")
+    parser.add_argument("--batch-size", type=int, default=8, help="Batch size of each process")
+    parser.add_argument("--micro-batch-size", type=int, default=None, help="Number of examples passed through the model at once")
+    parser.add_argument("--gradient-checkpointing", action='store_true', help="Recompute activations during the backward pass")
+    parser.add_argument("--num-workers", type=int, default=0, help="Number of dataloader worker processes")
+    parser.add_argument("--prefetch-factor", type=int, default=None, help="Number of batches each dataloader worker loads in advance")
+    parser.add_argument("--persistent-workers", action='store_true', help="Keep the dataloader workers alive between epochs")
+    parser.add_argument("--worker-threads", type=int, default=1, help="Number of threads torch uses in each dataloader worker")
+    parser.add_argument("--learning-rate", type=float, default=1e-5, help="Learning rate")
+    parser.add_argument("--weight-decay", type=float, default=0.01, help="Weight decay")
+    parser.add_argument("--epochs", type=int, default=5, help="Number of epochs")
+    parser.add_argument("--dump-dir", type=str, default="./results/", help="Base directory of the results")
+    parser.add_argument("--nprocs", type=int, default=1, help="Number of data-parallel training processes")
+    parser.add_argument("--threads", type=int, default=None, help="Number of threads per process, defaults to an equal share of the cores")
+    args = parser.parse_args()
 
+    # train in all processes
+    launch(
+        train, args.nprocs,
+        args.task, args.model, args.dataset, {
+            # model
+            'pretrained_name': args.pretrained_name,
+            'device': args.device,
+            'fast_tokenizer': args.fast_tokenizer,
+            'precision': args.precision,
+            'gradient_checkpointing': args.gradient_checkpointing,
+            # dataset
+            'data_base_dir': args.data_base_dir,
+            'seq_length': args.seq_length,
+            'batch_size': args.batch_size,
+            'micro_batch_size': args.micro_batch_size,
+            'cache_dir': args.cache_dir,
+            'memory_map': args.memory_map,
+            'num_build_workers': args.num_build_workers,
+            'streaming': args.streaming,
+            'shuffle_buffer_size': args.shuffle_buffer_size,
+            'dynamic_padding': args.dynamic_padding,
+            'max_tokens': args.max_tokens,
+            'num_workers': args.num_workers,
+            'prefetch_factor': args.prefetch_factor,
+            'persistent_workers': args.persistent_workers,
+            'worker_threads': args.worker_threads,
+            # optimizer
+            'learning_rate': args.learning_rate,
+            'weight_decay': args.weight_decay
+        },
+        args.epochs, args.dump_dir,
+        threads=args.threads
+    )